@@ -0,0 +1,192 @@
+"""
+Rate limiting and prioritisation of AI API calls.
+
+Every call waits for a slot from two token buckets, one for requests per
+minute and one for tokens per minute. Waiting calls are served strictly by
+priority class (interactive before grading before background), then in
+arrival order. When the provider answers 429, all calls pause for the
+retry-after period (or an exponential backoff), the effective rate is cut,
+and the call is retried. The rate then recovers gradually as calls succeed.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+INTERACTIVE = 0
+GRADING = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', GRADING: 'grading', BACKGROUND: 'background'}
+
+# Bounds of the adaptive rate multiplier applied after 429 responses
+MIN_RATE_SCALE = 0.25
+RATE_DECREASE = 0.7
+RATE_RECOVERY = 1.02
+
+
+def is_rate_limited(error):
+    """True for a 429 (rate limited) or 529 (overloaded) API error"""
+    return getattr(error, 'status_code', None) in (429, 529)
+
+
+def _retry_after(error):
+    """Seconds the provider asked us to wait, if it said"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills at rate_per_minute * scale, holding at most one minute's worth"""
+
+    def __init__(self, rate_per_minute):
+        self.rate_per_minute = rate_per_minute
+        self.scale = 1.0
+        self.level = float(rate_per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        rate = self.rate_per_minute * self.scale / 60
+        self.level = min(self.rate_per_minute, self.level + (now - self.updated) * rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount is available (requests larger than the bucket wait for a full one)"""
+        self._refill(now)
+        amount = min(amount, self.rate_per_minute)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / (self.rate_per_minute * self.scale / 60)
+
+    def consume(self, amount):
+        self.level -= amount
+
+    def refund(self, amount):
+        self.level = min(self.rate_per_minute, self.level + amount)
+
+
+class AIScheduler:
+    """Admit AI calls in priority order within request and token rate limits"""
+
+    def __init__(self, requests_per_minute=50, tokens_per_minute=40000, max_retries=3, max_backoff=60):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+
+        self._condition = threading.Condition()
+        self._queue = []  # Heap of (priority, seq) tickets
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._backoff = 0.0
+
+        self.max_depth = 0
+        self.rate_limited = 0
+        self._stats = {
+            priority: {'admitted': 0, 'throttled': 0, 'wait_seconds': 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+    def run(self, call, priority=INTERACTIVE, tokens=0):
+        """Run call() once admitted, retrying with backoff if it is rate limited
+
+        tokens are reserved once for the whole call: a rate-limited attempt
+        used none of them, so retries only wait for a request slot. If the
+        call fails for good the reservation is returned.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(priority, tokens if attempt == 0 else 0)
+            try:
+                result = call()
+            except Exception as e:
+                if is_rate_limited(e) and attempt < self.max_retries:
+                    self._on_rate_limited(e)
+                    continue
+                self.refund(tokens)
+                raise
+            self._on_success()
+            return result
+
+    def acquire(self, priority=INTERACTIVE, tokens=0):
+        """Block until this call may be sent"""
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            self.max_depth = max(self.max_depth, len(self._queue))
+            try:
+                while True:
+                    wait = None
+                    if self._queue[0] == ticket:
+                        now = time.monotonic()
+                        wait = max(self._paused_until - now,
+                                   self.requests.wait_time(1, now),
+                                   self.tokens.wait_time(tokens, now))
+                        if wait <= 0:
+                            self.requests.consume(1)
+                            self.tokens.consume(tokens)
+                            break
+                    self._condition.wait(timeout=wait)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+
+            waited = time.monotonic() - start
+            stats = self._stats[priority]
+            stats['admitted'] += 1
+            stats['wait_seconds'] += waited
+            if waited > 0.001:
+                stats['throttled'] += 1
+
+    def refund(self, tokens):
+        """Return reserved tokens that a call turned out not to use (negative: charge for extra ones)"""
+        if tokens:
+            with self._condition:
+                self.tokens.refund(tokens)
+                self._condition.notify_all()
+
+    def _on_rate_limited(self, error):
+        with self._condition:
+            self.rate_limited += 1
+            self._backoff = min(self.max_backoff, max(1.0, self._backoff * 2))
+            pause = _retry_after(error) or self._backoff
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            for bucket in (self.requests, self.tokens):
+                bucket.scale = max(MIN_RATE_SCALE, bucket.scale * RATE_DECREASE)
+            print(f"[AI Scheduler] Rate limited by the API, pausing {pause:.1f}s "
+                  f"(rate now {self.requests.scale:.0%} of limit)")
+
+    def _on_success(self):
+        with self._condition:
+            self._backoff /= 2
+            for bucket in (self.requests, self.tokens):
+                bucket.scale = min(1.0, bucket.scale * RATE_RECOVERY)
+
+    def stats(self):
+        with self._condition:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._queue:
+                depth[PRIORITY_NAMES[priority]] += 1
+            return {
+                'queue_depth': depth,
+                'max_queue_depth': self.max_depth,
+                'rate_limited': self.rate_limited,
+                'paused_for_seconds': round(max(0.0, self._paused_until - time.monotonic()), 2),
+                'rate_scale': round(self.requests.scale, 3),
+                'requests_per_minute': self.requests.rate_per_minute,
+                'tokens_per_minute': self.tokens.rate_per_minute,
+                'priorities': {
+                    PRIORITY_NAMES[priority]: {
+                        'admitted': stats['admitted'],
+                        'throttled': stats['throttled'],
+                        'avg_wait_ms': round(stats['wait_seconds'] / stats['admitted'] * 1000, 1)
+                        if stats['admitted'] else 0.0
+                    }
+                    for priority, stats in self._stats.items()
+                }
+            }
@@ -1,13 +1,124 @@
-from anthropic import Anthropic
+import hashlib
 import json
 import re
 import os
+import threading
+import time
+from collections import OrderedDict
+
+from ai_scheduler import AIScheduler, BACKGROUND, GRADING, INTERACTIVE
+from ai_usage import AIUsageTracker
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from json_stream import IncrementalJSONParser
+from result_summary import summarize_result
+
+# Tables of the default e-commerce dataset, used when no schema description is passed
+DEFAULT_SCHEMA_DESCRIPTION = """**customers**: customer_id, first_name, last_name, email, phone, city, state, country, registration_date, is_active
+**products**: product_id, product_name, category, price, cost, stock_quantity, supplier
+**orders**: order_id, customer_id, order_date, ship_date, total_amount, status
+**order_items**: order_item_id, order_id, product_id, quantity, unit_price, discount
+**employees**: employee_id, first_name, last_name, email, department, position, salary, hire_date, manager_id
+**sales**: sale_id, employee_id, sale_date, amount, region"""
+
+# What problems at each difficulty level should cover
+DIFFICULTY_LEVELS = {
+    'basic': 'Basic SELECT, WHERE, and simple filtering',
+    'intermediate': 'JOINs, GROUP BY, HAVING, and aggregate functions',
+    'advanced': 'Window functions, subqueries, CTEs, and complex multi-table queries',
+    'expert': 'Recursive CTEs, advanced analytics, and performance optimization'
+}
+
+# Instructions shared by every check_answer request (sent as a cached system prefix)
+CHECK_INSTRUCTIONS = """You are a SQL tutor checking a student's answer.
+
+Analyze the student's query and provide feedback. Consider:
+1. Does it solve the problem correctly?
+2. Is the approach efficient and follows best practices?
+3. Are there any errors or improvements needed?
+
+Return a JSON object with:
+- "correct": boolean (true if query is correct and efficient)
+- "score": number 0-100 (quality of the solution)
+- "message": string (encouraging feedback message)
+- "improvements": array of strings (suggestions for improvement, empty if perfect)
+- "praise": string (what they did well, even if incorrect)
+
+Be encouraging and educational. Even incorrect answers should get constructive feedback."""
+
+# What each level of the hint ladder should give away
+HINT_LEVELS = {
+    1: "Give a very gentle nudge in the right direction without revealing the solution",
+    2: "Provide more specific guidance about which SQL concepts or clauses to use",
+    3: "Give a detailed hint that almost reveals the solution but requires the student to put it together"
+}
+
+# Providers only cache prompt prefixes of at least this many tokens; shorter ones are billed as plain input
+MIN_CACHEABLE_TOKENS = {'haiku': 2048}
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+def min_cacheable_tokens(model):
+    """Shortest prompt prefix the model caches"""
+    for family, tokens in MIN_CACHEABLE_TOKENS.items():
+        if family in model:
+            return tokens
+    return DEFAULT_MIN_CACHEABLE_TOKENS
+
+def estimate_tokens(text):
+    """Rough token count of prompt text (about 4 characters per token)"""
+    return len(text) // 4
+
+def ai_unavailable_errors():
+    """Errors after which callers should serve a local fallback instead of AI output
+
+    A function rather than a constant so the AI SDK (slow to import) is only
+    loaded once an error actually needs matching: use `except ai_unavailable_errors():`.
+    """
+    from anthropic import APIError
+    return (CircuitOpen, APIError)
+
+# Generic hints served when the AI is unavailable and a problem has no stored ladder
+FALLBACK_HINTS = [
+    "Start by working out which tables hold the data the problem asks about, and which columns you need from them.",
+    "Think about which clauses you need: do you have to filter rows (WHERE), combine tables (JOIN), or summarize groups (GROUP BY)?",
+    "Write the query step by step: select from one table first, check the result, then add joins, filters and aggregates one at a time."
+]
+
+
+def _is_outage(error):
+    """Connection failures, timeouts and server errors count against the circuit breaker"""
+    from anthropic import APIConnectionError
+    return isinstance(error, APIConnectionError) or (getattr(error, 'status_code', None) or 0) >= 500
+
+# Scheduling priority of each kind of call unless the caller overrides it
+KIND_PRIORITIES = {
+    'problem': INTERACTIVE,
+    'hint': INTERACTIVE,
+    'hint_ladder': INTERACTIVE,
+    'flashcard_explanation': INTERACTIVE,
+    'wrong_answers': INTERACTIVE,
+    'check': GRADING,
+    'wrong_answers_batch': BACKGROUND
+}
 
 class AIService:
     """Service for interacting with Claude API for problem generation and checking"""
 
-    def __init__(self, api_key):
-        self.client = Anthropic(api_key=api_key)
+    def __init__(self, api_key, client=None):
+        # client can be any object with the SDK's messages.create/stream interface (e.g. a local stub)
+        self.api_key = api_key
+        self._client = client
+        self._client_lock = threading.Lock()
+        self.usage = AIUsageTracker()
+        self.breaker = CircuitBreaker(
+            'AI API',
+            slow_call_seconds=float(os.getenv('AI_SLOW_CALL_SECONDS', 20)),
+            open_seconds=float(os.getenv('AI_BREAKER_OPEN_SECONDS', 30)),
+            is_failure=_is_outage
+        )
+        self.scheduler = AIScheduler(
+            requests_per_minute=int(os.getenv('AI_REQUESTS_PER_MINUTE', 50)),
+            tokens_per_minute=int(os.getenv('AI_TOKENS_PER_MINUTE', 40000))
+        )
         # Model can be configured via environment variable ANTHROPIC_MODEL
         # Common model names (try these if default doesn't work):
         # - "claude-sonnet-4-20250514" (Claude Sonnet 4)
@@ -17,32 +128,47 @@ class AIService:
         self.model = os.getenv('ANTHROPIC_MODEL', 'claude-3-5-sonnet-20240620')
         print(f"[AI Service] Initialized with model: {self.model}")
         print(f"[AI Service] To use a different model, set ANTHROPIC_MODEL environment variable")
-
-    def generate_problem(self, difficulty, topic=None):
-        """Generate a SQL problem based on difficulty and optional topic"""
-        print(f"[AI Service] Generating problem - Difficulty: {difficulty}, Topic: {topic}")
-
-        # Define difficulty descriptions
-        difficulty_map = {
-            'basic': 'Basic SELECT, WHERE, and simple filtering',
-            'intermediate': 'JOINs, GROUP BY, HAVING, and aggregate functions',
-            'advanced': 'Window functions, subqueries, CTEs, and complex multi-table queries',
-            'expert': 'Recursive CTEs, advanced analytics, and performance optimization'
-        }
-
-        difficulty_desc = difficulty_map.get(difficulty, difficulty_map['basic'])
-
-        prompt = f"""Generate a realistic SQL practice problem for a learning game. The database has these tables:
-
-**customers**: customer_id, first_name, last_name, email, phone, city, state, country, registration_date, is_active
-**products**: product_id, product_name, category, price, cost, stock_quantity, supplier
-**orders**: order_id, customer_id, order_date, ship_date, total_amount, status
-**order_items**: order_item_id, order_id, product_id, quantity, unit_price, discount
-**employees**: employee_id, first_name, last_name, email, department, position, salary, hire_date, manager_id
-**sales**: sale_id, employee_id, sale_date, amount, region
-
-Create a problem at the {difficulty} level: {difficulty_desc}
-{f"Focus on this topic: {topic}" if topic else ""}
+        # Results larger than this many tokens are summarized in check_answer prompts
+        self.result_token_budget = int(os.getenv('CHECK_RESULT_TOKEN_BUDGET', 1500))
+        # Hint ladders by problem, so unsaved problems don't regenerate theirs on every hint request
+        self._hint_ladders = OrderedDict()
+        self._hint_ladders_lock = threading.Lock()
+        self.hint_ladder_cache_size = int(os.getenv('HINT_LADDER_CACHE_SIZE', 256))
+
+    @property
+    def client(self):
+        """SDK client, created on the first AI call so the SDK is not imported at startup"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from anthropic import Anthropic
+                    # Short timeout and few retries: the circuit breaker handles outages
+                    self._client = Anthropic(
+                        api_key=self.api_key,
+                        timeout=float(os.getenv('AI_REQUEST_TIMEOUT', 30)),
+                        max_retries=int(os.getenv('AI_MAX_RETRIES', 1))
+                    )
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def _problem_prompt(self, difficulty, topic=None, schema_description=None):
+        """(system, prompt) asking for a problem as a JSON object
+
+        Everything except the difficulty and topic is in the system prefix,
+        which is identical for every problem about a dataset and so is cached.
+        """
+        difficulty = difficulty if difficulty in DIFFICULTY_LEVELS else 'basic'
+        levels = '\n'.join(f"- {level}: {description}" for level, description in DIFFICULTY_LEVELS.items())
+
+        instructions = f"""Generate realistic SQL practice problems for a learning game. The database has these tables:
+
+{schema_description or DEFAULT_SCHEMA_DESCRIPTION}
+
+Difficulty levels:
+{levels}
 
 Return a JSON object with:
 - "title": Short problem title
@@ -55,28 +181,30 @@ Return a JSON object with:
 
 Make it realistic and educational. The problem should test understanding, not just syntax memorization."""
 
+        prompt = f"Create a problem at the {difficulty} level: {DIFFICULTY_LEVELS[difficulty]}"
+        if topic:
+            prompt += f"\nFocus on this topic: {topic}"
+        return self._cached_system(instructions), prompt
+
+    def generate_problem(self, difficulty, topic=None, schema_description=None, priority=None):
+        """Generate a SQL problem based on difficulty and optional topic
+
+        schema_description lists the tables of the dataset the problem is for;
+        priority overrides the scheduling class (e.g. BACKGROUND for pre-generation).
+        """
+        print(f"[AI Service] Generating problem - Difficulty: {difficulty}, Topic: {topic}")
+        system, prompt = self._problem_prompt(difficulty, topic, schema_description)
+
         try:
             print(f"[AI Service] Calling Claude API with model: {self.model}")
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2000,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
+            response = self._create('problem', prompt, max_tokens=2000, system=system, priority=priority)
 
             # Parse the response
             print(f"[AI Service] Received response from Claude")
             content = response.content[0].text
             print(f"[AI Service] Raw response preview: {content[:200]}...")
 
-            # Extract JSON from markdown code blocks if present
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-
+            content = self._extract_json(content)
             print(f"[AI Service] Extracted JSON content: {content[:200]}...")
             problem = json.loads(content)
             print(f"[AI Service] Successfully parsed problem: {problem.get('title', 'No title')}")
@@ -91,64 +219,70 @@ Make it realistic and educational. The problem should test understanding, not ju
             print(f"[AI Service] Error type: {type(e).__name__}")
             raise
 
-    def check_answer(self, user_query, problem_description, result, expected_result):
-        """Check if the user's SQL query is correct using AI analysis"""
-
-        prompt = f"""You are a SQL tutor checking a student's answer.
+    def _check_prompt(self, user_query, problem_description, result, expected_result, result_matches=None):
+        """(system, prompt) asking for feedback on an answer as a JSON object"""
+        reference_check = ""
+        if result_matches is not None:
+            expected_rows = len(expected_result) if expected_result is not None else 0
+            reference_check = (
+                f"\n**Reference Check**: The student's result "
+                f"{'matches' if result_matches else 'does NOT match'} the reference solution's result "
+                f"({expected_rows} rows).\n"
+            )
 
-**Problem**: {problem_description}
+        prompt = f"""**Problem**: {problem_description}
 
 **Student's Query**:
 ```sql
 {user_query}
 ```
 
-**Student's Query Result**: {json.dumps(result, indent=2) if result else "Query failed or returned no results"}
-
-Analyze the student's query and provide feedback. Consider:
-1. Does it solve the problem correctly?
-2. Is the approach efficient and follows best practices?
-3. Are there any errors or improvements needed?
-
-Return a JSON object with:
-- "correct": boolean (true if query is correct and efficient)
-- "score": number 0-100 (quality of the solution)
-- "message": string (encouraging feedback message)
-- "improvements": array of strings (suggestions for improvement, empty if perfect)
-- "praise": string (what they did well, even if incorrect)
+**Student's Query Result**: {summarize_result(result, self.result_token_budget) if result else "Query failed or returned no results"}
+{reference_check}"""
+        return self._cached_system(CHECK_INSTRUCTIONS), prompt
 
-Be encouraging and educational. Even incorrect answers should get constructive feedback."""
+    def check_answer(self, user_query, problem_description, result, expected_result, result_matches=None):
+        """Check if the user's SQL query is correct using AI analysis
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1000,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+        result_matches says whether the result equals the reference solution's
+        (None when the reference result is unknown).
+        """
+        system, prompt = self._check_prompt(user_query, problem_description, result, expected_result, result_matches)
+        try:
+            response = self._create('check', prompt, max_tokens=1000, system=system)
+        except ai_unavailable_errors() as e:
+            print(f"[AI Service] Grading without AI: {e}")
+            return self.fallback_feedback(result, result_matches)
 
         content = response.content[0].text
-
-        # Extract JSON from markdown code blocks if present
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-
-        feedback = json.loads(content)
+        feedback = json.loads(self._extract_json(content))
         return feedback
 
-    def generate_hint(self, problem_description, user_query, hint_level):
-        """Generate a contextual hint based on the user's current progress"""
-
-        hint_levels = {
-            1: "Give a very gentle nudge in the right direction without revealing the solution",
-            2: "Provide more specific guidance about which SQL concepts or clauses to use",
-            3: "Give a detailed hint that almost reveals the solution but requires the student to put it together"
+    def fallback_feedback(self, result, result_matches=None):
+        """Verdict from comparing results locally, used when the AI is unavailable"""
+        if result_matches is None:
+            return {
+                'correct': False,
+                'score': 0,
+                'message': "Detailed feedback is temporarily unavailable. Please try checking again in a minute.",
+                'improvements': [],
+                'praise': "Your query ran successfully." if result else "",
+                'fallback': True
+            }
+        return {
+            'correct': result_matches,
+            'score': 100 if result_matches else 30,
+            'message': ("Your result matches the expected output. Detailed feedback is temporarily unavailable."
+                        if result_matches else
+                        "Your result does not match the expected output yet. Detailed feedback is temporarily unavailable."),
+            'improvements': [] if result_matches else ["Compare your result with what the problem asks for"],
+            'praise': "Your query ran successfully.",
+            'fallback': True
         }
 
-        hint_instruction = hint_levels.get(hint_level, hint_levels[1])
+    def _hint_prompt(self, problem_description, user_query, hint_level):
+        """Prompt asking for a plain-text hint"""
+        hint_instruction = HINT_LEVELS.get(hint_level, HINT_LEVELS[1])
 
         prompt = f"""You are a SQL tutor providing a hint to a student.
 
@@ -164,23 +298,218 @@ Be encouraging and educational. Even incorrect answers should get constructive f
 {hint_instruction}
 
 Provide a single helpful hint as plain text. Be encouraging and Socratic - help them think through the problem rather than just giving the answer."""
+        return prompt
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=300,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+    def generate_hint(self, problem_description, user_query, hint_level):
+        """Generate a contextual hint based on the user's current progress"""
+        prompt = self._hint_prompt(problem_description, user_query, hint_level)
+        response = self._create('hint', prompt, max_tokens=300)
+
+        return self._clean_hint(response.content[0].text)
+
+    def generate_hint_ladder(self, problem_description, solution=None):
+        """Generate all three hint levels for a problem in one call (before any query is written)
+
+        Ladders are kept in a bounded per-process cache keyed by the problem,
+        so asking again for the same problem costs no API call.
+        """
+        key = hashlib.blake2b(f"{problem_description}\0{solution or ''}".encode('utf-8'), digest_size=16).digest()
+        with self._hint_ladders_lock:
+            hints = self._hint_ladders.get(key)
+            if hints is not None:
+                self._hint_ladders.move_to_end(key)
+                return list(hints)
+
+        levels = '\n'.join(f"{level}. {instruction}" for level, instruction in HINT_LEVELS.items())
+        solution_block = f"""
+**Reference Solution** (never reveal it directly):
+```sql
+{solution}
+```
+""" if solution else ""
+
+        prompt = f"""You are a SQL tutor preparing hints for a practice problem, before the student has written anything.
+
+**Problem**: {problem_description}
+{solution_block}
+Write one hint for each level:
+{levels}
+
+Be encouraging and Socratic - help them think through the problem rather than just giving the answer.
 
-        hint = response.content[0].text.strip()
+Return a JSON array of exactly 3 strings, level 1 first."""
+
+        response = self._create('hint_ladder', prompt, max_tokens=700)
+
+        hints = json.loads(self._extract_json(response.content[0].text))
+        if not isinstance(hints, list) or len(hints) < 3:
+            raise ValueError("AI response did not contain 3 hints")
+        hints = [self._clean_hint(str(hint)) for hint in hints[:3]]
+
+        with self._hint_ladders_lock:
+            self._hint_ladders[key] = hints
+            while len(self._hint_ladders) > self.hint_ladder_cache_size:
+                self._hint_ladders.popitem(last=False)
+        return list(hints)
+
+    def _clean_hint(self, hint):
+        hint = hint.strip()
         # Remove any quotes that might wrap the hint
         if hint.startswith('"') and hint.endswith('"'):
             hint = hint[1:-1]
-
         return hint
 
+    def _extract_json(self, content):
+        """Extract JSON from markdown code blocks if present"""
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        return content
+
+    def _cached_system(self, text):
+        """System prompt block, marked for provider-side prompt caching if it is long enough to be cached"""
+        block = {"type": "text", "text": text}
+        if estimate_tokens(text) >= min_cacheable_tokens(self.model):
+            block["cache_control"] = {"type": "ephemeral"}
+        return [block]
+
+    def _request(self, prompt, max_tokens, system=None):
+        request = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{
+                "role": "user",
+                "content": prompt
+            }]
+        }
+        if system:
+            request["system"] = system
+        return request
+
+    def _reserved_tokens(self, request):
+        """Tokens to reserve from the rate limiter: estimated uncached input plus the output limit
+
+        Cache-marked system blocks are left out since cache reads don't count
+        against the provider's input token limit; _settle charges a cache
+        write once the usage shows one.
+        """
+        text = request["messages"][0]["content"] + ''.join(
+            block["text"] for block in request.get("system", []) if "cache_control" not in block
+        )
+        return estimate_tokens(text) + request["max_tokens"]
+
+    def _settle(self, kind, reserved, usage, seconds):
+        """Record a finished call and settle its reservation with the rate limiter
+
+        Tokens are metered like the provider does: cache reads are free, cache
+        writes, uncached input and output count.
+        """
+        self.usage.record(kind, usage, seconds)
+        if usage is not None:
+            used = sum(getattr(usage, field, None) or 0 for field in (
+                'input_tokens', 'cache_creation_input_tokens', 'output_tokens'
+            ))
+            self.scheduler.refund(reserved - used)
+
+    def _create(self, kind, prompt, max_tokens, system=None, priority=None):
+        """messages.create through the scheduler, recording token usage (including cache hits) and latency"""
+        request = self._request(prompt, max_tokens, system)
+        reserved = self._reserved_tokens(request)
+        self.breaker.check()  # Fail fast instead of queueing while the API is down
+        start = time.perf_counter()
+        response = self.scheduler.run(
+            lambda: self.breaker.call(lambda: self.client.messages.create(**request)),
+            priority=KIND_PRIORITIES.get(kind, INTERACTIVE) if priority is None else priority,
+            tokens=reserved
+        )
+        self._settle(kind, reserved, getattr(response, 'usage', None), time.perf_counter() - start)
+        return response
+
+    def _stream_text(self, kind, prompt, max_tokens, system=None, priority=None):
+        """Yield text deltas of a completion as they arrive
+
+        The breaker records the stream's outcome once it ends (opening is timed
+        for slowness), so a stream that fails part-way counts as a failure. A
+        stream that fails or is abandoned returns the output tokens it did not
+        produce to the rate limiter.
+        """
+        request = self._request(prompt, max_tokens, system)
+        reserved = self._reserved_tokens(request)
+        call = {}
+
+        def open_stream():
+            call['probe'] = self.breaker.start_call()
+            opened = time.monotonic()
+            try:
+                manager = self.client.messages.stream(**request)
+                stream = manager.__enter__()
+            except Exception as e:
+                self.breaker.finish_call(call.pop('probe'), error=e)
+                raise
+            call['seconds'] = time.monotonic() - opened
+            return manager, stream
+
+        self.breaker.check()
+        start = time.perf_counter()
+        # If opening fails for good, the scheduler returns the reservation itself
+        manager, stream = self.scheduler.run(
+            open_stream,
+            priority=KIND_PRIORITIES.get(kind, INTERACTIVE) if priority is None else priority,
+            tokens=reserved
+        )
+        received = []
+        final_message = None
+        completed = False
+        try:
+            error = None
+            try:
+                for text in stream.text_stream:
+                    received.append(text)
+                    yield text
+                final_message = stream.get_final_message() if hasattr(stream, 'get_final_message') else None
+                completed = True
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                manager.__exit__(None, None, None)
+                self.breaker.finish_call(call.pop('probe'), error=error, seconds=call['seconds'])
+        finally:
+            if completed:
+                self._settle(kind, reserved, getattr(final_message, 'usage', None), time.perf_counter() - start)
+            else:
+                self.scheduler.refund(max_tokens - estimate_tokens(''.join(received)))
+
+    def _stream_json(self, kind, prompt, max_tokens, system=None):
+        """Yield ('token', text) and ('field', {name: value}) events, then ('done', object)"""
+        parser = IncrementalJSONParser()
+        for text in self._stream_text(kind, prompt, max_tokens, system):
+            yield 'token', text
+            fields = parser.feed(text)
+            if fields:
+                yield 'field', fields
+        yield 'done', parser.result()
+
+    def stream_problem(self, difficulty, topic=None, schema_description=None):
+        """Streaming generate_problem: yields (event, data) pairs, ending with ('done', problem)"""
+        print(f"[AI Service] Streaming problem - Difficulty: {difficulty}, Topic: {topic}")
+        system, prompt = self._problem_prompt(difficulty, topic, schema_description)
+        yield from self._stream_json('problem', prompt, 2000, system)
+
+    def stream_check_answer(self, user_query, problem_description, result, expected_result, result_matches=None):
+        """Streaming check_answer: yields (event, data) pairs, ending with ('done', feedback)"""
+        system, prompt = self._check_prompt(user_query, problem_description, result, expected_result, result_matches)
+        yield from self._stream_json('check', prompt, 1000, system)
+
+    def stream_hint(self, problem_description, user_query, hint_level):
+        """Streaming generate_hint: yields ('token', text) pairs, then ('done', hint)"""
+        parts = []
+        for text in self._stream_text('hint', self._hint_prompt(problem_description, user_query, hint_level), 300):
+            parts.append(text)
+            yield 'token', text
+        yield 'done', self._clean_hint(''.join(parts))
+
     def generate_flashcard_explanation(self, concept, user_answer):
         """Generate an explanation for a flashcard concept"""
 
@@ -194,26 +523,13 @@ Provide a brief, clear explanation (2-3 sentences) of this SQL concept. Focus on
 
 Return plain text only, no JSON."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=200,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+        response = self._create('flashcard_explanation', prompt, max_tokens=200)
 
         return response.content[0].text.strip()
 
-    def generate_wrong_answers(self, correct_answer, question, topic, difficulty):
+    def generate_wrong_answers(self, correct_answer, question, topic, difficulty, priority=None):
         """Generate 3 plausible but incorrect answer options for a flashcard using Claude 4.5 Haiku"""
-        
-        print(f"Generating wrong answers for:")
-        print(f"  Topic: {topic}")
-        print(f"  Level: {difficulty}")
-        print(f"  Question: {question}")
-        print(f"  Correct Answer: {correct_answer}")
-        
+
         prompt = f"""You are creating multiple choice options for a SQL learning flashcard.
 
 **Topic**: {topic}
@@ -233,14 +549,7 @@ Example format: ["wrong answer 1", "wrong answer 2", "wrong answer 3"]
 Make the wrong answers educational - they should help students learn by understanding why they're incorrect."""
 
         try:
-            response = self.client.messages.create(
-                model=self.model,  # Use same model as other methods
-                max_tokens=500,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
+            response = self._create('wrong_answers', prompt, max_tokens=500, priority=priority)
 
             content = response.content[0].text
 
@@ -304,7 +613,9 @@ Make the wrong answers educational - they should help students learn by understa
             else:
                 # Fallback if response isn't a list
                 return ["Incorrect option 1", "Incorrect option 2", "Incorrect option 3"]
-                
+
+        except ai_unavailable_errors():
+            raise  # Callers serve local fallback options without saving them
         except Exception as e:
             # Fallback to simple wrong answers if AI fails
             print(f"Error generating wrong answers: {e}")
@@ -313,3 +624,93 @@ Make the wrong answers educational - they should help students learn by understa
                 "This is incorrect",
                 "Wrong answer"
             ]
+
+    def _valid_wrong_answers(self, answers, correct_answer):
+        """The first 3 usable distractors from answers, or None if there aren't 3"""
+        if not isinstance(answers, list):
+            return None
+        valid = []
+        for answer in answers:
+            if not isinstance(answer, str) or not answer.strip():
+                continue
+            answer = answer.strip()
+            if answer.lower() == str(correct_answer).strip().lower():
+                continue
+            if answer.lower() in (existing.lower() for existing in valid):
+                continue
+            valid.append(answer)
+        return valid[:3] if len(valid) >= 3 else None
+
+    def generate_wrong_answers_batch(self, cards, batch_size=20, priority=None):
+        """Generate 3 wrong answers for each of many flashcards with one API call per batch
+
+        cards are dicts with id, question, answer, topic and level. Returns a
+        dict of card id -> 3 wrong answers. Cards missing from the response or
+        with unusable answers fall back to generate_wrong_answers, at the same
+        priority (BACKGROUND unless overridden). If the AI is unavailable the
+        remaining cards are left out rather than retried one by one.
+        """
+        if priority is None:
+            priority = KIND_PRIORITIES['wrong_answers_batch']
+        results = {}
+        for start in range(0, len(cards), batch_size):
+            batch = cards[start:start + batch_size]
+            payload = [{
+                'id': str(card['id']),
+                'topic': card.get('topic'),
+                'level': card.get('level', 'basic'),
+                'question': card['question'],
+                'answer': card['answer']
+            } for card in batch]
+
+            prompt = f"""You are creating multiple choice options for SQL learning flashcards.
+
+For EACH flashcard below, generate exactly 3 plausible but INCORRECT answer options. These should be:
+- Related to the topic but factually wrong
+- Common misconceptions or mistakes students make
+- Similar in length and complexity to the correct answer
+- Believable enough to test understanding, not just guessing
+
+**Flashcards** (JSON):
+{json.dumps(payload, indent=2)}
+
+Return a single JSON object mapping each flashcard "id" to an array of exactly 3 strings.
+Example format: {{"card-1": ["wrong answer 1", "wrong answer 2", "wrong answer 3"]}}
+
+Make the wrong answers educational - they should help students learn by understanding why they're incorrect."""
+
+            generated = {}
+            try:
+                response = self._create('wrong_answers_batch', prompt, max_tokens=200 * len(batch) + 200,
+                                        priority=priority)
+                generated = json.loads(self._extract_json(response.content[0].text))
+                if not isinstance(generated, dict):
+                    generated = {}
+            except ai_unavailable_errors() as e:
+                # Per-card retries would only add load while the API is down
+                print(f"[AI Service] AI unavailable, skipping wrong answers for {len(cards) - start} cards: {e}")
+                return results
+            except Exception as e:
+                print(f"[AI Service] Batched wrong answers failed for {len(batch)} cards: {e}")
+
+            fallbacks = 0
+            for card in batch:
+                answers = self._valid_wrong_answers(generated.get(str(card['id'])), card['answer'])
+                if answers is None:
+                    fallbacks += 1
+                    try:
+                        answers = self.generate_wrong_answers(
+                            correct_answer=card['answer'],
+                            question=card['question'],
+                            topic=card.get('topic'),
+                            difficulty=card.get('level', 'basic'),
+                            priority=priority
+                        )
+                    except ai_unavailable_errors() as e:
+                        print(f"[AI Service] AI unavailable, skipping per-card wrong answers: {e}")
+                        return results
+                results[card['id']] = answers
+            print(f"[AI Service] Generated wrong answers for {len(batch)} cards in one call "
+                  f"({fallbacks} needed a per-card retry)")
+
+        return results
@@ -0,0 +1,70 @@
+"""
+Token usage and latency of AI calls, split by prompt-cache behaviour.
+
+Each call records its input tokens, the input tokens read from or written to
+the provider's prompt cache, output tokens and latency. Totals are kept per
+kind of call (problem, check, hint, ...) along with a rolling window of
+latencies for calls that did and did not hit the cache.
+"""
+import threading
+from collections import deque
+
+from query_profiler import percentile
+
+USAGE_FIELDS = ('input_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens', 'output_tokens')
+
+
+class AIUsageTracker:
+    """Accumulate usage of AI calls per kind"""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._kinds = {}
+
+    def record(self, kind, usage, seconds):
+        """Store one call; usage is the response's usage object (may be None for stubs)"""
+        counts = {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+        cached = counts['cache_read_input_tokens'] > 0
+        with self._lock:
+            stats = self._kinds.get(kind)
+            if stats is None:
+                stats = self._kinds[kind] = {
+                    'calls': 0,
+                    'cached_calls': 0,
+                    'totals': dict.fromkeys(USAGE_FIELDS, 0),
+                    'latency': {True: deque(maxlen=self.window), False: deque(maxlen=self.window)}
+                }
+            stats['calls'] += 1
+            stats['cached_calls'] += cached
+            for field, value in counts.items():
+                stats['totals'][field] += value
+            stats['latency'][cached].append(seconds * 1000)
+
+    def report(self):
+        """Per-kind totals, cache hit rate and cached vs. uncached latency percentiles"""
+        with self._lock:
+            snapshot = {
+                kind: (stats['calls'], stats['cached_calls'], dict(stats['totals']),
+                       {cached: sorted(values) for cached, values in stats['latency'].items()})
+                for kind, stats in self._kinds.items()
+            }
+
+        report = {}
+        for kind, (calls, cached_calls, totals, latency) in snapshot.items():
+            prompt_tokens = (totals['input_tokens'] + totals['cache_read_input_tokens']
+                             + totals['cache_creation_input_tokens'])
+            report[kind] = dict(
+                totals,
+                calls=calls,
+                cached_calls=cached_calls,
+                cached_token_share=round(totals['cache_read_input_tokens'] / prompt_tokens, 3) if prompt_tokens else 0.0,
+                latency_ms={
+                    'cached' if cached else 'uncached': {
+                        'p50': round(percentile(values, 50), 1),
+                        'p95': round(percentile(values, 95), 1)
+                    }
+                    for cached, values in latency.items()
+                }
+            )
+        return report
@@ -1,53 +1,75 @@
-from flask import Flask, render_template, jsonify, request, session
+from flask import Blueprint, Flask, Response, render_template, jsonify, request, session, stream_with_context
+import hashlib
+import json
 import os
 from dotenv import load_dotenv
 import secrets
+import time
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__,
-            template_folder='../frontend/templates',
-            static_folder='../frontend/static')
-app.secret_key = os.getenv('FLASK_SECRET_KEY', secrets.token_hex(16))
-
-# Import routes after app initialization
-from ai_service import AIService
-from sql_checker import SQLChecker
-from sample_data import SampleDataGenerator
-from models import ProgressTracker
-
-# Initialize services
-ai_service = AIService(os.getenv('ANTHROPIC_API_KEY'))
-sql_checker = SQLChecker()
-progress_tracker = ProgressTracker()
-
-# Ensure databases are initialized
-sample_data = SampleDataGenerator()
-sample_data.initialize_database()
-
-@app.route('/')
+from ai_service import FALLBACK_HINTS, ai_unavailable_errors
+from datasets import DEFAULT_DATASET
+from http_encoding import FastJSONProvider, compress_response
+from query_sandbox import AccessProfile
+from problem_validation import fingerprint_result
+from services import services
+from sql_normalizer import fingerprint_query, is_meaningful_query
+
+# Services (AI client, datasets, progress database, ...) are created on first use in each process
+routes = Blueprint('routes', __name__)
+
+def create_app():
+    """Build the Flask app (e.g. gunicorn 'app:create_app()'); nothing is opened until a request needs it"""
+    app = Flask(__name__,
+                template_folder='../frontend/templates',
+                static_folder='../frontend/static')
+    # Set FLASK_SECRET_KEY when running several workers so they accept each other's sessions
+    app.secret_key = os.getenv('FLASK_SECRET_KEY', secrets.token_hex(16))
+    # orjson when installed; gzip/brotli for large responses (COMPRESSION=0 if a proxy does it)
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
+    app.register_blueprint(routes)
+    if os.getenv('WARM_ON_START') == '1':
+        services.warm_in_background()
+    return app
+
+def _dataset_name():
+    """Dataset a request targets (JSON body or query string, default e-commerce)"""
+    data = request.get_json(silent=True) or {}
+    return data.get('dataset') or request.args.get('dataset') or DEFAULT_DATASET
+
+def _sql_checker():
+    """SQLChecker for the dataset the request targets"""
+    return services.datasets.checker(_dataset_name())
+
+@routes.route('/')
 def index():
     """Main landing page"""
     return render_template('index.html')
 
-@app.route('/flashcards')
+@routes.route('/flashcards')
 def flashcards():
     """Flashcard practice mode"""
     return render_template('flashcards.html')
 
-@app.route('/problems')
+@routes.route('/problems')
 def problems():
     """Problem-solving mode"""
     return render_template('problems.html')
 
-@app.route('/api/flashcards/all', methods=['GET'])
+@routes.route('/api/flashcards/all', methods=['GET'])
 def get_flashcards():
     """Get all flashcards organized by difficulty (without options - loaded lazily)"""
-    from flashcards import get_all_flashcards
-    return jsonify(get_all_flashcards(ai_service=None))  # Don't generate options upfront
-
-@app.route('/api/flashcards/options', methods=['POST'])
+    from flashcards import load_deck
+    # The deck is static: serve its pre-serialized JSON and let clients revalidate by ETag
+    _, data, etag = load_deck()
+    response = Response(data, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+@routes.route('/api/flashcards/options', methods=['POST'])
 def get_flashcard_options():
     """Generate multiple choice options for a specific flashcard"""
     from flashcards import _generate_options_for_card
@@ -61,26 +83,62 @@ def get_flashcard_options():
     
     try:
         # Check if options already exist in database
-        cached_options = progress_tracker.get_flashcard_options(card_id)
+        cached_options = services.progress_tracker.get_flashcard_options(card_id)
         if cached_options:
             print(f"Using cached options for card {card_id}")
             return jsonify({'options': cached_options})
         
         # Generate new options
         print(f"Generating new options for card {card_id}")
-        card_with_options = _generate_options_for_card(card, ai_service=ai_service)
+        card_with_options = _generate_options_for_card(card, ai_service=services.ai_service)
         options = card_with_options.get('options', [])
-        
+
+        # Placeholder options (AI unavailable) are served but not saved, so they are generated later
+        if card_with_options.get('fallback'):
+            return jsonify({'options': options, 'fallback': True})
+
         # Save to database
         if options:
-            progress_tracker.save_flashcard_options(card_id, options)
+            services.progress_tracker.save_flashcard_options(card_id, options)
         
         return jsonify({'options': options})
     except Exception as e:
         print(f"Error generating options: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/flashcards/progress', methods=['POST'])
+@routes.route('/api/flashcards/options/batch', methods=['POST'])
+def get_flashcard_options_batch():
+    """Generate multiple choice options for many flashcards (e.g. a whole deck) at once"""
+    from flashcards import generate_options_for_cards
+    data = request.json
+    cards = data.get('cards')
+
+    if not cards:
+        return jsonify({'error': 'Cards required'}), 400
+
+    try:
+        options = {}
+        missing = []
+        for card in cards:
+            cached_options = services.progress_tracker.get_flashcard_options(card.get('id'))
+            if cached_options:
+                options[card['id']] = cached_options
+            else:
+                missing.append(card)
+
+        # Cards without cached options share batched AI calls
+        for card in generate_options_for_cards(missing, ai_service=services.ai_service):
+            options[card['id']] = card['options']
+            if not card.get('fallback'):
+                services.progress_tracker.save_flashcard_options(card['id'], card['options'])
+
+        print(f"Options for {len(cards)} cards ({len(missing)} generated)")
+        return jsonify({'options': options})
+    except Exception as e:
+        print(f"Error generating options: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@routes.route('/api/flashcards/progress', methods=['POST'])
 def update_flashcard_progress():
     """Update user progress on a flashcard"""
     data = request.json
@@ -89,10 +147,10 @@ def update_flashcard_progress():
     topic = data.get('topic')
     level = data.get('level')
 
-    progress_tracker.update_flashcard_progress(card_id, correct, topic=topic, level=level)
+    services.progress_tracker.update_flashcard_progress(card_id, correct, topic=topic, level=level)
     return jsonify({'status': 'success'})
 
-@app.route('/api/problem/generate', methods=['POST'])
+@routes.route('/api/problem/generate', methods=['POST'])
 def generate_problem():
     """Generate a new SQL problem based on difficulty level"""
     data = request.json
@@ -103,12 +161,14 @@ def generate_problem():
     print(f"[API] /api/problem/generate called - Difficulty: {difficulty}, Topic: {topic}, Save: {save}")
     
     try:
-        problem = ai_service.generate_problem(difficulty, topic)
+        dataset = services.datasets.get(_dataset_name()).name
+        problem = services.problem_pool.take(dataset, difficulty, topic)
+        expected_rows = problem.pop('expected_rows', None)
         print(f"[API] Problem generated successfully: {problem.get('title', 'No title')}")
         
-        # Save the problem for later reuse
+        # Save the problem (and its solution's result, used when checking) for later reuse
         if save:
-            problem_id = progress_tracker.save_problem(problem)
+            problem_id = services.progress_tracker.save_problem(problem, expected_rows)
             problem['saved_id'] = problem_id
         
         return jsonify(problem)
@@ -118,22 +178,72 @@ def generate_problem():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/problem/saved', methods=['GET'])
+@routes.route('/api/problem/generate/stream', methods=['POST'])
+def generate_problem_stream():
+    """Like /api/problem/generate, but streams the problem as Server-Sent Events
+
+    A pooled problem is sent as a single done event. Otherwise the AI output
+    is streamed (token and field events), then validated, saved and sent as
+    done; a problem that fails validation ends with an error event.
+    """
+    data = request.json
+    difficulty = data.get('difficulty', 'basic')
+    topic = data.get('topic', None)
+    save = data.get('save', True)
+
+    try:
+        dataset = services.datasets.get(_dataset_name()).name
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def events():
+        problem = services.problem_pool.take_pooled(dataset, difficulty, topic)
+        if problem is None:
+            stream = services.ai_service.stream_problem(
+                difficulty, topic, schema_description=services.datasets.schema_description(dataset)
+            )
+            for event, payload in stream:
+                if event == 'done':
+                    problem = payload
+                else:
+                    yield event, payload
+            problem['dataset'] = dataset
+            if not services.problem_pool.validate(problem):
+                raise Exception("Generated problem failed validation, please try again")
+
+        expected_rows = problem.pop('expected_rows', None)
+        if save:
+            problem['saved_id'] = services.progress_tracker.save_problem(problem, expected_rows)
+        yield 'done', problem
+
+    return _sse_response(events())
+
+@routes.route('/api/problem/verdicts', methods=['GET'])
+def get_verdict_stats():
+    """Get how often stored grading feedback was reused for equivalent submissions"""
+    return jsonify(services.progress_tracker.get_verdict_stats())
+
+@routes.route('/api/problem/pool', methods=['GET'])
+def get_problem_pool_stats():
+    """Get pre-generated problem pool depth and hit rate"""
+    return jsonify(services.problem_pool.stats())
+
+@routes.route('/api/problem/saved', methods=['GET'])
 def get_saved_problems():
     """Get all saved problems"""
     try:
         limit = request.args.get('limit', 50, type=int)
-        problems = progress_tracker.get_saved_problems(limit)
+        problems = services.progress_tracker.get_saved_problems(limit)
         return jsonify({'problems': problems})
     except Exception as e:
         print(f"[API] Error getting saved problems: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/problem/saved/<int:problem_id>', methods=['GET'])
+@routes.route('/api/problem/saved/<int:problem_id>', methods=['GET'])
 def get_saved_problem(problem_id):
     """Get a specific saved problem by ID"""
     try:
-        problem = progress_tracker.get_saved_problem(problem_id)
+        problem = services.progress_tracker.get_saved_problem(problem_id)
         if problem:
             return jsonify(problem)
         else:
@@ -142,11 +252,11 @@ def get_saved_problem(problem_id):
         print(f"[API] Error getting saved problem: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/problem/saved/<int:problem_id>', methods=['DELETE'])
+@routes.route('/api/problem/saved/<int:problem_id>', methods=['DELETE'])
 def delete_saved_problem(problem_id):
     """Delete a saved problem"""
     try:
-        success = progress_tracker.delete_saved_problem(problem_id)
+        success = services.progress_tracker.delete_saved_problem(problem_id)
         if success:
             return jsonify({'status': 'success'})
         else:
@@ -155,7 +265,7 @@ def delete_saved_problem(problem_id):
         print(f"[API] Error deleting saved problem: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/problem/execute', methods=['POST'])
+@routes.route('/api/problem/execute', methods=['POST'])
 def execute_query():
     """Execute user's SQL query and return results (no AI feedback)"""
     data = request.json
@@ -165,55 +275,157 @@ def execute_query():
         return jsonify({'error': 'Query is required'}), 400
 
     try:
-        # Execute user's query
-        result = sql_checker.execute_query(user_query)
-        return jsonify({'result': result})
+        # Execute user's query, recording which tables/columns it read
+        sql_checker = _sql_checker()
+        access = AccessProfile()
+        timings = sql_checker.start_profile()
+        result = sql_checker.execute_query(user_query, profile=access, timings=timings)
+        response = jsonify({'result': result, 'access': access.to_dict()})
+        if timings is not None:
+            # jsonify has encoded the body, so this times the real serialization
+            timings['serialized'] = time.perf_counter()
+            sql_checker.record_profile(user_query, result, timings, payload_bytes=response.content_length)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/problem/check', methods=['POST'])
-def check_answer():
-    """Check user's SQL query against the problem using AI feedback"""
+@routes.route('/api/problem/explain', methods=['POST'])
+def explain_query():
+    """Return the query plan and measured cost of a query (optionally compared with a second one)"""
     data = request.json
     user_query = data.get('query')
-    problem_id = data.get('problem_id')
+    compare_query = data.get('compare_query')
+
+    if not user_query:
+        return jsonify({'error': 'Query is required'}), 400
+
+    try:
+        sql_checker = _sql_checker()
+        response = {'explain': sql_checker.explain_query(user_query)}
+        if compare_query:
+            response['compare'] = sql_checker.explain_query(compare_query)
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+def _refresh_expected_result(saved_id):
+    """Re-run a saved problem's reference solution on the current data; (fingerprint, rows) or None"""
+    problem = services.progress_tracker.get_saved_problem(saved_id)
+    if not problem or not services.problem_pool.validate(problem):
+        return None
+    services.progress_tracker.update_expected_result(saved_id, problem['expected'], problem['expected_rows'])
+    return problem['expected'], problem['expected_rows']
+
+def _check_inputs(data):
+    """Run the student's query and gather everything check_answer needs"""
+    user_query = data.get('query')
+    saved_id = data.get('saved_id')
+
+    # Execute user's query (or use provided result if available)
+    sql_checker = _sql_checker()
+    result = data.get('result')
+    if result is None:
+        result = sql_checker.execute_query(user_query)
+
+    # Compare with the stored result of the reference solution instead of re-running it
     expected_result = data.get('expected_result')
-    problem_description = data.get('problem_description')
+    result_matches = None
+    expected = services.progress_tracker.get_expected_result(saved_id) if saved_id else None
+    if expected is not None and expected[0].get('db_version') != sql_checker.db_version:
+        # Computed on an earlier version of the practice data
+        expected = _refresh_expected_result(saved_id)
+    if expected is not None:
+        expected_fingerprint, expected_result = expected
+        result_matches = fingerprint_result(result)['hash'] == expected_fingerprint['hash']
+
+    return {
+        'user_query': user_query,
+        'problem_description': data.get('problem_description'),
+        'result': result,
+        'expected_result': expected_result,
+        'result_matches': result_matches
+    }
+
+def _verdict_key(data, inputs):
+    """(problem, normalized query, result) key of a submission's verdict, or None if the problem is unknown"""
+    if data.get('saved_id'):
+        problem_key = f"saved:{data['saved_id']}"
+    elif inputs['problem_description']:
+        problem_key = 'description:' + hashlib.blake2b(
+            inputs['problem_description'].encode('utf-8'), digest_size=8
+        ).hexdigest()
+    else:
+        return None
+    return (
+        problem_key,
+        fingerprint_query(inputs['user_query'] or ''),
+        fingerprint_result(inputs['result'])['ordered_hash']
+    )
+
+def _record_attempt(data, feedback):
+    """Save the submission if we have problem info"""
+    problem_title = data.get('problem_id')  # problem_id is actually the title
+    difficulty = data.get('difficulty')
+    topic = data.get('topic')
+
+    if problem_title:
+        try:
+            score = feedback.get('score', 0)
+            correct = feedback.get('correct', False)
+
+            services.progress_tracker.record_problem_attempt(
+                problem_title=problem_title,
+                difficulty=difficulty or 'basic',
+                topic=topic or 'General SQL',
+                query=data.get('query'),
+                score=score,
+                correct=correct
+            )
+        except Exception as e:
+            print(f"Error saving problem attempt: {e}")
+
+def _sse(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _sse_response(events):
+    """Stream (event, data) pairs to the browser, ending with an error event if one is raised"""
+    def generate():
+        try:
+            for event, data in events:
+                yield _sse(event, data)
+        except Exception as e:
+            print(f"[API] Error while streaming: {e}")
+            yield _sse('error', {'error': str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Stop proxies from buffering the stream
+    })
+
+@routes.route('/api/problem/check', methods=['POST'])
+def check_answer():
+    """Check user's SQL query against the problem using AI feedback"""
+    data = request.json
 
     try:
-        # Execute user's query (or use provided result if available)
-        result = data.get('result')
-        if result is None:
-            result = sql_checker.execute_query(user_query)
-
-        # Check with AI if the approach is correct
-        feedback = ai_service.check_answer(
-            user_query=user_query,
-            problem_description=problem_description,
-            result=result,
-            expected_result=expected_result
-        )
+        inputs = _check_inputs(data)
 
-        # Save the submission if we have problem info
-        problem_title = problem_id  # problem_id is actually the title
-        difficulty = data.get('difficulty')
-        topic = data.get('topic')
-        
-        if problem_title:
-            try:
-                score = feedback.get('score', 0)
-                correct = feedback.get('correct', False)
-                
-                progress_tracker.record_problem_attempt(
-                    problem_title=problem_title,
-                    difficulty=difficulty or 'basic',
-                    topic=topic or 'General SQL',
-                    query=user_query,
-                    score=score,
-                    correct=correct
-                )
-            except Exception as e:
-                print(f"Error saving problem attempt: {e}")
+        # Equivalent submissions to the same problem reuse the earlier verdict
+        verdict_key = _verdict_key(data, inputs)
+        feedback = services.progress_tracker.get_verdict(*verdict_key) if verdict_key else None
+        if feedback is not None:
+            feedback['reused'] = True
+        else:
+            # Check with AI if the approach is correct
+            feedback = services.ai_service.check_answer(**inputs)
+            if inputs['result_matches'] is not None:
+                feedback['matches_expected'] = inputs['result_matches']
+            # Local fallback verdicts (AI unavailable) are not worth keeping
+            if verdict_key and not feedback.get('fallback'):
+                services.progress_tracker.save_verdict(*verdict_key, feedback)
+
+        _record_attempt(data, feedback)
 
         return jsonify({
             'feedback': feedback
@@ -224,7 +436,80 @@ def check_answer():
             'feedback': {'correct': False, 'message': f'Query error: {str(e)}'}
         }), 400
 
-@app.route('/api/problem/hint', methods=['POST'])
+@routes.route('/api/problem/check/stream', methods=['POST'])
+def check_answer_stream():
+    """Like /api/problem/check, but streams the AI feedback as Server-Sent Events
+
+    Events: token (raw text), field (feedback members as they complete),
+    done ({'feedback': ...}) or error.
+    """
+    data = request.json
+
+    try:
+        inputs = _check_inputs(data)
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'feedback': {'correct': False, 'message': f'Query error: {str(e)}'}
+        }), 400
+
+    def events():
+        verdict_key = _verdict_key(data, inputs)
+        feedback = services.progress_tracker.get_verdict(*verdict_key) if verdict_key else None
+        if feedback is not None:
+            feedback['reused'] = True
+            _record_attempt(data, feedback)
+            yield 'done', {'feedback': feedback}
+            return
+
+        try:
+            for event, payload in services.ai_service.stream_check_answer(**inputs):
+                if event == 'done':
+                    if inputs['result_matches'] is not None:
+                        payload['matches_expected'] = inputs['result_matches']
+                    if verdict_key:
+                        services.progress_tracker.save_verdict(*verdict_key, payload)
+                    _record_attempt(data, payload)
+                    payload = {'feedback': payload}
+                yield event, payload
+        except ai_unavailable_errors() as e:
+            print(f"[API] Grading without AI: {e}")
+            feedback = services.ai_service.fallback_feedback(inputs['result'], inputs['result_matches'])
+            _record_attempt(data, feedback)
+            yield 'done', {'feedback': feedback}
+
+    return _sse_response(events())
+
+def _stored_hint(data, fallback=False):
+    """Hint from the problem's precomputed ladder, or None if the student's query needs a tailored one
+
+    The ladder comes from the saved problem (or the problem sent by the client)
+    and is generated in one call if the problem has none: saved for saved
+    problems, kept in AIService's ladder cache for unsaved ones. With
+    fallback=True (AI unavailable) a hint is always returned, generic if need be.
+    """
+    if not fallback and is_meaningful_query(data.get('query', ''), data.get('initial_query', '')):
+        return None
+    hint_level = min(max(int(data.get('hint_level', 1)), 1), 3)
+
+    saved_id = data.get('saved_id')
+    problem = services.progress_tracker.get_saved_problem(saved_id) if saved_id else None
+    hints = (problem or {}).get('hints') or data.get('hints')
+    if not (isinstance(hints, list) and len(hints) >= 3):
+        try:
+            hints = services.ai_service.generate_hint_ladder(
+                data.get('problem_description') or (problem or {}).get('description'),
+                solution=(problem or {}).get('solution')
+            )
+        except ai_unavailable_errors() as e:
+            print(f"[API] Serving a generic hint: {e}")
+            return FALLBACK_HINTS[hint_level - 1]
+        if problem is not None:
+            services.progress_tracker.save_problem_hints(saved_id, hints)
+
+    return hints[hint_level - 1]
+
+@routes.route('/api/problem/hint', methods=['POST'])
 def get_hint():
     """Get a hint for the current problem"""
     data = request.json
@@ -233,31 +518,147 @@ def get_hint():
     hint_level = data.get('hint_level', 1)
 
     try:
-        hint = ai_service.generate_hint(problem_description, user_query, hint_level)
-        return jsonify({'hint': hint})
+        hint = _stored_hint(data)
+        if hint is not None:
+            return jsonify({'hint': hint, 'source': 'ladder'})
+
+        try:
+            hint = services.ai_service.generate_hint(problem_description, user_query, hint_level)
+        except ai_unavailable_errors() as e:
+            print(f"[API] Serving a stored hint instead of a tailored one: {e}")
+            return jsonify({'hint': _stored_hint(data, fallback=True), 'source': 'fallback'})
+        return jsonify({'hint': hint, 'source': 'dynamic'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/progress/stats', methods=['GET'])
+@routes.route('/api/problem/hint/stream', methods=['POST'])
+def get_hint_stream():
+    """Like /api/problem/hint, but streams the hint as Server-Sent Events (token, done)"""
+    data = request.json
+
+    def events():
+        hint = _stored_hint(data)
+        if hint is not None:
+            yield 'done', {'hint': hint, 'source': 'ladder'}
+            return
+        stream = services.ai_service.stream_hint(
+            data.get('problem_description'), data.get('query', ''), data.get('hint_level', 1)
+        )
+        try:
+            for event, payload in stream:
+                yield event, {'hint': payload, 'source': 'dynamic'} if event == 'done' else payload
+        except ai_unavailable_errors() as e:
+            print(f"[API] Serving a stored hint instead of a tailored one: {e}")
+            yield 'done', {'hint': _stored_hint(data, fallback=True), 'source': 'fallback'}
+
+    return _sse_response(events())
+
+def _sandbox_session_id():
+    """Identify the browser session that owns a scratch database"""
+    if 'sandbox_id' not in session:
+        session['sandbox_id'] = secrets.token_hex(16)
+    return session['sandbox_id']
+
+@routes.route('/api/sandbox/execute', methods=['POST'])
+def execute_sandbox_query():
+    """Execute any statement (including INSERT/UPDATE/DELETE/CREATE) in the session's scratch database"""
+    data = request.json
+    user_query = data.get('query')
+
+    if not user_query:
+        return jsonify({'error': 'Query is required'}), 400
+
+    try:
+        result = services.scratch_databases.execute(_sandbox_session_id(), user_query)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@routes.route('/api/sandbox/reset', methods=['POST'])
+def reset_sandbox():
+    """Discard the session's scratch database changes"""
+    services.scratch_databases.reset(_sandbox_session_id())
+    return jsonify({'status': 'success'})
+
+@routes.route('/api/sandbox/stats', methods=['GET'])
+def get_sandbox_stats():
+    """Get live sandbox count and memory usage"""
+    return jsonify(services.scratch_databases.stats())
+
+@routes.route('/api/progress/stats', methods=['GET'])
 def get_progress_stats():
     """Get user's overall progress statistics"""
-    stats = progress_tracker.get_stats()
+    stats = services.progress_tracker.get_stats()
     return jsonify(stats)
 
-@app.route('/api/database/schema', methods=['GET'])
+@routes.route('/api/ready', methods=['GET'])
+def get_readiness():
+    """503 until this process has warmed up (databases open, deck loaded); the first call starts warming"""
+    services.warm_in_background()
+    readiness = services.readiness()
+    return jsonify(readiness), 200 if readiness['ready'] else 503
+
+@routes.route('/api/ai/usage', methods=['GET'])
+def get_ai_usage():
+    """Get token usage (cached vs. uncached) and latency of AI calls by kind"""
+    return jsonify(services.ai_service.usage.report())
+
+@routes.route('/api/ai/health', methods=['GET'])
+def get_ai_health():
+    """Get the AI circuit breaker state (closed, open or half_open) and recent failure rate"""
+    return jsonify(services.ai_service.breaker.stats())
+
+@routes.route('/api/ai/scheduler', methods=['GET'])
+def get_ai_scheduler_stats():
+    """Get AI call queue depth, throttling and rate-limit backoff state"""
+    return jsonify(services.ai_service.scheduler.stats())
+
+@routes.route('/api/profiling/queries', methods=['GET'])
+def get_query_profile():
+    """Get latency percentiles and the slowest student queries (requires SQL_PROFILING=1)"""
+    limit = request.args.get('limit', 10, type=int)
+    try:
+        return jsonify(_sql_checker().profiler.report(limit))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@routes.route('/api/database/schema', methods=['GET'])
 def get_database_schema():
-    """Get the schema of the practice database"""
-    schema = sql_checker.get_schema()
+    """Get the schema of a practice dataset"""
+    try:
+        schema = _sql_checker().get_schema()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(schema)
 
-@app.route('/api/database/sample-data', methods=['GET'])
+@routes.route('/api/datasets', methods=['GET'])
+def get_datasets():
+    """List the practice datasets problems can be generated for"""
+    return jsonify({'datasets': services.datasets.list(), 'default': DEFAULT_DATASET})
+
+@routes.route('/api/database/version', methods=['GET'])
+def get_database_version():
+    """Get the content hash of the practice database currently being served"""
+    try:
+        sql_checker = _sql_checker()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'version': sql_checker.db_version,
+        'in_flight': sql_checker.versions.in_flight()
+    })
+
+@routes.route('/api/database/sample-data', methods=['GET'])
 def get_sample_data():
     """Get sample data from tables for reference"""
     table = request.args.get('table')
     limit = int(request.args.get('limit', 5))
 
-    data = sql_checker.get_sample_data(table, limit)
+    try:
+        data = _sql_checker().get_sample_data(table, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(data)
 
 if __name__ == '__main__':
-    app.run(debug=os.getenv('FLASK_ENV') == 'development', port=5000)
+    create_app().run(debug=os.getenv('FLASK_ENV') == 'development', port=int(os.getenv('PORT', 5000)))
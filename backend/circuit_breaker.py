@@ -0,0 +1,125 @@
+"""
+Circuit breaker for calls to an unreliable dependency (the AI API).
+
+Outcomes of recent calls are kept in a sliding window; a call that raised or
+took longer than slow_call_seconds counts as a failure. When the failure rate
+over at least min_calls calls reaches failure_rate the circuit opens and
+calls fail immediately with CircuitOpen. After open_seconds one probe call is
+let through (half-open): success closes the circuit, failure opens it again.
+Errors for which is_failure(error) is false (e.g. bad requests) are raised
+without counting as failures.
+"""
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling the dependency while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Fail fast while a dependency is failing or slow"""
+
+    def __init__(self, name, window=20, min_calls=5, failure_rate=0.5,
+                 slow_call_seconds=20.0, open_seconds=30.0, is_failure=None):
+        self.name = name
+        self.is_failure = is_failure or (lambda error: True)
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # True for failed or slow calls
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.opened = 0
+
+    def check(self):
+        """Raise CircuitOpen if a call would be rejected right now (without claiming the probe)"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                raise CircuitOpen(f"{self.name} is unavailable, using a fallback")
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpen(f"{self.name} is unavailable, using a fallback")
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpen(f"{self.name} is recovering, using a fallback")
+                self._probing = True
+                return True
+            return False
+
+    def call(self, func):
+        """Run func() unless the circuit is open, recording its outcome"""
+        probe = self.start_call()
+        start = time.monotonic()
+        try:
+            result = func()
+        except Exception as e:
+            self.finish_call(probe, error=e)
+            raise
+        self.finish_call(probe, seconds=time.monotonic() - start)
+        return result
+
+    def start_call(self):
+        """Claim a call whose outcome is known only later (a stream); pass the result to finish_call()"""
+        return self._before_call()
+
+    def finish_call(self, probe, error=None, seconds=0.0):
+        """Record the outcome of a call claimed with start_call()"""
+        if error is not None:
+            self._record(failed=self.is_failure(error), probe=probe)
+        else:
+            self._record(failed=seconds > self.slow_call_seconds, probe=probe)
+
+    def _record(self, failed, probe):
+        with self._lock:
+            if probe:
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    print(f"[Circuit Breaker] {self.name} recovered, closing circuit")
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+
+            self._outcomes.append(failed)
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def _open(self):
+        """Open the circuit (caller holds the lock)"""
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        print(f"[Circuit Breaker] {self.name} failing, opening circuit for {self.open_seconds:g}s")
+
+    def stats(self):
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                'state': self.state,
+                'recent_calls': calls,
+                'recent_failure_rate': round(sum(self._outcomes) / calls, 3) if calls else 0.0,
+                'opened': self.opened,
+                'rejected': self.rejected,
+                'retry_in_seconds': round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if self.state == OPEN else 0.0
+            }
@@ -0,0 +1,129 @@
+"""
+Registry of practice datasets.
+
+Each dataset declares how to build its database; nothing is built until the
+dataset is first used. Open datasets (each a SQLChecker with its own memory
+image / worker pool) are kept in a small LRU so adding datasets does not add
+to startup time or steady-state memory. Schema descriptions for AI prompts are
+derived from the built database rather than written by hand.
+"""
+import threading
+from collections import OrderedDict
+
+from sample_data import SampleDataGenerator, TimeSeriesDataGenerator
+from sql_checker import SQLChecker
+
+DEFAULT_DATASET = 'ecommerce'
+
+
+class Dataset:
+    """Declaration of one practice dataset"""
+
+    def __init__(self, name, title, builder, description='', db_name=None):
+        self.name = name
+        self.title = title
+        self.builder = builder  # builder(db_path) creates and populates the database
+        self.description = description
+        self.db_name = db_name or name  # Base name of the versioned database files
+
+    def to_dict(self):
+        return {'name': self.name, 'title': self.title, 'description': self.description}
+
+
+class DatasetRegistry:
+    """Declared datasets plus a bounded LRU of the ones currently open"""
+
+    def __init__(self, max_open=3):
+        self.max_open = max_open
+        self._datasets = OrderedDict()
+        self._open = OrderedDict()  # name -> SQLChecker, least recently used first
+        self._schema_descriptions = {}  # (name, version) -> prompt text
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def register(self, dataset):
+        self._datasets[dataset.name] = dataset
+        self._build_locks[dataset.name] = threading.Lock()
+        return dataset
+
+    def get(self, name):
+        dataset = self._datasets.get(name or DEFAULT_DATASET)
+        if dataset is None:
+            raise ValueError(f'Unknown dataset "{name}"')
+        return dataset
+
+    def list(self):
+        with self._lock:
+            open_names = set(self._open)
+        return [dict(dataset.to_dict(), open=dataset.name in open_names)
+                for dataset in self._datasets.values()]
+
+    def checker(self, name=None):
+        """Return the SQLChecker for a dataset, building and opening it on first use"""
+        dataset = self.get(name)
+
+        with self._lock:
+            checker = self._open.get(dataset.name)
+            if checker is not None:
+                self._open.move_to_end(dataset.name)
+                return checker
+
+        checker = SQLChecker(dataset.db_name)
+        with self._build_locks[dataset.name]:
+            if checker.versions.ensure(dataset.builder):
+                print(f"[Datasets] Built dataset '{dataset.name}'")
+
+        evicted = []
+        with self._lock:
+            existing = self._open.get(dataset.name)
+            if existing is not None:
+                self._open.move_to_end(dataset.name)
+                return existing
+            self._open[dataset.name] = checker
+            while len(self._open) > self.max_open:
+                evicted.append(self._open.popitem(last=False))
+
+        # Requests still holding an evicted checker can finish; it releases its pools after them
+        for evicted_name, evicted_checker in evicted:
+            print(f"[Datasets] Closing least recently used dataset '{evicted_name}'")
+            evicted_checker.close()
+        return checker
+
+    def schema_description(self, name=None):
+        """Markdown table/column list of a dataset for AI prompts"""
+        dataset = self.get(name)
+        checker = self.checker(dataset.name)
+        key = (dataset.name, checker.db_version)
+        description = self._schema_descriptions.get(key)
+        if description is None:
+            schema = checker.get_schema()
+            description = '\n'.join(
+                f"**{table}**: {', '.join(column['name'] for column in info['columns'])}"
+                for table, info in schema.items()
+            )
+            self._schema_descriptions[key] = description
+        return description
+
+    def close(self):
+        with self._lock:
+            open_checkers = list(self._open.values())
+            self._open.clear()
+        for checker in open_checkers:
+            checker.close()
+
+
+def create_default_registry(max_open=3):
+    """Registry with the built-in practice datasets"""
+    registry = DatasetRegistry(max_open=max_open)
+    registry.register(Dataset(
+        'ecommerce', 'E-commerce',
+        SampleDataGenerator().build_database,
+        'Customers, products, orders and order items, plus employees and their sales',
+        db_name='practice'
+    ))
+    registry.register(Dataset(
+        'timeseries', 'Time series',
+        TimeSeriesDataGenerator().build_database,
+        'Weather station readings and daily website page views'
+    ))
+    return registry
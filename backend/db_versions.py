@@ -0,0 +1,168 @@
+"""
+Content-addressed versions of the practice database.
+
+A rebuild writes a new database off to the side, names it after a hash of its
+contents (practice-<hash>.db) and then atomically repoints practice.current at
+it. Readers resolve the pointer when they open a connection, so in-flight
+queries finish on the version they started with while new queries see the
+new one. Old version files are pruned once nothing in this process is using
+them, keeping a few recent ones for other processes still draining.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are only serialized within a process
+    fcntl = None
+
+DatabaseVersion = namedtuple('DatabaseVersion', ['id', 'path'])
+
+# Version id reported while only an unversioned practice.db exists
+LEGACY_VERSION = 'legacy'
+
+
+class DatabaseVersions:
+    """Track, publish and prune versions of one database"""
+
+    def __init__(self, directory, name='practice', keep=2):
+        self.directory = os.path.abspath(directory)
+        self.name = name
+        self.keep = keep
+        self.pointer_path = os.path.join(self.directory, f'{name}.current')
+        self.legacy_path = os.path.join(self.directory, f'{name}.db')
+
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._pins = {}  # version id -> number of open uses in this process
+        self._cached_stat = None
+        self._cached_version = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _version_path(self, version_id):
+        return os.path.join(self.directory, f'{self.name}-{version_id}.db')
+
+    def current(self):
+        """Return the DatabaseVersion new connections should use"""
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return DatabaseVersion(LEGACY_VERSION, self.legacy_path)
+
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stat_key != self._cached_stat:
+            with open(self.pointer_path) as f:
+                version_id = f.read().strip()
+            self._cached_version = DatabaseVersion(version_id, self._version_path(version_id))
+            self._cached_stat = stat_key
+        return self._cached_version
+
+    def exists(self):
+        return os.path.exists(self.current().path)
+
+    @contextmanager
+    def pin(self):
+        """Hold the current version for the duration of a query"""
+        version = self.current()
+        with self._lock:
+            self._pins[version.id] = self._pins.get(version.id, 0) + 1
+        try:
+            yield version
+        finally:
+            with self._lock:
+                self._pins[version.id] -= 1
+                drained = self._pins[version.id] == 0
+                if drained:
+                    del self._pins[version.id]
+            if drained and version.id != self.current().id:
+                # Last use of a superseded version: its file can go now rather than at the next publish
+                self.prune()
+
+    def in_flight(self):
+        with self._lock:
+            return dict(self._pins)
+
+    def ensure(self, builder):
+        """Build a first version with builder(path) unless one exists; returns True if this call built it
+
+        Safe when several threads or processes start at once (e.g. the workers
+        of a pre-fork server): one builds while the others wait, then reuse it.
+        """
+        if self.exists():
+            return False
+        with self._build_lock, self._file_lock():
+            if self.exists():
+                return False
+            self.build(builder)
+            return True
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on {name}.lock, shared with other processes using this directory"""
+        with open(os.path.join(self.directory, f'{self.name}.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield  # Closing the file releases the lock
+
+    def build(self, builder):
+        """Build a new version with builder(path) and make it current"""
+        fd, tmp_path = tempfile.mkstemp(prefix=f'{self.name}-build-', suffix='.db.tmp', dir=self.directory)
+        os.close(fd)
+        os.remove(tmp_path)  # builder creates the database itself
+        try:
+            builder(tmp_path)
+            return self.publish(tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def publish(self, built_path):
+        """Move a finished database into place and atomically repoint to it"""
+        digest = hashlib.sha256()
+        with open(built_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        version_id = digest.hexdigest()[:12]
+        version = DatabaseVersion(version_id, self._version_path(version_id))
+
+        os.replace(built_path, version.path)
+
+        pointer_tmp = f'{self.pointer_path}.{os.getpid()}.tmp'
+        with open(pointer_tmp, 'w') as f:
+            f.write(version.id)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, self.pointer_path)
+
+        self.prune()
+        return version
+
+    def prune(self):
+        """Delete old version files that are neither current, recent nor pinned"""
+        current = self.current()
+        prefix, suffix = f'{self.name}-', '.db'
+        candidates = []
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith(prefix) and filename.endswith(suffix)):
+                continue
+            version_id = filename[len(prefix):-len(suffix)]
+            path = os.path.join(self.directory, filename)
+            if version_id != current.id:
+                candidates.append((os.path.getmtime(path), version_id, path))
+
+        candidates.sort(reverse=True)
+        pinned = self.in_flight()
+        removed = []
+        for _, version_id, path in candidates[max(0, self.keep - 1):]:
+            if version_id in pinned:
+                continue
+            try:
+                os.remove(path)
+                removed.append(version_id)
+            except OSError:
+                pass
+        return removed
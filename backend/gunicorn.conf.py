@@ -0,0 +1,51 @@
+"""
+gunicorn settings for the Flask backend (run from backend/):
+
+    gunicorn 'app:create_app()'
+
+The master builds the practice and progress databases once before forking;
+each worker then opens its own pools right after the fork. See
+docs/BACKEND_DEPLOYMENT.md.
+"""
+import multiprocessing
+import os
+import secrets
+import time
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+# Each worker holds its own memory images and query worker pool, so keep the count modest
+workers = int(os.getenv('WEB_CONCURRENCY', min(4, multiprocessing.cpu_count())))
+# Threads keep a worker responsive while requests wait on the AI API or stream SSE
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+# AI calls time out after AI_REQUEST_TIMEOUT (30s); streams can run longer
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+# Importing the app is cheap (services are lazy), so preloading only saves a little memory
+preload_app = os.getenv('GUNICORN_PRELOAD') == '1'
+
+
+def on_starting(server):
+    """In the master, once: shared secret key and one-time database setup"""
+    if not os.getenv('FLASK_SECRET_KEY'):
+        # Workers must share the key to accept each other's session cookies
+        os.environ['FLASK_SECRET_KEY'] = secrets.token_hex(32)
+        server.log.warning("FLASK_SECRET_KEY is not set; generated one (sessions end on restart)")
+
+    start = time.perf_counter()
+    from services import services
+    services.initialize()
+    server.log.info(f"Storage ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+def post_fork(server, worker):
+    """In each worker: open this process's pools before it accepts requests"""
+    if os.getenv('WARM_WORKERS', '1') == '1':
+        from services import services
+        services.warm()
+
+
+def worker_exit(server, worker):
+    from services import services
+    services.close()
@@ -0,0 +1,144 @@
+"""
+JSON serialization and compression of API responses.
+
+FastJSONProvider serializes with orjson when it is installed (stdlib json
+otherwise), keeping Flask's output: sorted keys, compact, the same handling of
+dates, decimals, UUIDs and dataclasses. compress_response() gzip- or
+brotli-encodes text responses above COMPRESS_MIN_BYTES for clients that accept
+it; brotli is used only when the brotli package is installed. Static responses
+with an ETag (the flashcard deck) are compressed once and reused.
+"""
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# JSON_SERIALIZER=stdlib forces the standard library even if orjson is installed
+USE_ORJSON = orjson is not None and os.getenv('JSON_SERIALIZER', 'orjson') != 'stdlib'
+
+COMPRESSION_ENABLED = os.getenv('COMPRESSION', '1') != '0'
+# Below this size the encoding overhead outweighs the bytes saved
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'text/html', 'text/css',
+    'text/javascript', 'text/plain', 'image/svg+xml'
+}
+
+# Preferred first; brotli is smaller at a similar cost
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def dumps_bytes(obj, default=None):
+    """Compact JSON with sorted keys as UTF-8 bytes, using orjson when available"""
+    if USE_ORJSON:
+        try:
+            # Dates go through default, so they keep Flask's HTTP-date format
+            return orjson.dumps(obj, default=default, option=orjson.OPT_SORT_KEYS
+                                | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:  # Types orjson rejects but json may not (e.g. ints over 64 bits)
+            pass
+    return json.dumps(obj, default=default, sort_keys=True, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with stdlib json as the fallback"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or not USE_ORJSON:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or not USE_ORJSON:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)  # Indented output for debugging
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, default=self.default) + b'\n',
+                                        mimetype=self.mimetype)
+
+
+def compress(data, encoding):
+    """data encoded with 'br' or 'gzip'"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _CompressedCache:
+    """Compressed bodies of static responses, keyed by (ETag, encoding)"""
+
+    def __init__(self, size=32):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag, encoding, data):
+        key = (etag, encoding)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        compressed = compress(data, encoding)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+_compressed_cache = _CompressedCache()
+
+
+def negotiate_encoding(accept_encodings):
+    """Best encoding the client accepts (werkzeug Accept-Encoding header), or None"""
+    best = accept_encodings.best_match(ENCODINGS)
+    return best if best in ENCODINGS else None
+
+
+def compress_response(response):
+    """after_request hook: compress text responses above COMPRESS_MIN_BYTES when accepted"""
+    if not COMPRESSION_ENABLED or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    # Streams (SSE, files) are sent as they are produced; bodiless and already-encoded ones are left alone
+    if (response.is_streamed or response.direct_passthrough or response.status_code < 200
+            or response.status_code in (204, 206, 304) or 'Content-Encoding' in response.headers):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_data(_compressed_cache.get(etag, encoding, data))
+        # The encoded body differs byte for byte, so the validator can only be weak
+        response.set_etag(etag, weak=True)
+    else:
+        response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,71 @@
+"""
+Incremental parsing of a JSON object that arrives in chunks.
+
+Used for streamed AI responses: as text is fed in, each top-level member of
+the object is reported as soon as its value is complete, so a client can show
+the problem title or feedback message before the rest has been generated.
+Text before the opening brace (such as a ```json fence) is ignored.
+"""
+import json
+
+
+class IncrementalJSONParser:
+    """Feed chunks of a streamed JSON object; get back members as they complete"""
+
+    def __init__(self):
+        self.buffer = ''
+        self.fields = {}
+        self._pos = 0  # Next character of buffer to scan
+        self._start = None  # Start of the current member (after '{' or ',')
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.complete = False
+
+    def feed(self, chunk):
+        """Add text; return a dict of the top-level members completed by it"""
+        self.buffer += chunk
+        completed = {}
+
+        while self._pos < len(self.buffer) and not self.complete:
+            char = self.buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1 and char == '{':
+                    self._start = self._pos + 1
+            elif char in '}]':
+                if self._depth == 1:
+                    self._emit(self.buffer[self._start:self._pos], completed)
+                    self.complete = True
+                self._depth -= 1
+            elif char == ',' and self._depth == 1:
+                self._emit(self.buffer[self._start:self._pos], completed)
+                self._start = self._pos + 1
+            self._pos += 1
+
+        return completed
+
+    def _emit(self, member, completed):
+        if not member.strip() or self._start is None:
+            return
+        try:
+            completed.update(json.loads('{' + member + '}'))
+        except json.JSONDecodeError:
+            return  # Left for the final full parse to report
+        self.fields.update(completed)
+
+    def result(self):
+        """Parse the whole object once the stream has ended"""
+        start = self.buffer.find('{')
+        if start == -1 or not self.complete:
+            raise ValueError("AI response did not contain a complete JSON object")
+        return json.loads(self.buffer[start:self._pos])
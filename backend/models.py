@@ -3,11 +3,14 @@ import os
 from datetime import datetime
 import json
 
+from problem_validation import compress_rows, decompress_rows
+
 class ProgressTracker:
     """Track user progress, scores, and statistics"""
 
     def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), '../database/progress.db')
+        # PROGRESS_DB_PATH points load tests and benchmarks at a scratch database
+        self.db_path = os.getenv('PROGRESS_DB_PATH') or os.path.join(os.path.dirname(__file__), '../database/progress.db')
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         self._initialize_database()
 
@@ -61,6 +64,17 @@ class ProgressTracker:
             )
         ''')
 
+        # Expected result of the reference solution (migration for existing databases)
+        try:
+            cursor.execute('ALTER TABLE saved_problems ADD COLUMN expected_fingerprint TEXT')
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+
+        try:
+            cursor.execute('ALTER TABLE saved_problems ADD COLUMN expected_result BLOB')
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+
         # Problem solving history
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS problem_history (
@@ -75,6 +89,24 @@ class ProgressTracker:
             )
         ''')
 
+        # AI feedback for graded submissions, reused for equivalent submissions
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS grading_verdicts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                problem_key TEXT NOT NULL,
+                query_fingerprint TEXT NOT NULL,
+                result_hash TEXT NOT NULL,
+                feedback TEXT NOT NULL,
+                reuse_count INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_grading_verdicts_key
+            ON grading_verdicts (problem_key, query_fingerprint, result_hash)
+        ''')
+
         # Overall statistics
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS statistics (
@@ -383,18 +415,24 @@ class ProgressTracker:
         conn.commit()
         conn.close()
 
-    def save_problem(self, problem_data):
-        """Save a generated problem for later reuse"""
+    def save_problem(self, problem_data, expected_rows=None):
+        """Save a generated problem for later reuse, with its solution's result if known"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         problem_json = json.dumps(problem_data)
         now = datetime.now().isoformat()
+        expected = problem_data.get('expected')
 
         cursor.execute('''
-            INSERT INTO saved_problems (problem_data, created_at, last_accessed)
-            VALUES (?, ?, ?)
-        ''', (problem_json, now, now))
+            INSERT INTO saved_problems (problem_data, created_at, last_accessed,
+                                        expected_fingerprint, expected_result)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (
+            problem_json, now, now,
+            json.dumps(expected) if expected else None,
+            compress_rows(expected_rows) if expected_rows is not None else None
+        ))
 
         problem_id = cursor.lastrowid
         conn.commit()
@@ -495,6 +533,110 @@ class ProgressTracker:
         conn.close()
         return None
 
+    def save_problem_hints(self, problem_id, hints):
+        """Store the hint ladder (list of 3 hints) of a saved problem"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE saved_problems
+            SET problem_data = json_set(problem_data, '$.hints', json(?))
+            WHERE id = ?
+        ''', (json.dumps(hints), problem_id))
+
+        conn.commit()
+        conn.close()
+        return cursor.rowcount > 0
+
+    def update_expected_result(self, problem_id, expected, expected_rows):
+        """Replace a saved problem's expected result (e.g. recomputed after the practice data changed)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE saved_problems
+            SET expected_fingerprint = ?, expected_result = ?
+            WHERE id = ?
+        ''', (json.dumps(expected), compress_rows(expected_rows), problem_id))
+
+        conn.commit()
+        conn.close()
+
+    def get_expected_result(self, problem_id):
+        """Get (fingerprint, rows) of a saved problem's reference solution, or None"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT expected_fingerprint, expected_result
+            FROM saved_problems
+            WHERE id = ?
+        ''', (problem_id,))
+
+        row = cursor.fetchone()
+        conn.close()
+
+        if row and row[0] and row[1]:
+            return json.loads(row[0]), decompress_rows(row[1])
+        return None
+
+    def get_verdict(self, problem_key, query_fingerprint, result_hash):
+        """Get stored feedback for an equivalent submission, counting the reuse"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, feedback FROM grading_verdicts
+            WHERE problem_key = ? AND query_fingerprint = ? AND result_hash = ?
+        ''', (problem_key, query_fingerprint, result_hash))
+
+        row = cursor.fetchone()
+        if row:
+            cursor.execute('''
+                UPDATE grading_verdicts
+                SET reuse_count = reuse_count + 1, last_used = ?
+                WHERE id = ?
+            ''', (datetime.now().isoformat(), row[0]))
+            conn.commit()
+
+        conn.close()
+        return json.loads(row[1]) if row else None
+
+    def save_verdict(self, problem_key, query_fingerprint, result_hash, feedback):
+        """Store the feedback given for a submission"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT OR REPLACE INTO grading_verdicts
+                (problem_key, query_fingerprint, result_hash, feedback, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (problem_key, query_fingerprint, result_hash, json.dumps(feedback),
+              datetime.now().isoformat(), datetime.now().isoformat()))
+
+        conn.commit()
+        conn.close()
+
+    def get_verdict_stats(self):
+        """How often stored feedback has been reused instead of asking the AI"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(reuse_count), 0), COUNT(DISTINCT problem_key)
+            FROM grading_verdicts
+        ''')
+        verdicts, reused, problems = cursor.fetchone()
+        conn.close()
+
+        graded = verdicts + reused
+        return {
+            'verdicts': verdicts,
+            'problems': problems,
+            'reused': reused,
+            'reuse_rate': round(reused / graded, 3) if graded else 0.0
+        }
+
     def delete_saved_problem(self, problem_id):
         """Delete a saved problem"""
         conn = sqlite3.connect(self.db_path)
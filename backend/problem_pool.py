@@ -0,0 +1,196 @@
+"""
+Pool of pre-generated problems so /api/problem/generate can answer instantly.
+
+Problems are pooled per (dataset, difficulty, topic). A key joins the pool the
+first time it is requested (or at startup when prewarmed); after that a
+background thread keeps its depth between the low and high watermarks. Each
+pooled problem is served once. A request that finds the pool empty falls back
+to generating synchronously and schedules a refill. Pooled problems that are
+no longer current (is_current, e.g. the practice data was rebuilt) are dropped
+when they come up. At most max_keys keys are pooled; a new key evicts the one
+requested least recently.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+REQUIRED_FIELDS = ('title', 'description', 'solution')
+
+
+def has_required_fields(problem):
+    """Default validation: the generated problem has a title, description and solution"""
+    return all(problem.get(field) for field in REQUIRED_FIELDS)
+
+
+class ProblemPool:
+    """Keep a few generated problems ready for each requested (dataset, difficulty, topic)"""
+
+    def __init__(self, generate, validate=None, is_current=None, low_watermark=1, high_watermark=3,
+                 max_keys=32, failure_backoff=30, max_attempts=3):
+        self.generate = generate  # generate(dataset, difficulty, topic, background) -> problem dict
+        self.validate = validate or has_required_fields
+        self.is_current = is_current or (lambda problem: True)
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.max_keys = max_keys
+        self.failure_backoff = failure_backoff
+        self.max_attempts = max_attempts  # Generations tried per synchronous request
+
+        self._pools = OrderedDict()  # key -> deque of problems, least recently requested first
+        self._retry_at = {}  # key -> monotonic time before which refills are skipped
+        self._pending = deque()  # keys waiting for the refiller
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.rejected = 0
+        self.stale = 0
+        self.evicted = 0
+        self.failures = 0
+        self.generate_seconds = 0.0
+
+    def start(self):
+        """Start the background refill thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill_loop, name='problem-pool', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def prewarm(self, keys):
+        """Add (dataset, difficulty, topic) keys to the pool before anyone asks for them"""
+        with self._condition:
+            for key in keys:
+                self._track(key)
+
+    def _track(self, key):
+        """Make sure a key has a pool and is queued if below the low watermark (caller holds the lock)"""
+        if key in self._pools:
+            self._pools.move_to_end(key)
+        else:
+            while len(self._pools) >= self.max_keys:
+                self._evict(next(iter(self._pools)))
+            self._pools[key] = deque()
+        if len(self._pools[key]) < self.low_watermark and key not in self._pending:
+            self._pending.append(key)
+            self._condition.notify()
+
+    def _evict(self, key):
+        """Drop a key and its pooled problems (caller holds the lock)"""
+        del self._pools[key]
+        self._retry_at.pop(key, None)
+        if key in self._pending:
+            self._pending.remove(key)
+        self.evicted += 1
+
+    def take_pooled(self, dataset, difficulty, topic=None):
+        """Return a pooled problem, or None if the pool is empty (a refill is scheduled)"""
+        key = (dataset, difficulty, topic or None)
+        with self._condition:
+            pool = self._pools.get(key)
+            problem = pool.popleft() if pool else None
+            while problem is not None and not self.is_current(problem):
+                self.stale += 1
+                problem = pool.popleft() if pool else None
+            if problem is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._track(key)
+        return problem
+
+    def take(self, dataset, difficulty, topic=None):
+        """Return a pooled problem, or generate one now if the pool is empty"""
+        key = (dataset, difficulty, topic or None)
+        problem = self.take_pooled(*key)
+        for _ in range(self.max_attempts):
+            if problem is not None:
+                return problem
+            problem = self._generate(key)
+        if problem is None:
+            raise Exception("Generated problem failed validation, please try again")
+        return problem
+
+    def _generate(self, key, background=False):
+        """Generate and validate one problem; None if it was rejected"""
+        start = time.perf_counter()
+        problem = self.generate(*key, background)
+        with self._condition:
+            self.generated += 1
+            self.generate_seconds += time.perf_counter() - start
+        if not self.validate(problem):
+            with self._condition:
+                self.rejected += 1
+            return None
+        return problem
+
+    def _next_key(self):
+        """Block until a key needs refilling; None when stopped"""
+        with self._condition:
+            while not self._stopped:
+                now = time.monotonic()
+                for _ in range(len(self._pending)):
+                    key = self._pending.popleft()
+                    if self._retry_at.get(key, 0) <= now:
+                        return key
+                    self._pending.append(key)
+                self._condition.wait(timeout=self.failure_backoff if self._pending else None)
+        return None
+
+    def _refill_loop(self):
+        while True:
+            key = self._next_key()
+            if key is None:
+                return
+            try:
+                # Bounded so a topic that keeps failing validation cannot burn API calls forever
+                for _ in range(self.high_watermark * 2):
+                    with self._condition:
+                        pool = self._pools.get(key)  # None once the key has been evicted
+                        if self._stopped or pool is None or len(pool) >= self.high_watermark:
+                            break
+                    problem = self._generate(key, background=True)
+                    if problem is not None:
+                        with self._condition:
+                            if self._pools.get(key) is pool:
+                                pool.append(problem)
+                with self._condition:
+                    self._retry_at.pop(key, None)
+            except Exception as e:
+                print(f"[Problem Pool] Refill of {key} failed: {e}")
+                with self._condition:
+                    self.failures += 1
+                    if key in self._pools:
+                        self._retry_at[key] = time.monotonic() + self.failure_backoff
+                        if key not in self._pending:
+                            self._pending.append(key)
+
+    def stats(self):
+        with self._condition:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / requests, 3) if requests else 0.0,
+                'generated': self.generated,
+                'rejected': self.rejected,
+                'stale': self.stale,
+                'evicted': self.evicted,
+                'max_keys': self.max_keys,
+                'failures': self.failures,
+                'avg_generate_ms': round(self.generate_seconds / self.generated * 1000, 1) if self.generated else 0.0,
+                'pending_refills': len(self._pending),
+                'low_watermark': self.low_watermark,
+                'high_watermark': self.high_watermark,
+                'depth': [
+                    {'dataset': dataset, 'difficulty': difficulty, 'topic': topic, 'available': len(pool)}
+                    for (dataset, difficulty, topic), pool in self._pools.items()
+                ]
+            }
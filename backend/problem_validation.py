@@ -0,0 +1,110 @@
+"""
+Validation of AI-generated problems and fingerprints of their expected results.
+
+Every generated problem's reference solution is executed once, under a reduced
+VM-step budget, when the problem is generated. Problems whose solution fails,
+is rejected by the sandbox or returns nothing are discarded. For the rest a
+compact fingerprint of the expected result (row count, columns and an
+order-independent hash) is attached to the problem, and a compressed copy of
+the rows is stored with it so answers can be checked without running the
+reference solution again. The fingerprint records the practice database
+version it was computed on; after a rebuild it no longer applies.
+"""
+import hashlib
+import json
+import zlib
+
+# Reference solutions get a fraction of the budget student queries get
+DEFAULT_VALIDATION_VM_STEPS = 5_000_000
+
+
+def _normalize_value(value):
+    """Make equal numbers hash equally (2 vs 2.0, float noise)"""
+    if isinstance(value, float):
+        if value.is_integer():
+            return int(value)
+        return round(value, 6)
+    return value
+
+
+def _row_digest(values):
+    encoded = json.dumps([_normalize_value(value) for value in values],
+                         default=str, separators=(',', ':'))
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).digest()
+
+
+def fingerprint_result(rows):
+    """Summarize a list of row dicts as {row_count, columns, hash, ordered_hash}
+
+    hash ignores row order and column names, so a correct query with a
+    different ORDER BY or column aliases still matches; ordered_hash does not
+    ignore row order.
+    """
+    columns = list(rows[0].keys()) if rows else []
+    unordered = 0
+    ordered = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest = _row_digest(row.values())
+        # Summing row digests gives a multiset hash: duplicates still count
+        unordered = (unordered + int.from_bytes(digest, 'big')) % (1 << 128)
+        ordered.update(digest)
+    return {
+        'row_count': len(rows),
+        'columns': columns,
+        'hash': f'{unordered:032x}',
+        'ordered_hash': ordered.hexdigest()
+    }
+
+
+def compress_rows(rows):
+    return zlib.compress(json.dumps(rows, default=str, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decompress_rows(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+class ProblemValidator:
+    """Run generated solutions and attach their expected-result fingerprint"""
+
+    def __init__(self, datasets, max_vm_steps=DEFAULT_VALIDATION_VM_STEPS, max_rows=10000):
+        self.datasets = datasets
+        self.max_vm_steps = max_vm_steps
+        self.max_rows = max_rows
+
+    def __call__(self, problem):
+        """Return True if the problem's solution runs; adds 'expected' and 'expected_rows'"""
+        if not (problem.get('title') and problem.get('description') and problem.get('solution')):
+            return False
+
+        try:
+            checker = self.datasets.checker(problem.get('dataset'))
+            db_version = checker.db_version
+            rows = checker.execute_query(problem['solution'], max_vm_steps=self.max_vm_steps)
+        except Exception as e:
+            print(f"[Problem Validation] Rejected '{problem.get('title')}': {e}")
+            return False
+
+        if not rows:
+            print(f"[Problem Validation] Rejected '{problem.get('title')}': solution returned no rows")
+            return False
+        if len(rows) > self.max_rows:
+            print(f"[Problem Validation] Rejected '{problem.get('title')}': solution returned {len(rows)} rows")
+            return False
+
+        # A malformed hint ladder is dropped and regenerated on the first hint request
+        hints = problem.get('hints')
+        if not (isinstance(hints, list) and len(hints) >= 3 and all(isinstance(hint, str) for hint in hints)):
+            problem.pop('hints', None)
+
+        problem['expected'] = dict(fingerprint_result(rows), db_version=db_version)
+        problem['expected_rows'] = rows
+        return True
+
+    def is_current(self, problem):
+        """True if the problem's expected result was computed on the current version of its dataset"""
+        try:
+            checker = self.datasets.checker(problem.get('dataset'))
+        except ValueError:
+            return False
+        return (problem.get('expected') or {}).get('db_version') == checker.db_version
@@ -0,0 +1,198 @@
+"""
+Process-isolated execution of student queries.
+
+Queries are dispatched to a pool of pre-started worker processes, each holding
+its own read-only connection to the practice database. A query that overruns
+its deadline is stopped by killing the worker, which is then replaced, so a
+heavy query can never stall a web worker thread or hold the GIL.
+"""
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from query_sandbox import AccessDenied
+
+# Time allowed for a freshly started worker to import modules and connect
+WORKER_STARTUP_TIMEOUT = 30
+
+
+class QueryTimeout(ValueError):
+    """Raised when a query did not finish within the executor deadline"""
+
+
+def _worker_main(dataset, channel):
+    """Worker process loop: run (query, params, max_vm_steps, explain) tasks on one connection"""
+    from query_sandbox import AccessProfile
+    from sql_checker import SQLChecker
+
+    checker = SQLChecker(dataset)
+    version = checker.versions.current()
+    conn = checker._connect_readonly(version)
+    checker._get_access_policy(conn)
+    channel.send(('ready',))
+
+    while True:
+        try:
+            task = channel.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if task is None:
+            break
+
+        # Reconnect when practice.db has been rebuilt since the last task
+        if checker.versions.current().id != version.id:
+            conn.close()
+            version = checker.versions.current()
+            conn = checker._connect_readonly(version)
+
+        query, params, max_vm_steps, explain = task
+        profile = AccessProfile()
+        timings = {}
+        try:
+            if explain:
+                result = checker._explain_sandboxed(conn, query, profile, timings, max_vm_steps)
+            else:
+                result = checker._run_sandboxed(conn, query, params, profile, timings, max_vm_steps)
+            channel.send((
+                'ok', result, profile.tables, profile.functions,
+                timings['executed'] - timings['parsed'],
+                timings['vm_steps']
+            ))
+        except Exception as e:
+            channel.send(('error', type(e).__name__, str(e)))
+
+    conn.close()
+
+
+class _Worker:
+    """A worker process and the parent's end of its pipe"""
+
+    def __init__(self, process, channel):
+        self.process = process
+        self.channel = channel
+        self.ready = False
+
+
+class IsolatedQueryExecutor:
+    """Run queries in a pool of worker processes with per-query deadlines"""
+
+    def __init__(self, dataset='practice', workers=2, timeout=5.0, start_method=None):
+        self.dataset = dataset
+        self.timeout = timeout
+        self.recycled = 0
+        self._context = multiprocessing.get_context(
+            start_method or os.getenv('SQL_EXECUTOR_START_METHOD', 'spawn')
+        )
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for _ in range(max(1, workers)):
+            self._idle.put(self._spawn())
+
+        atexit.register(self.shutdown)
+        print(f"[Query Executor] Started {max(1, workers)} worker processes (timeout {timeout:g}s)")
+
+    def _spawn(self):
+        parent_channel, child_channel = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.dataset, child_channel),
+            daemon=True
+        )
+        process.start()
+        child_channel.close()
+        worker = _Worker(process, parent_channel)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire(self, worker):
+        """Kill a worker and drop it from the pool"""
+        with self._lock:
+            self._workers.discard(worker)
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=1)
+        worker.channel.close()
+
+    def _recycle(self, worker):
+        """Replace a timed-out or crashed worker with a fresh one"""
+        self._retire(worker)
+        self.recycled += 1
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def _wait_ready(self, worker):
+        if worker.ready:
+            return
+        if not worker.channel.poll(WORKER_STARTUP_TIMEOUT):
+            raise Exception("Query worker failed to start")
+        worker.channel.recv()
+        worker.ready = True
+
+    def execute(self, query, params, profile, timings=None, max_vm_steps=None, explain=False):
+        """Run a validated query in a worker, filling profile with its access
+
+        Returns the rows, or with explain=True the plan and measured run of the
+        query (see SQLChecker._explain_sandboxed).
+        """
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise QueryTimeout("All query workers are busy, please try again")
+
+        healthy = False
+        try:
+            self._wait_ready(worker)
+            if timings is not None:
+                timings['parsed'] = time.perf_counter()
+            worker.channel.send((query, params, max_vm_steps, explain))
+            if not worker.channel.poll(self.timeout):
+                raise QueryTimeout(f"Query took longer than {self.timeout:g}s and was stopped")
+            reply = worker.channel.recv()
+            healthy = True
+        except (EOFError, OSError):
+            raise Exception("Query worker exited unexpectedly")
+        finally:
+            if healthy:
+                self._idle.put(worker)
+            else:
+                self._recycle(worker)
+
+        if reply[0] == 'error':
+            _, error_type, message = reply
+            if error_type == 'AccessDenied':
+                raise AccessDenied(message)
+            if error_type == 'ValueError':
+                raise ValueError(message)
+            raise Exception(message)
+
+        _, result, tables, functions, execute_seconds, vm_steps = reply
+        for table, columns in tables.items():
+            profile.tables.setdefault(table, set()).update(columns)
+        profile.functions.update(functions)
+
+        if timings is not None:
+            # fetch time here includes transferring the rows from the worker
+            timings['executed'] = timings['parsed'] + execute_seconds
+            timings['fetched'] = time.perf_counter()
+            timings['vm_steps'] = vm_steps
+        return result
+
+    def shutdown(self):
+        """Stop all worker processes"""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                worker.channel.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.process.join(timeout=1)
+            self._retire(worker)
@@ -0,0 +1,72 @@
+"""
+Helpers for turning SQLite's EXPLAIN QUERY PLAN output into JSON.
+"""
+import re
+
+_INDEX_RE = re.compile(r'USING (?:COVERING )?INDEX (\S+)')
+_SCAN_RE = re.compile(r'^SCAN (\S+)')
+
+# How often (in VM instructions) the progress handler fires when counting steps
+VM_STEP_GRANULARITY = 100
+
+
+def build_plan_tree(rows):
+    """Nest (id, parent, notused, detail) plan rows into a list of root nodes"""
+    nodes = {}
+    roots = []
+    for node_id, parent_id, _, detail in rows:
+        node = {'id': node_id, 'detail': detail, 'children': []}
+        nodes[node_id] = node
+        parent = nodes.get(parent_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent['children'].append(node)
+    return roots
+
+
+def summarize_plan(rows):
+    """Report index usage, full table scans and temp b-trees in a plan"""
+    indexes = []
+    full_scans = []
+    uses_primary_key = False
+    temp_btrees = 0
+
+    for _, _, _, detail in rows:
+        index_match = _INDEX_RE.search(detail)
+        if index_match:
+            indexes.append(index_match.group(1))
+        elif 'PRIMARY KEY' in detail:
+            uses_primary_key = True
+        else:
+            scan_match = _SCAN_RE.match(detail)
+            if scan_match and 'USING' not in detail:
+                full_scans.append(scan_match.group(1))
+        if 'TEMP B-TREE' in detail:
+            temp_btrees += 1
+
+    return {
+        'uses_index': bool(indexes) or uses_primary_key,
+        'indexes': indexes,
+        'full_scans': full_scans,
+        'temp_btrees': temp_btrees
+    }
+
+
+def count_vm_steps(conn, max_steps=None):
+    """
+    Count virtual machine steps on conn via a progress handler.
+
+    Returns a one-element list holding the running step count. When max_steps
+    is given the running statement is interrupted once it is exceeded.
+    """
+    counter = [0]
+
+    def on_progress():
+        counter[0] += VM_STEP_GRANULARITY
+        if max_steps is not None and counter[0] > max_steps:
+            return 1  # Non-zero aborts the statement
+        return 0
+
+    conn.set_progress_handler(on_progress, VM_STEP_GRANULARITY)
+    return counter
@@ -0,0 +1,92 @@
+"""
+Opt-in per-query profiling for SQLChecker.
+
+Each profiled query records how long validation (parse), execution and
+fetching took, plus VM steps and rows returned. Queries whose route encodes the
+result (/api/problem/execute) also record JSON serialization time and payload
+size; the serialize percentiles cover only those.
+Durations are kept in a bounded rolling window for percentile reporting and
+the slowest queries seen are kept in a small heap.
+"""
+import heapq
+import itertools
+import threading
+from collections import deque
+
+PHASES = ('parse', 'execute', 'fetch', 'serialize', 'total')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class QueryProfiler:
+    """Collect timing samples for executed queries"""
+
+    def __init__(self, enabled=False, window=1000, top_n=20):
+        self.enabled = enabled
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._durations = {phase: deque(maxlen=window) for phase in PHASES}
+        self._slowest = []  # Min-heap of (total_ms, seq, sample)
+        self._seq = itertools.count()
+        self.total_queries = 0
+
+    def record(self, sample):
+        """Store one sample (a dict with <phase>_ms keys and counters)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.total_queries += 1
+            for phase in PHASES:
+                if f'{phase}_ms' in sample:
+                    self._durations[phase].append(sample[f'{phase}_ms'])
+            entry = (sample['total_ms'], next(self._seq), sample)
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, entry)
+            elif entry[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def histogram(self):
+        """p50/p95/p99/max for each phase over the rolling window"""
+        with self._lock:
+            snapshot = {phase: sorted(values) for phase, values in self._durations.items()}
+        return {
+            phase: {
+                'p50': round(percentile(values, 50), 3),
+                'p95': round(percentile(values, 95), 3),
+                'p99': round(percentile(values, 99), 3),
+                'max': round(values[-1], 3) if values else 0.0
+            }
+            for phase, values in snapshot.items()
+        }
+
+    def slowest(self, limit=None):
+        """The slowest queries seen so far, slowest first"""
+        with self._lock:
+            entries = sorted(self._slowest, reverse=True)
+        return [sample for _, _, sample in entries[:limit]]
+
+    def report(self, limit=10):
+        """Summary suitable for returning from an API endpoint"""
+        if not self.enabled:
+            return {'enabled': False}
+        return {
+            'enabled': True,
+            'total_queries': self.total_queries,
+            'window_size': len(self._durations['total']),
+            'histogram_ms': self.histogram(),
+            'slowest': self.slowest(limit)
+        }
+
+    def reset(self):
+        """Forget all collected samples"""
+        with self._lock:
+            for values in self._durations.values():
+                values.clear()
+            self._slowest = []
+            self.total_queries = 0
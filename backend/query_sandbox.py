@@ -0,0 +1,149 @@
+"""
+Engine-level sandbox for student queries built on SQLite's authorizer.
+
+The authorizer is consulted by SQLite while it compiles each statement, so
+it sees the real tables, columns and functions a query touches regardless of
+how the SQL text is spelled. Anything not explicitly allowed by the
+AccessPolicy is denied, which blocks writes, ATTACH and pragmas even if they
+slip past the keyword check in SQLChecker.is_safe_query.
+"""
+import sqlite3
+
+# Built-in functions that are read-only and cheap to evaluate
+DEFAULT_ALLOWED_FUNCTIONS = frozenset('''
+    abs char coalesce concat concat_ws format glob hex ifnull iif instr length
+    like likelihood likely lower ltrim max min nullif octet_length printf quote
+    random replace round rtrim sign soundex substr substring trim typeof unhex
+    unicode unlikely upper
+    date time datetime julianday unixepoch strftime timediff
+    avg count group_concat string_agg sum total
+    row_number rank dense_rank percent_rank cume_dist ntile lag lead
+    first_value last_value nth_value
+    acos acosh asin asinh atan atan2 atanh ceil ceiling cos cosh degrees exp
+    floor ln log log10 log2 mod pi pow power radians sin sinh sqrt tan tanh trunc
+    json json_array json_array_length json_extract json_object json_type
+    json_valid json_quote json_group_array json_group_object
+'''.split())
+
+_ALWAYS_ALLOWED_ACTIONS = frozenset([sqlite3.SQLITE_SELECT, sqlite3.SQLITE_RECURSIVE])
+
+# Actions permitted when a policy allows writes (per-session scratch databases)
+_WRITE_ACTIONS = frozenset(
+    getattr(sqlite3, 'SQLITE_' + name)
+    for name in (
+        'ALTER_TABLE', 'ANALYZE', 'CREATE_INDEX', 'CREATE_TABLE', 'CREATE_TEMP_INDEX',
+        'CREATE_TEMP_TABLE', 'CREATE_TEMP_TRIGGER', 'CREATE_TEMP_VIEW', 'CREATE_TRIGGER',
+        'CREATE_VIEW', 'DELETE', 'DROP_INDEX', 'DROP_TABLE', 'DROP_TEMP_INDEX',
+        'DROP_TEMP_TABLE', 'DROP_TEMP_TRIGGER', 'DROP_TEMP_VIEW', 'DROP_TRIGGER',
+        'DROP_VIEW', 'INSERT', 'REINDEX', 'SAVEPOINT', 'TRANSACTION', 'UPDATE'
+    )
+)
+
+# Functions SQLite itself calls to rewrite the schema for ALTER TABLE RENAME
+# TO, RENAME COLUMN and DROP COLUMN; they are allowed along with the writes
+_SCHEMA_REWRITE_FUNCTIONS = frozenset([
+    'sqlite_rename_table', 'sqlite_rename_column', 'sqlite_rename_test',
+    'sqlite_rename_quotefix', 'sqlite_drop_column'
+])
+
+# Readable names for the actions reported in denial messages
+_ACTION_NAMES = {
+    getattr(sqlite3, 'SQLITE_' + name): name.replace('_', ' ')
+    for name in (
+        'ALTER_TABLE', 'ANALYZE', 'ATTACH', 'CREATE_INDEX', 'CREATE_TABLE',
+        'CREATE_TEMP_INDEX', 'CREATE_TEMP_TABLE', 'CREATE_TEMP_TRIGGER',
+        'CREATE_TEMP_VIEW', 'CREATE_TRIGGER', 'CREATE_VIEW', 'CREATE_VTABLE',
+        'DELETE', 'DETACH', 'DROP_INDEX', 'DROP_TABLE', 'DROP_TEMP_INDEX',
+        'DROP_TEMP_TABLE', 'DROP_TEMP_TRIGGER', 'DROP_TEMP_VIEW', 'DROP_TRIGGER',
+        'DROP_VIEW', 'DROP_VTABLE', 'INSERT', 'PRAGMA', 'REINDEX', 'SAVEPOINT',
+        'TRANSACTION', 'UPDATE'
+    )
+}
+
+
+class AccessDenied(ValueError):
+    """Raised when the authorizer rejected part of a query"""
+
+
+class AccessPolicy:
+    """Tables and functions that student queries are allowed to read
+
+    tables=None allows every table in the connected database. allow_writes
+    additionally permits DML/DDL (but never ATTACH, pragmas or virtual tables).
+    """
+
+    def __init__(self, tables, functions=DEFAULT_ALLOWED_FUNCTIONS, allow_writes=False):
+        self.tables = None if tables is None else frozenset(table.lower() for table in tables)
+        self.functions = frozenset(function.lower() for function in functions)
+        self.allow_writes = allow_writes
+
+    @classmethod
+    def from_connection(cls, conn, functions=DEFAULT_ALLOWED_FUNCTIONS):
+        """Whitelist every user table in the connected database"""
+        cursor = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') "
+            "AND name NOT LIKE 'sqlite_%'"
+        )
+        return cls([row[0] for row in cursor.fetchall()], functions)
+
+
+class AccessProfile:
+    """Tables, columns and functions a single query was compiled to read"""
+
+    def __init__(self):
+        self.tables = {}
+        self.functions = set()
+        self.denied = []
+
+    def record_read(self, table, column):
+        columns = self.tables.setdefault(table, set())
+        if column:
+            columns.add(column)
+
+    def to_dict(self):
+        return {
+            'tables': {table: sorted(columns) for table, columns in sorted(self.tables.items())},
+            'functions': sorted(self.functions)
+        }
+
+
+def install_authorizer(conn, policy, profile=None):
+    """Restrict conn to reads allowed by policy, recording access into profile"""
+    if profile is None:
+        profile = AccessProfile()
+
+    def authorizer(action, arg1, arg2, db_name, trigger_or_view):
+        if action in _ALWAYS_ALLOWED_ACTIONS:
+            return sqlite3.SQLITE_OK
+
+        if action == sqlite3.SQLITE_READ:
+            if db_name is None:
+                return sqlite3.SQLITE_OK  # CTE or subquery, not a stored table
+            if policy.tables is None:
+                if db_name not in ('main', 'temp'):
+                    profile.denied.append(f'database "{db_name}" is not available')
+                    return sqlite3.SQLITE_DENY
+            elif db_name != 'main' or arg1.lower() not in policy.tables:
+                profile.denied.append(f'table "{arg1}" is not available')
+                return sqlite3.SQLITE_DENY
+            profile.record_read(arg1, arg2)
+            return sqlite3.SQLITE_OK
+
+        if action == sqlite3.SQLITE_FUNCTION:
+            if policy.allow_writes and arg2.lower() in _SCHEMA_REWRITE_FUNCTIONS:
+                return sqlite3.SQLITE_OK
+            if arg2.lower() not in policy.functions:
+                profile.denied.append(f'function {arg2}() is not allowed')
+                return sqlite3.SQLITE_DENY
+            profile.functions.add(arg2.lower())
+            return sqlite3.SQLITE_OK
+
+        if policy.allow_writes and action in _WRITE_ACTIONS:
+            return sqlite3.SQLITE_OK
+
+        action_name = _ACTION_NAMES.get(action, f'action {action}')
+        profile.denied.append(f'{action_name} is not allowed')
+        return sqlite3.SQLITE_DENY
+
+    conn.set_authorizer(authorizer)
+    return profile
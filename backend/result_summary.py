@@ -0,0 +1,93 @@
+"""
+Compact descriptions of query results for AI prompts.
+
+Small results are sent as-is. Larger ones are replaced by the column list,
+the row count, per-column statistics (min, max, nulls, distinct values) and
+the first and last rows, with the number of sample rows shrunk until the
+summary fits a token budget. The sample is always the head and tail of the
+result, so the same result always produces the same prompt.
+"""
+import json
+
+# Rough size of a token in characters of JSON; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Longest value shown in a sample row or as a min/max
+MAX_VALUE_CHARS = 80
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _clip(value):
+    if isinstance(value, str) and len(value) > MAX_VALUE_CHARS:
+        return value[:MAX_VALUE_CHARS] + '...'
+    if isinstance(value, bytes):
+        return f'<{len(value)} bytes>'
+    return value
+
+
+def _column_stats(rows, column):
+    values = [row.get(column) for row in rows]
+    present = [value for value in values if value is not None]
+    stats = {'nulls': len(values) - len(present)}
+    try:
+        stats['distinct'] = len(set(present))
+    except TypeError:
+        pass  # Unhashable values are not expected from SQLite, but don't fail on them
+    try:
+        if present:
+            stats['min'] = _clip(min(present))
+            stats['max'] = _clip(max(present))
+    except TypeError:
+        pass  # Mixed types (SQLite allows them) have no ordering
+    return stats
+
+
+def _dumps(value):
+    return json.dumps(value, default=str, separators=(',', ':'))
+
+
+def _dump_within(rows, token_budget):
+    """json.dumps(rows, indent=2), or None as soon as it is clear it won't fit token_budget"""
+    parts = []
+    size = 2  # "[\n" and "\n]", less the separator not written after the last row
+    for row in rows:
+        # Nested in the list, every line of the row is indented two more spaces
+        text = '  ' + json.dumps(row, indent=2, default=str).replace('\n', '\n  ')
+        size += len(text) + 2
+        if size // CHARS_PER_TOKEN + 1 > token_budget:
+            return None
+        parts.append(text)
+    return '[\n' + ',\n'.join(parts) + '\n]'
+
+
+def summarize_result(rows, token_budget=1500):
+    """Text describing rows that fits in roughly token_budget tokens"""
+    if not rows:
+        return "Query returned no rows"
+
+    # Large results are summarized without serializing them in full first
+    full = _dump_within(rows, token_budget)
+    if full is not None:
+        return full
+
+    columns = list(rows[0].keys())
+    header = {
+        'row_count': len(rows),
+        'columns': columns,
+        'column_stats': {column: _column_stats(rows, column) for column in columns}
+    }
+
+    # Largest head/tail sample that still fits (rows as value lists to save tokens)
+    sample_size = min(len(rows) // 2, 10)
+    while True:
+        head = [[_clip(value) for value in row.values()] for row in rows[:sample_size]]
+        tail = [[_clip(value) for value in row.values()] for row in rows[-sample_size:]] if sample_size else []
+        summary = dict(header, first_rows=head, last_rows=tail)
+        text = ("Result too large to include in full; summary (sample rows are value lists "
+                f"in column order):\n{_dumps(summary)}")
+        if estimate_tokens(text) <= token_budget or sample_size == 0:
+            return text
+        sample_size //= 2
@@ -2,20 +2,31 @@ import sqlite3
 import os
 from datetime import datetime, timedelta
 import random
+from db_versions import DatabaseVersions
 
 class SampleDataGenerator:
     """Generates realistic sample data for SQL practice"""
 
-    def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), '../database/practice.db')
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+    def __init__(self, scale=1):
+        self.versions = DatabaseVersions(os.path.join(os.path.dirname(__file__), '../database'))
+        self.db_path = self.versions.current().path
+        # Multiplies the number of customers, orders and sales (benchmarks use larger scales)
+        self.scale = scale
 
     def initialize_database(self):
-        """Create and populate the practice database"""
-        if os.path.exists(self.db_path):
-            return  # Database already exists
+        """Create and populate the practice database unless it exists (safe to call from several processes)"""
+        if self.versions.ensure(self.build_database):
+            self.db_path = self.versions.current().path
 
-        conn = sqlite3.connect(self.db_path)
+    def rebuild_database(self):
+        """Build a fresh practice database off to the side and switch to it atomically"""
+        version = self.versions.build(self.build_database)
+        self.db_path = version.path
+        return version
+
+    def build_database(self, db_path):
+        """Create and populate a practice database at db_path"""
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
 
         # Create tables
@@ -142,7 +153,7 @@ class SampleDataGenerator:
         
         customers = []
         base_date = datetime(2023, 1, 1)
-        for i in range(100):  # Generate 100 customers
+        for i in range(100 * self.scale):  # 100 customers per unit of scale
             first_name = random.choice(first_names)
             last_name = random.choice(last_names)
             email = f'{first_name.lower()}.{last_name.lower()}{i}@email.com'
@@ -202,8 +213,8 @@ class SampleDataGenerator:
         order_id = 1
         order_item_id = 1
 
-        for i in range(200):  # Create 200 orders
-            customer_id = random.randint(1, 100)  # Match number of customers
+        for i in range(200 * self.scale):  # 200 orders per unit of scale
+            customer_id = random.randint(1, 100 * self.scale)  # Match number of customers
             order_date = base_date + timedelta(days=random.randint(0, 300))
             ship_date = order_date + timedelta(days=random.randint(1, 7))
             status = random.choice(['Completed', 'Completed', 'Completed', 'Shipped', 'Processing'])
@@ -286,7 +297,7 @@ class SampleDataGenerator:
             pos = 'Director' if dept in ['Sales', 'Marketing', 'IT', 'HR', 'Finance', 'Operations'] else 'Manager'
             first_name = random.choice(first_names[:20])
             last_name = random.choice(last_names[:20])
-            email = f'{first_name.lower()}.{last_name.lower()}@company.com'
+            email = f'{first_name.lower()}.{last_name.lower()}{employee_id}@company.com'
             salary_range = salary_ranges.get(pos, (70000, 95000))
             salary = round(random.uniform(salary_range[0], salary_range[1]), 2)
             hire_date = datetime(2019, 1, 1) + timedelta(days=random.randint(0, 365))
@@ -321,7 +332,7 @@ class SampleDataGenerator:
         cursor.execute("SELECT employee_id FROM employees WHERE department = 'Sales'")
         sales_employee_ids = [row[0] for row in cursor.fetchall()]
         
-        for i in range(500):  # 500 sales records
+        for i in range(500 * self.scale):  # 500 sales records per unit of scale
             employee_id = random.choice(sales_employee_ids) if sales_employee_ids else random.randint(1, 3)
             sale_date = sales_base + timedelta(days=random.randint(0, 300))
             amount = round(random.uniform(100, 5000), 2)
@@ -333,3 +344,86 @@ class SampleDataGenerator:
             INSERT INTO sales (sale_id, employee_id, sale_date, amount, region)
             VALUES (?, ?, ?, ?, ?)
         ''', sales_data)
+
+
+class TimeSeriesDataGenerator:
+    """Generates weather-station and web-traffic time series for SQL practice"""
+
+    def build_database(self, db_path):
+        """Create and populate a time-series practice database at db_path"""
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE stations (
+                station_id INTEGER PRIMARY KEY,
+                station_name TEXT NOT NULL,
+                city TEXT NOT NULL,
+                elevation_m INTEGER NOT NULL
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE readings (
+                reading_id INTEGER PRIMARY KEY,
+                station_id INTEGER NOT NULL,
+                recorded_at TIMESTAMP NOT NULL,
+                temperature_c DECIMAL(5,2) NOT NULL,
+                humidity_pct DECIMAL(5,2) NOT NULL,
+                rainfall_mm DECIMAL(6,2) DEFAULT 0,
+                FOREIGN KEY (station_id) REFERENCES stations(station_id)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE page_views (
+                view_date DATE NOT NULL,
+                page TEXT NOT NULL,
+                views INTEGER NOT NULL,
+                unique_visitors INTEGER NOT NULL,
+                PRIMARY KEY (view_date, page)
+            )
+        ''')
+
+        stations = [
+            (1, 'Harbor Point', 'Seattle', 12),
+            (2, 'Mesa Ridge', 'Phoenix', 340),
+            (3, 'Lakeshore', 'Chicago', 180),
+            (4, 'Summit Peak', 'Denver', 1610),
+            (5, 'Bayfront', 'Miami', 2)
+        ]
+        cursor.executemany('INSERT INTO stations VALUES (?, ?, ?, ?)', stations)
+
+        # Four readings a day for 90 days, with a seasonal drift and daily cycle
+        base_temps = {1: 11, 2: 27, 3: 9, 4: 6, 5: 25}
+        readings = []
+        reading_id = 1
+        start = datetime(2024, 1, 1)
+        for station_id, _, _, _ in stations:
+            for day in range(90):
+                for hour in (0, 6, 12, 18):
+                    recorded_at = start + timedelta(days=day, hours=hour)
+                    daily_swing = {0: -3, 6: -1, 12: 4, 18: 1}[hour]
+                    temperature = base_temps[station_id] + day * 0.08 + daily_swing + random.uniform(-2, 2)
+                    humidity = min(100, max(10, random.gauss(60, 15)))
+                    rainfall = round(random.expovariate(1 / 4), 2) if random.random() < 0.2 else 0
+                    readings.append((reading_id, station_id, recorded_at.strftime('%Y-%m-%d %H:%M:%S'),
+                                     round(temperature, 2), round(humidity, 2), rainfall))
+                    reading_id += 1
+        cursor.executemany('INSERT INTO readings VALUES (?, ?, ?, ?, ?, ?)', readings)
+
+        # Daily page views with a weekly pattern and occasional spikes
+        pages = {'/home': 1200, '/pricing': 300, '/blog': 450, '/docs': 600, '/signup': 150}
+        page_views = []
+        for day in range(180):
+            view_date = (start + timedelta(days=day)).strftime('%Y-%m-%d')
+            weekend = (start + timedelta(days=day)).weekday() >= 5
+            for page, base in pages.items():
+                views = int(base * (0.6 if weekend else 1.0) * random.uniform(0.8, 1.2))
+                if random.random() < 0.03:
+                    views *= 3  # Traffic spike
+                page_views.append((view_date, page, views, int(views * random.uniform(0.55, 0.8))))
+        cursor.executemany('INSERT INTO page_views VALUES (?, ?, ?, ?)', page_views)
+
+        conn.commit()
+        conn.close()
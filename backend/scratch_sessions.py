@@ -0,0 +1,209 @@
+"""
+Per-session scratch databases where students can practice DML and DDL.
+
+Each session gets a private in-memory copy of the practice database, created
+by deserializing a cached serialized image of practice.db (no file copies).
+Live sandboxes are kept in an LRU bounded by count and total memory, and
+sandboxes idle for longer than idle_timeout are evicted.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from query_plan import count_vm_steps
+from query_sandbox import AccessDenied, AccessPolicy, AccessProfile, install_authorizer
+
+# A sandbox may grow to this many times the size of the practice database
+GROWTH_FACTOR = 4
+
+
+class ScratchDatabase:
+    """One session's private, writable copy of the practice database"""
+
+    def __init__(self, conn, page_size):
+        self.conn = conn
+        self.page_size = page_size
+        self.lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.size_bytes = 0
+        self.retired = False
+        self.update_size()
+
+    def update_size(self):
+        """Recompute memory use (drops the authorizer so the pragma can run)"""
+        self.conn.set_authorizer(None)
+        page_count = self.conn.execute('PRAGMA page_count').fetchone()[0]
+        self.size_bytes = page_count * self.page_size
+        return self.size_bytes
+
+    def retire(self):
+        """Close now if idle, otherwise once the running statement finishes"""
+        self.retired = True
+        if self.lock.acquire(blocking=False):
+            try:
+                self.conn.close()
+            finally:
+                self.lock.release()
+
+
+class ScratchDatabaseManager:
+    """Create, reuse and evict per-session scratch databases"""
+
+    def __init__(self, versions, max_sessions=500, idle_timeout=900,
+                 max_total_bytes=512 * 1024 * 1024, max_vm_steps=50_000_000):
+        self.versions = versions
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_total_bytes = max_total_bytes
+        self.max_vm_steps = max_vm_steps
+        self.policy = AccessPolicy(tables=None, allow_writes=True)
+
+        self._sandboxes = OrderedDict()  # session id -> ScratchDatabase, oldest first
+        self._lock = threading.Lock()
+        self._image = None
+        self._image_version = None
+        self._page_size = None
+        self.total_bytes = 0
+        self.created = 0
+        self.evicted = 0
+
+    def _load_image(self):
+        """Serialize practice.db once per version; every sandbox starts from these bytes"""
+        version = self.versions.current()
+        if self._image_version != version.id:
+            source = sqlite3.connect(f'file:{os.path.abspath(version.path)}?mode=ro', uri=True)
+            memory = sqlite3.connect(':memory:')
+            source.backup(memory)
+            source.close()
+            self._page_size = memory.execute('PRAGMA page_size').fetchone()[0]
+            self._image = memory.serialize()
+            self._image_version = version.id
+            memory.close()
+        return self._image
+
+    def _create(self):
+        image = self._load_image()
+        conn = sqlite3.connect(':memory:', isolation_level=None, check_same_thread=False, cached_statements=0)
+        conn.deserialize(image)
+        max_pages = len(image) // self._page_size * GROWTH_FACTOR
+        conn.execute(f'PRAGMA max_page_count = {max_pages}')
+        return ScratchDatabase(conn, self._page_size)
+
+    def _drop(self, session_id):
+        """Remove a sandbox (caller holds self._lock)"""
+        sandbox = self._sandboxes.pop(session_id)
+        self.total_bytes -= sandbox.size_bytes
+        sandbox.retire()
+
+    def _evict(self, now):
+        """Drop idle sandboxes, then least recently used ones over the limits"""
+        for session_id, sandbox in list(self._sandboxes.items()):
+            if now - sandbox.last_used < self.idle_timeout:
+                break
+            self._drop(session_id)
+            self.evicted += 1
+        while self._sandboxes and (
+            len(self._sandboxes) > self.max_sessions or self.total_bytes > self.max_total_bytes
+        ):
+            self._drop(next(iter(self._sandboxes)))
+            self.evicted += 1
+
+    def get(self, session_id):
+        """Return the session's sandbox, creating it on first use"""
+        now = time.monotonic()
+        with self._lock:
+            sandbox = self._sandboxes.get(session_id)
+            if sandbox is not None:
+                self._sandboxes.move_to_end(session_id)
+                sandbox.last_used = now
+                return sandbox
+
+        sandbox = self._create()
+        with self._lock:
+            existing = self._sandboxes.get(session_id)
+            if existing is not None:
+                # Another request of this session created one meanwhile; keep theirs
+                sandbox.retire()
+                self._sandboxes.move_to_end(session_id)
+                existing.last_used = now
+                return existing
+            self._sandboxes[session_id] = sandbox
+            self.total_bytes += sandbox.size_bytes
+            self.created += 1
+            self._evict(now)
+        return sandbox
+
+    def execute(self, session_id, query):
+        """Run any single statement in the session's sandbox
+
+        Returns {'rows': [...]} for statements that produce rows, otherwise
+        {'rows_affected': n}.
+        """
+        profile = AccessProfile()
+        sandbox = self.get(session_id)
+        sandbox.lock.acquire()
+        while sandbox.retired:
+            # Evicted between lookup and locking; start from a fresh copy
+            sandbox.lock.release()
+            sandbox = self.get(session_id)
+            sandbox.lock.acquire()
+
+        try:
+            install_authorizer(sandbox.conn, self.policy, profile)
+            sandbox.conn.row_factory = sqlite3.Row
+            count_vm_steps(sandbox.conn, self.max_vm_steps)
+            cursor = sandbox.conn.cursor()
+            try:
+                cursor.execute(query)
+                if cursor.description is not None:
+                    result = {'rows': [dict(row) for row in cursor.fetchall()]}
+                else:
+                    result = {'rows_affected': cursor.rowcount}
+            except sqlite3.Error as e:
+                if profile.denied:
+                    raise AccessDenied(f"Access denied: {profile.denied[0]}")
+                if getattr(e, 'sqlite_errorname', None) == 'SQLITE_INTERRUPT':
+                    raise ValueError(f"Query exceeded the limit of {self.max_vm_steps:,} VM steps")
+                if getattr(e, 'sqlite_errorname', None) == 'SQLITE_FULL':
+                    raise ValueError("Sandbox database is full, reset it to start over")
+                raise Exception(f"SQL Error: {str(e)}")
+            finally:
+                cursor.close()
+        finally:
+            old_size = sandbox.size_bytes
+            if sandbox.retired:
+                sandbox.conn.close()
+                new_size = old_size
+            else:
+                new_size = sandbox.update_size()
+            sandbox.lock.release()
+
+            with self._lock:
+                if self._sandboxes.get(session_id) is sandbox:
+                    self.total_bytes += new_size - old_size
+
+        return result
+
+    def reset(self, session_id):
+        """Discard the session's sandbox so the next query starts fresh"""
+        with self._lock:
+            if session_id in self._sandboxes:
+                self._drop(session_id)
+                return True
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'live_sandboxes': len(self._sandboxes),
+                'total_bytes': self.total_bytes,
+                'image_bytes': len(self._image) if self._image else 0,
+                'image_version': self._image_version,
+                'created': self.created,
+                'evicted': self.evicted,
+                'max_sessions': self.max_sessions,
+                'max_total_bytes': self.max_total_bytes
+            }
@@ -0,0 +1,204 @@
+"""
+Backend services, created lazily and once per process.
+
+Nothing is built at import time. The AI client, dataset registry, progress
+database, scratch sandboxes and problem pool are each constructed on first
+use, so importing the app is cheap and a pre-fork server (gunicorn) can load
+it in the master without opening anything. After a fork the child drops
+whatever it inherited and builds its own services: threads, worker
+processes and sqlite handles are never shared between processes.
+
+initialize() does the one-time on-disk setup (building the default practice
+database and the progress tables). It is idempotent and process-safe, so it
+can run in the master before workers start or in every worker at once.
+"""
+import os
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process, so it always prewarms
+    fcntl = None
+
+from ai_scheduler import BACKGROUND
+from ai_service import AIService
+from datasets import DEFAULT_DATASET, create_default_registry
+from flashcards import load_deck
+from models import ProgressTracker
+from problem_pool import ProblemPool
+from problem_validation import ProblemValidator
+from scratch_sessions import ScratchDatabaseManager
+
+
+class Services:
+    """Lazily constructed per-process services"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._instances = {}
+        self._inherited = []  # Instances from a parent process, kept alive but never used or closed
+        self.pid = os.getpid()
+        self.started_at = time.monotonic()
+        self._warm_thread = None
+        self._prewarm_lock = None  # Held while this process is the one that prewarms the problem pool
+        self.warm_seconds = None  # Set once warm() has finished in this process
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _get(self, name, factory):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    start = time.perf_counter()
+                    instance = factory()
+                    self._instances[name] = instance
+                    print(f"[Services] Started {name} in process {self.pid} "
+                          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return instance
+
+    def _after_fork(self):
+        """In a forked child: forget the parent's services so they are rebuilt here"""
+        self._lock = threading.RLock()
+        if self._instances:
+            self._inherited.append(self._instances)
+        self._instances = {}
+        self.pid = os.getpid()
+        self.started_at = time.monotonic()
+        self._warm_thread = None
+        if self._prewarm_lock is not None:
+            # The parent keeps its claim; this process has a pool of its own
+            self._prewarm_lock.close()
+            self._prewarm_lock = None
+        self.warm_seconds = None
+
+    @property
+    def ai_service(self):
+        return self._get('ai_service', lambda: AIService(os.getenv('ANTHROPIC_API_KEY')))
+
+    @property
+    def datasets(self):
+        # Datasets are built on first use; at most DATASET_MAX_OPEN are kept open
+        return self._get('datasets', lambda: create_default_registry(
+            max_open=int(os.getenv('DATASET_MAX_OPEN', 3))
+        ))
+
+    @property
+    def progress_tracker(self):
+        return self._get('progress_tracker', ProgressTracker)
+
+    @property
+    def scratch_databases(self):
+        def build():
+            # Scratch sandboxes copy the default dataset, so make sure it is built
+            return ScratchDatabaseManager(
+                self.datasets.checker(DEFAULT_DATASET).versions,
+                max_sessions=int(os.getenv('SANDBOX_MAX_SESSIONS', 500)),
+                idle_timeout=int(os.getenv('SANDBOX_IDLE_TIMEOUT', 900))
+            )
+        return self._get('scratch_databases', build)
+
+    @property
+    def problem_pool(self):
+        return self._get('problem_pool', self._start_problem_pool)
+
+    def _generate_problem(self, dataset, difficulty, topic, background=False):
+        """Ask the AI for a problem about one dataset (background calls yield to interactive ones)"""
+        problem = self.ai_service.generate_problem(
+            difficulty, topic,
+            schema_description=self.datasets.schema_description(dataset),
+            priority=BACKGROUND if background else None
+        )
+        problem['dataset'] = dataset
+        return problem
+
+    def _start_problem_pool(self):
+        # Generated problems are served from a pool that is refilled in the background
+        # Pooled problems have had their solution run and expected result fingerprinted
+        validator = ProblemValidator(
+            self.datasets, max_vm_steps=int(os.getenv('PROBLEM_VALIDATION_VM_STEPS', 5_000_000))
+        )
+        pool = ProblemPool(
+            self._generate_problem,
+            validate=validator,
+            is_current=validator.is_current,
+            low_watermark=int(os.getenv('PROBLEM_POOL_LOW', 1)),
+            high_watermark=int(os.getenv('PROBLEM_POOL_HIGH', 3))
+        )
+        if pool.high_watermark > 0:
+            pool.start()
+            if os.getenv('PROBLEM_POOL_PREWARM') == '1' and self._claim_prewarm():
+                pool.prewarm((DEFAULT_DATASET, difficulty, None)
+                             for difficulty in ('basic', 'intermediate', 'advanced', 'expert'))
+        return pool
+
+    def _claim_prewarm(self):
+        """Whether this process should prewarm the problem pool
+
+        Every gunicorn worker has its own pool, so only the process holding an
+        exclusive lock next to the practice database prewarms. The lock goes
+        when that process exits, so a replacement worker can take over.
+        """
+        if fcntl is None:
+            return True
+        directory = self.datasets.checker(DEFAULT_DATASET).versions.directory
+        lock_file = open(os.path.join(directory, 'problem-pool-prewarm.lock'), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._prewarm_lock = lock_file
+        return True
+
+    def initialize(self):
+        """One-time on-disk setup: build the default practice database and the progress tables"""
+        start = time.perf_counter()
+        self.datasets.checker(DEFAULT_DATASET)
+        self.progress_tracker
+        print(f"[Services] Storage initialized in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def warm(self):
+        """Open this process's pools now (memory image, query workers, problem pool) instead of on first request"""
+        start = time.perf_counter()
+        self.datasets.checker(DEFAULT_DATASET).warm()
+        self.progress_tracker
+        self.scratch_databases
+        self.problem_pool
+        load_deck()
+        self.warm_seconds = time.perf_counter() - start
+        print(f"[Services] Process {self.pid} warmed up in {self.warm_seconds * 1000:.0f} ms")
+
+    def warm_in_background(self):
+        """Start warm() in a thread unless this process is warm or already warming"""
+        with self._lock:
+            if self.warm_seconds is None and self._warm_thread is None:
+                self._warm_thread = threading.Thread(target=self.warm, name='warm-up', daemon=True)
+                self._warm_thread.start()
+
+    def readiness(self):
+        """Whether this process is warm, and what it has loaded so far"""
+        return {
+            'ready': self.warm_seconds is not None,
+            'pid': self.pid,
+            'uptime_seconds': round(time.monotonic() - self.started_at, 3),
+            'warm_ms': round(self.warm_seconds * 1000, 1) if self.warm_seconds is not None else None,
+            'services': sorted(self._instances),
+            'ai_sdk_loaded': 'anthropic' in sys.modules
+        }
+
+    def close(self):
+        """Stop background work and release this process's pools"""
+        with self._lock:
+            instances, self._instances = self._instances, {}
+        if 'problem_pool' in instances:
+            instances['problem_pool'].stop()
+        if 'datasets' in instances:
+            instances['datasets'].close()
+
+
+# One set per process, shared by all requests
+services = Services()
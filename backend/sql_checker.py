@@ -1,51 +1,254 @@
+import functools
 import sqlite3
 import os
-import re
+import threading
+import time
+from contextlib import contextmanager
+from sql_normalizer import fingerprint_query, tokenize
+from query_sandbox import AccessDenied, AccessPolicy, AccessProfile, install_authorizer
+from query_plan import build_plan_tree, count_vm_steps, summarize_plan
+from query_profiler import QueryProfiler
+from query_executor import IsolatedQueryExecutor
+from db_versions import DatabaseVersions
+
+def _in_use(method):
+    """Count a call as a user of the checker's pools, so close() waits for it"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._users_lock:
+            self._users += 1
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            with self._users_lock:
+                self._users -= 1
+                if self._closed and self._users == 0:
+                    self._release()
+    return wrapper
 
 class SQLChecker:
     """Validates and executes SQL queries safely"""
 
-    def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), '../database/practice.db')
+    def __init__(self, dataset='practice'):
+        # practice.db is versioned so it can be rebuilt while the server runs
+        self.dataset = dataset
+        self.versions = DatabaseVersions(os.path.join(os.path.dirname(__file__), '../database'), name=dataset)
 
         # Dangerous keywords that should not be allowed
-        self.dangerous_keywords = [
+        self.dangerous_keywords = frozenset([
             'DROP', 'DELETE', 'INSERT', 'UPDATE', 'ALTER',
-            'CREATE', 'TRUNCATE', 'REPLACE', 'PRAGMA'
-        ]
+            'CREATE', 'TRUNCATE', 'REPLACE', 'PRAGMA',
+            'ATTACH', 'DETACH', 'VACUUM', 'REINDEX', 'ANALYZE',
+            'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE'
+        ])
+
+        # Tables/functions student queries may read (loaded on first query)
+        self.access_policy = None
+        self._access_policy_version = None
+
+        # Upper bound on VM instructions when measuring a query's cost
+        self.max_vm_steps = 50_000_000
+
+        # Opt-in per-query timing (set SQL_PROFILING=1 to enable)
+        self.profiler = QueryProfiler(enabled=os.getenv('SQL_PROFILING') == '1')
+
+        # 'inline' runs queries in the calling thread, 'process' in a worker pool
+        self.executor_mode = os.getenv('SQL_EXECUTOR', 'inline')
+        self.executor = None
+        self._executor_lock = threading.Lock()
+
+        # 'disk' reads practice.db from the file, 'memory' from a shared in-memory copy
+        self.db_mode = os.getenv('SQL_DB_MODE', 'disk')
+        self._memory_anchor = None
+        self._memory_version = None
+        self._memory_lock = threading.Lock()
+
+        # Calls in progress; a closed checker releases its pools when the last one returns
+        self._users = 0
+        self._closed = False
+        self._users_lock = threading.Lock()
+
+    @property
+    def db_path(self):
+        """Path of the practice database version new queries will use"""
+        return self.versions.current().path
+
+    @property
+    def db_version(self):
+        """Content hash of the current practice database (use it in cache keys)"""
+        return self.versions.current().id
 
     def is_safe_query(self, query):
-        """Check if query is safe to execute (read-only)"""
-        query_upper = query.upper().strip()
-
-        # Check for dangerous keywords
-        for keyword in self.dangerous_keywords:
-            if re.search(r'\b' + keyword + r'\b', query_upper):
-                return False, f"Query contains forbidden keyword: {keyword}"
-
-        # Must start with SELECT or WITH (for CTEs)
-        if not (query_upper.startswith('SELECT') or query_upper.startswith('WITH')):
+        """Check if query is safe to execute (read-only)
+
+        Classifies the query in a single pass over its tokens, so keywords
+        inside string literals, quoted identifiers and comments are ignored.
+        """
+        statements = 0
+        expect_statement = True
+        pending_replace = False
+
+        for kind, value in tokenize(query):
+            # REPLACE(str, from, to) is a read-only string function
+            if pending_replace and value != '(':
+                return False, "Query contains forbidden keyword: REPLACE"
+            pending_replace = False
+
+            if kind == 'punct' and value == ';':
+                expect_statement = True
+                continue
+
+            keyword = value.upper() if kind == 'word' else None
+            if keyword in self.dangerous_keywords:
+                if keyword != 'REPLACE' or expect_statement:
+                    return False, f"Query contains forbidden keyword: {keyword}"
+                pending_replace = True
+
+            if expect_statement:
+                statements += 1
+                if statements > 1:
+                    return False, "Only one statement can be executed at a time"
+                # Must start with SELECT or WITH (for CTEs)
+                if keyword not in ('SELECT', 'WITH'):
+                    return False, "Only SELECT queries and CTEs are allowed"
+                expect_statement = False
+
+        if pending_replace:
+            return False, "Query contains forbidden keyword: REPLACE"
+
+        if statements == 0:
             return False, "Only SELECT queries and CTEs are allowed"
 
         return True, "Query is safe"
 
-    def execute_query(self, query, params=None):
-        """Execute a SQL query and return results"""
-
-        # Validate query safety
-        is_safe, message = self.is_safe_query(query)
-        if not is_safe:
-            raise ValueError(message)
+    def _connect_readonly(self, version=None):
+        """Open a read-only connection to the practice database"""
+        if version is None:
+            version = self.versions.current()
+
+        if self.db_mode == 'memory':
+            conn = sqlite3.connect(
+                self._load_memory_image(version),
+                uri=True,
+                cached_statements=0,
+                check_same_thread=False
+            )
+            conn.execute('PRAGMA query_only = ON')
+            return conn
+
+        # Statement caching is off so the authorizer sees every query
+        return sqlite3.connect(
+            f'file:{os.path.abspath(version.path)}?mode=ro',
+            uri=True,
+            cached_statements=0,
+            check_same_thread=False
+        )
+
+    @contextmanager
+    def _pinned_connection(self):
+        """Connection to the current version that is kept from being pruned until closed"""
+        with self.versions.pin() as version:
+            conn = self._connect_readonly(version)
+            try:
+                yield conn
+            finally:
+                conn.close()
 
-        conn = sqlite3.connect(self.db_path)
+    def _memory_uri(self, version):
+        return f'file:{self.dataset}-{version.id}-{os.getpid()}-{id(self)}?mode=memory&cache=shared'
+
+    def _load_memory_image(self, version):
+        """Copy a practice.db version into a shared in-memory database once per process
+
+        Returns the URI that connections use to attach to the shared image.
+        The anchor connection keeps the image alive until a newer version is
+        loaded; connections still open on the old image keep it alive until
+        they close, so switching versions never breaks in-flight queries.
+        """
+        if self._memory_version != version.id:
+            with self._memory_lock:
+                if self._memory_version != version.id:
+                    start = time.perf_counter()
+                    anchor = sqlite3.connect(self._memory_uri(version), uri=True, check_same_thread=False)
+                    source = sqlite3.connect(f'file:{os.path.abspath(version.path)}?mode=ro', uri=True)
+                    source.backup(anchor)
+                    source.close()
+                    if self._memory_anchor is not None:
+                        self._memory_anchor.close()
+                    self._memory_anchor = anchor
+                    self._memory_version = version.id
+                    print(f"[SQL Checker] Loaded {self.dataset} database {version.id} into memory "
+                          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return self._memory_uri(version)
+
+    @_in_use
+    def warm(self):
+        """Load the in-memory image and start the worker pool now rather than on the first query"""
+        if self.db_mode == 'memory':
+            self._load_memory_image(self.versions.current())
+        if self.executor_mode == 'process':
+            self._get_executor()
+
+    def close(self):
+        """Release the in-memory image and worker processes, once no call is using them
+
+        Requests may still hold a checker the dataset registry has evicted. Their
+        calls keep working; the pools they open are released when they return.
+        """
+        with self._users_lock:
+            self._closed = True
+            if self._users == 0:
+                self._release()
+
+    def _release(self):
+        """Close the in-memory image and worker pool (caller holds self._users_lock)"""
+        with self._memory_lock:
+            if self._memory_anchor is not None:
+                self._memory_anchor.close()
+                self._memory_anchor = None
+                self._memory_version = None
+        with self._executor_lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+    def _get_access_policy(self, conn):
+        """Whitelist the practice tables, reloading them when the database version changes"""
+        version_id = self.db_version
+        if self.access_policy is None or self._access_policy_version != version_id:
+            self.access_policy = AccessPolicy.from_connection(conn)
+            self._access_policy_version = version_id
+        return self.access_policy
+
+    def _get_executor(self):
+        """Start the worker process pool on first use"""
+        if self.executor is None:
+            with self._executor_lock:
+                if self.executor is None:
+                    self.executor = IsolatedQueryExecutor(
+                        self.dataset,
+                        workers=int(os.getenv('SQL_EXECUTOR_WORKERS', os.cpu_count() or 2)),
+                        timeout=float(os.getenv('SQL_QUERY_TIMEOUT', 5))
+                    )
+        return self.executor
+
+    def _run_sandboxed(self, conn, query, params, profile, timings=None, max_vm_steps=None):
+        """Run an already validated query on conn under the access policy"""
+        max_vm_steps = max_vm_steps or self.max_vm_steps
         conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        install_authorizer(conn, self._get_access_policy(conn), profile)
+        vm_steps = count_vm_steps(conn, max_vm_steps)
         cursor = conn.cursor()
 
         try:
+            if timings is not None:
+                timings['parsed'] = time.perf_counter()
             if params:
                 cursor.execute(query, params)
             else:
                 cursor.execute(query)
+            if timings is not None:
+                timings['executed'] = time.perf_counter()
 
             # Fetch results
             rows = cursor.fetchall()
@@ -55,17 +258,139 @@ class SQLChecker:
             for row in rows:
                 result.append(dict(row))
 
-            conn.close()
-            return result
+        except sqlite3.Error as e:
+            if profile.denied:
+                raise AccessDenied(f"Access denied: {profile.denied[0]}")
+            if getattr(e, 'sqlite_errorname', None) == 'SQLITE_INTERRUPT':
+                raise ValueError(f"Query exceeded the limit of {max_vm_steps:,} VM steps")
+            raise Exception(f"SQL Error: {str(e)}")
+        finally:
+            cursor.close()
+
+        if timings is not None:
+            timings['fetched'] = time.perf_counter()
+            timings['vm_steps'] = vm_steps[0]
+        return result
+
+    @_in_use
+    def execute_query(self, query, params=None, profile=None, max_vm_steps=None, timings=None):
+        """Execute a SQL query and return results
+
+        The query runs under an authorizer that only permits reads of the
+        practice tables. Pass an AccessProfile as profile to find out which
+        tables, columns and functions the query read, and max_vm_steps to run
+        it with a tighter budget than the default. A caller that encodes the
+        result itself can pass timings from start_profile() and record the
+        sample, serialization included, with record_profile().
+        """
+
+        record = timings is None
+        if record:
+            timings = self.start_profile()
+
+        # Validate query safety
+        is_safe, message = self.is_safe_query(query)
+        if not is_safe:
+            raise ValueError(message)
 
+        if profile is None:
+            profile = AccessProfile()
+
+        if self.executor_mode == 'process':
+            # Runs in a worker process that is killed if it overruns its deadline
+            result = self._get_executor().execute(query, params, profile, timings, max_vm_steps)
+        else:
+            with self._pinned_connection() as conn:
+                result = self._run_sandboxed(conn, query, params, profile, timings, max_vm_steps)
+
+        if record and timings is not None:
+            self.record_profile(query, result, timings)
+
+        return result
+
+    def start_profile(self):
+        """Timings dict for one profiled execute_query, or None while profiling is off"""
+        return {'start': time.perf_counter()} if self.profiler.enabled else None
+
+    def record_profile(self, query, result, timings, payload_bytes=None):
+        """Add one execute_query sample to the profiler
+
+        If the caller encoded the response, timings['serialized'] marks when
+        that finished and payload_bytes is the size of the encoded body.
+        """
+        start, parsed = timings['start'], timings['parsed']
+        executed, fetched = timings['executed'], timings['fetched']
+        end = timings.get('serialized', fetched)
+
+        # parse covers validation plus opening the sandboxed connection
+        sample = {
+            'query': query[:500],
+            'fingerprint': fingerprint_query(query, strip_literals=True),
+            'parse_ms': round((parsed - start) * 1000, 3),
+            'execute_ms': round((executed - parsed) * 1000, 3),
+            'fetch_ms': round((fetched - executed) * 1000, 3),
+            'total_ms': round((end - start) * 1000, 3),
+            'vm_steps': timings['vm_steps'],
+            'rows': len(result)
+        }
+        if 'serialized' in timings:
+            sample['serialize_ms'] = round((end - fetched) * 1000, 3)
+            sample['payload_bytes'] = payload_bytes
+        self.profiler.record(sample)
+
+    def _explain_sandboxed(self, conn, query, profile, timings, max_vm_steps=None):
+        """EXPLAIN QUERY PLAN of an already validated query, then one timed, sandboxed run of it on conn"""
+        install_authorizer(conn, self._get_access_policy(conn), profile)
+        try:
+            plan_rows = [tuple(row) for row in conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()]
         except sqlite3.Error as e:
-            conn.close()
+            if profile.denied:
+                raise AccessDenied(f"Access denied: {profile.denied[0]}")
             raise Exception(f"SQL Error: {str(e)}")
 
+        rows = self._run_sandboxed(conn, query, None, profile, timings, max_vm_steps)
+        return {
+            'plan': plan_rows,
+            'row_count': len(rows),
+            'execution_time_ms': round((timings['fetched'] - timings['parsed']) * 1000, 3)
+        }
+
+    @_in_use
+    def explain_query(self, query):
+        """Return the query plan and measured cost of running a query
+
+        The plan comes from EXPLAIN QUERY PLAN; the query is then executed
+        once to time it and count VM steps, a rough measure of rows scanned.
+        Like execute_query it runs in the worker pool in process mode, and on
+        a pinned version of the database otherwise.
+        """
+        is_safe, message = self.is_safe_query(query)
+        if not is_safe:
+            raise ValueError(message)
+
+        profile = AccessProfile()
+        timings = {}
+        if self.executor_mode == 'process':
+            result = self._get_executor().execute(query, None, profile, timings, explain=True)
+        else:
+            with self._pinned_connection() as conn:
+                result = self._explain_sandboxed(conn, query, profile, timings)
+
+        explanation = {
+            'plan': build_plan_tree(result['plan']),
+            'execution_time_ms': result['execution_time_ms'],
+            'vm_steps': timings['vm_steps'],
+            'row_count': result['row_count'],
+            'access': profile.to_dict()
+        }
+        explanation.update(summarize_plan(result['plan']))
+        return explanation
+
+    @_in_use
     def get_schema(self):
         """Get the schema information for all tables"""
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect_readonly()
         cursor = conn.cursor()
 
         # Get all tables
@@ -106,13 +431,14 @@ class SQLChecker:
         conn.close()
         return schema
 
+    @_in_use
     def get_sample_data(self, table, limit=5):
         """Get sample rows from a table"""
 
         if not table:
             return {'error': 'Table name is required'}
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect_readonly()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -141,10 +467,11 @@ class SQLChecker:
             conn.close()
             return {'error': str(e)}
 
+    @_in_use
     def get_table_row_count(self, table):
         """Get the total number of rows in a table"""
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect_readonly()
         cursor = conn.cursor()
 
         try:
@@ -0,0 +1,161 @@
+"""
+SQL tokenizer, normalizer and fingerprinting for student queries.
+
+Two queries that differ only in whitespace, comments, keyword/identifier case
+or literal spelling normalize to the same text and therefore share a
+fingerprint. The tokenizer is a single compiled regex scanned once over the
+query, so it is cheap enough to call on every request.
+"""
+import hashlib
+import re
+from collections import namedtuple
+
+Token = namedtuple('Token', ['kind', 'value'])
+
+# SQLite keyword list (https://www.sqlite.org/lang_keywords.html)
+SQL_KEYWORDS = frozenset('''
+    ABORT ACTION ADD AFTER ALL ALTER ALWAYS ANALYZE AND AS ASC ATTACH
+    AUTOINCREMENT BEFORE BEGIN BETWEEN BY CASCADE CASE CAST CHECK COLLATE
+    COLUMN COMMIT CONFLICT CONSTRAINT CREATE CROSS CURRENT CURRENT_DATE
+    CURRENT_TIME CURRENT_TIMESTAMP DATABASE DEFAULT DEFERRABLE DEFERRED DELETE
+    DESC DETACH DISTINCT DO DROP EACH ELSE END ESCAPE EXCEPT EXCLUDE EXCLUSIVE
+    EXISTS EXPLAIN FAIL FILTER FIRST FOLLOWING FOR FOREIGN FROM FULL GENERATED
+    GLOB GROUP GROUPS HAVING IF IGNORE IMMEDIATE IN INDEX INDEXED INITIALLY
+    INNER INSERT INSTEAD INTERSECT INTO IS ISNULL JOIN KEY LAST LEFT LIKE LIMIT
+    MATCH MATERIALIZED NATURAL NO NOT NOTHING NOTNULL NULL NULLS OF OFFSET ON
+    OR ORDER OTHERS OUTER OVER PARTITION PLAN PRAGMA PRECEDING PRIMARY QUERY
+    RAISE RANGE RECURSIVE REFERENCES REGEXP REINDEX RELEASE RENAME REPLACE
+    RESTRICT RETURNING RIGHT ROLLBACK ROW ROWS SAVEPOINT SELECT SET TABLE TEMP
+    TEMPORARY THEN TIES TO TRANSACTION TRIGGER TRUNCATE UNBOUNDED UNION UNIQUE
+    UPDATE USING VACUUM VALUES VIEW VIRTUAL WHEN WHERE WINDOW WITH WITHOUT
+'''.split())
+
+_TOKEN_RE = re.compile(r'''
+      (?P<ws>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<blob>[xX]'[0-9a-fA-F]*')
+    | (?P<string>'(?:[^']|'')*'?)
+    | (?P<ident>"(?:[^"]|"")*"?|`(?:[^`]|``)*`?|\[[^\]]*\]?)
+    | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    | (?P<param>\?\d*|[:@$][^\W\d]\w*)
+    | (?P<word>[^\W\d][\w$]*)
+    | (?P<op>\|\||->>|->|<<|>>|<=|>=|==|!=|<>|[-+*/%&|~<>=])
+    | (?P<punct>[(),;.])
+    | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+_SIMPLE_IDENT_RE = re.compile(r'[^\W\d]\w*\Z')
+_LITERAL_LIST_RE = re.compile(r'\(\?(?:, \?)+\)')
+
+# Tokens that glue to their neighbours instead of being space-separated
+_NO_SPACE_BEFORE = frozenset([',', ')', '.', ';'])
+_NO_SPACE_AFTER = frozenset(['(', '.'])
+
+
+def tokenize(query, skip_trivia=True):
+    """Split a query into tokens, dropping whitespace and comments by default"""
+    for match in _TOKEN_RE.finditer(query):
+        kind = match.lastgroup
+        if skip_trivia and (kind == 'ws' or kind == 'comment'):
+            continue
+        yield Token(kind, match.group())
+
+
+def _canonical_number(text):
+    """Spell a numeric literal one way (007 -> 7, 1.50 -> 1.5, 1e2 -> 100.0)"""
+    if text[:2] in ('0x', '0X'):
+        return text.lower()
+    if text.isdigit():
+        return str(int(text))
+    return repr(float(text))
+
+
+def _canonical_identifier(text):
+    """Unquote and lowercase an identifier (SQLite identifiers are case-insensitive)"""
+    if text[0] == '[':
+        name = text[1:-1] if text.endswith(']') else text[1:]
+    else:
+        quote = text[0]
+        name = text[1:-1] if len(text) > 1 and text.endswith(quote) else text[1:]
+        name = name.replace(quote * 2, quote)
+    name = name.lower()
+    if _SIMPLE_IDENT_RE.match(name) and name.upper() not in SQL_KEYWORDS:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def normalize_query(query, strip_literals=False):
+    """
+    Return a canonical single-line form of a query.
+
+    Comments and redundant whitespace are removed, keywords are uppercased,
+    identifiers are lowercased and numeric literals are spelled canonically.
+    With strip_literals=True every literal becomes '?' and literal lists
+    such as IN (1, 2, 3) collapse, so queries that differ only in constants
+    share a normal form.
+    """
+    parts = []
+    prev = prev_kind = None
+    for match in _TOKEN_RE.finditer(query):
+        kind = match.lastgroup
+        if kind == 'ws' or kind == 'comment':
+            continue
+        value = match.group()
+        if kind == 'word':
+            upper = value.upper()
+            if upper in SQL_KEYWORDS:
+                text = upper
+                kind = 'keyword'
+            else:
+                text = value.lower()
+        elif kind == 'ident':
+            text = _canonical_identifier(value)
+            kind = 'word'
+        elif kind == 'string':
+            text = '?' if strip_literals else value
+        elif kind == 'number':
+            text = '?' if strip_literals else _canonical_number(value)
+        elif kind == 'blob':
+            text = '?' if strip_literals else 'X' + value[1:].lower()
+        elif kind == 'param':
+            text = '?' if strip_literals else value
+        else:
+            text = value
+
+        # Function calls glue to their parenthesis: count(*), not count (*)
+        if prev is not None and not (
+            text in _NO_SPACE_BEFORE
+            or prev in _NO_SPACE_AFTER
+            or (text == '(' and prev_kind == 'word')
+        ):
+            parts.append(' ')
+        parts.append(text)
+        prev = text
+        prev_kind = kind
+
+    # Trailing statement terminators carry no meaning
+    while parts and parts[-1] in (';', ' '):
+        parts.pop()
+
+    normalized = ''.join(parts)
+    if strip_literals:
+        normalized = _LITERAL_LIST_RE.sub('(?, ...)', normalized)
+    return normalized
+
+
+def fingerprint_query(query, strip_literals=False):
+    """Return a stable 16-character hex fingerprint of the normalized query"""
+    normalized = normalize_query(query, strip_literals=strip_literals)
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+# Tokens of the bare skeleton a student starts from ("SELECT * FROM")
+_SKELETON_TOKENS = frozenset(['SELECT', 'FROM', 'WHERE', '*', ';'])
+
+
+def is_meaningful_query(query, initial_query=''):
+    """True if query says more than an empty or skeleton query and differs from initial_query"""
+    query = query or ''
+    if normalize_query(query) == normalize_query(initial_query or ''):
+        return False
+    return any(token.value.upper() not in _SKELETON_TOKENS for token in tokenize(query))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Compare SQLChecker latency with practice.db on disk vs. loaded into memory"""
+import os
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sample_data import SampleDataGenerator
+from sql_checker import SQLChecker
+
+# Reference solutions for the kinds of problems each difficulty level generates
+CANONICAL_SOLUTIONS = {
+    'basic_filter': "SELECT first_name, last_name, city FROM customers WHERE state = 'CA' ORDER BY last_name",
+    'basic_sort_limit': "SELECT product_name, price FROM products ORDER BY price DESC LIMIT 5",
+    'join_group': """SELECT c.customer_id, c.first_name, c.last_name, COUNT(o.order_id) AS orders, SUM(o.total_amount) AS spent
+                     FROM customers c JOIN orders o ON o.customer_id = c.customer_id
+                     GROUP BY c.customer_id HAVING COUNT(o.order_id) >= 2 ORDER BY spent DESC""",
+    'category_revenue': """SELECT p.category, SUM(oi.quantity * oi.unit_price * (1 - oi.discount)) AS revenue
+                           FROM order_items oi JOIN products p ON p.product_id = oi.product_id
+                           GROUP BY p.category ORDER BY revenue DESC""",
+    'window_rank': """SELECT employee_id, region, amount,
+                             RANK() OVER (PARTITION BY region ORDER BY amount DESC) AS region_rank
+                      FROM sales""",
+    'cte_monthly': """WITH monthly AS (
+                          SELECT strftime('%Y-%m', order_date) AS month, SUM(total_amount) AS total
+                          FROM orders GROUP BY month
+                      )
+                      SELECT month, total, total - LAG(total) OVER (ORDER BY month) AS change FROM monthly""",
+    'recursive_hierarchy': """WITH RECURSIVE chain(employee_id, manager_id, depth) AS (
+                                  SELECT employee_id, manager_id, 0 FROM employees WHERE manager_id IS NULL
+                                  UNION ALL
+                                  SELECT e.employee_id, e.manager_id, c.depth + 1
+                                  FROM employees e JOIN chain c ON e.manager_id = c.employee_id
+                              )
+                              SELECT depth, COUNT(*) FROM chain GROUP BY depth""",
+    'correlated_subquery': """SELECT product_name, price FROM products p
+                              WHERE price > (SELECT AVG(price) FROM products WHERE category = p.category)""",
+}
+
+
+def measure(checker, query, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        checker.execute_query(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+if __name__ == '__main__':
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    SampleDataGenerator().initialize_database()
+
+    checkers = {}
+    for mode in ('disk', 'memory'):
+        checker = SQLChecker()
+        checker.db_mode = mode
+        checker.execute_query('SELECT 1')  # Warm up (loads the memory image)
+        checkers[mode] = checker
+
+    print(f"{'query':<22} {'disk mean':>10} {'disk p95':>10} {'mem mean':>10} {'mem p95':>10} {'speedup':>8}")
+    totals = {'disk': 0.0, 'memory': 0.0}
+    for name, query in CANONICAL_SOLUTIONS.items():
+        disk_mean, disk_p95 = measure(checkers['disk'], query, rounds)
+        mem_mean, mem_p95 = measure(checkers['memory'], query, rounds)
+        totals['disk'] += disk_mean
+        totals['memory'] += mem_mean
+        print(f"{name:<22} {disk_mean:>9.3f}ms {disk_p95:>9.3f}ms {mem_mean:>9.3f}ms {mem_p95:>9.3f}ms "
+              f"{disk_mean / mem_mean:>7.2f}x")
+    print(f"\nAll solutions: disk {totals['disk']:.3f} ms, memory {totals['memory']:.3f} ms "
+          f"({totals['disk'] / totals['memory']:.2f}x)")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Correctness corpus and benchmark for SQLChecker.is_safe_query"""
+import os
+import re
+import sys
+import timeit
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sql_checker import SQLChecker
+
+# (query, expected_safe)
+CORPUS = [
+    ("SELECT * FROM customers", True),
+    ("  select first_name from customers;", True),
+    ("WITH t AS (SELECT 1 AS x) SELECT x FROM t", True),
+    ("SELECT * FROM orders WHERE status = 'REPLACE'", True),
+    ("SELECT * FROM orders WHERE status = 'DROP TABLE orders'", True),
+    ("SELECT REPLACE(email, '@email.com', '') AS handle FROM customers", True),
+    ("SELECT replace (email, 'a', 'b') FROM customers", True),
+    ('SELECT "delete" FROM (SELECT 1 AS "delete")', True),
+    ("SELECT [update] FROM (SELECT 1 AS [update])", True),
+    ("SELECT 1 -- DROP TABLE customers", True),
+    ("/* DELETE */ SELECT 1", True),
+    ("SELECT created_at, updated_by FROM t", True),
+    ("DROP TABLE customers", False),
+    ("DELETE FROM orders", False),
+    ("INSERT INTO customers VALUES (1)", False),
+    ("REPLACE INTO products VALUES (1)", False),
+    ("UPDATE products SET price = 0", False),
+    ("PRAGMA table_info(customers)", False),
+    ("ATTACH DATABASE '/tmp/x.db' AS x", False),
+    ("DETACH DATABASE x", False),
+    ("VACUUM", False),
+    ("SELECT 1; DROP TABLE customers", False),
+    ("SELECT 1; SELECT 2", False),
+    ("WITH t AS (SELECT 1) DELETE FROM orders", False),
+    ("WITH t AS (SELECT 1) INSERT OR REPLACE INTO products SELECT * FROM t", False),
+    ("EXPLAIN SELECT 1", False),
+    ("(SELECT 1)", False),
+    ("", False),
+    ("-- only a comment", False),
+]
+
+LEGACY_KEYWORDS = ['DROP', 'DELETE', 'INSERT', 'UPDATE', 'ALTER',
+                   'CREATE', 'TRUNCATE', 'REPLACE', 'PRAGMA']
+
+
+def legacy_is_safe_query(query):
+    """The previous regex implementation, kept for comparison"""
+    query_upper = query.upper().strip()
+    for keyword in LEGACY_KEYWORDS:
+        if re.search(r'\b' + keyword + r'\b', query_upper):
+            return False, f"Query contains forbidden keyword: {keyword}"
+    if not (query_upper.startswith('SELECT') or query_upper.startswith('WITH')):
+        return False, "Only SELECT queries and CTEs are allowed"
+    return True, "Query is safe"
+
+
+def check_corpus(checker):
+    failures = 0
+    for query, expected in CORPUS:
+        safe, message = checker.is_safe_query(query)
+        legacy_safe, _ = legacy_is_safe_query(query)
+        marker = 'ok  ' if safe == expected else 'FAIL'
+        if safe != expected:
+            failures += 1
+        note = '' if legacy_safe == expected else '  (legacy got this wrong)'
+        print(f"{marker} {'safe  ' if safe else 'unsafe'} {query[:60]!r}{note}")
+    return failures
+
+
+def bench(func, label, number):
+    queries = [q for q, _ in CORPUS]
+    elapsed = timeit.timeit(lambda: [func(q) for q in queries], number=number)
+    calls = number * len(queries)
+    print(f"{label:<24} {calls / elapsed:>12,.0f} checks/s  {elapsed / calls * 1e6:>8.2f} us/check")
+
+
+if __name__ == '__main__':
+    checker = SQLChecker()
+    failures = check_corpus(checker)
+    print(f"\n{len(CORPUS) - failures}/{len(CORPUS)} corpus queries classified correctly\n")
+
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bench(legacy_is_safe_query, "legacy regex scan", number)
+    bench(checker.is_safe_query, "token scan", number)
+
+    sys.exit(1 if failures else 0)
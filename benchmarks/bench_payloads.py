@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Serialization time and bytes on the wire for the largest API responses
+
+Usage: bench_payloads.py [rounds]
+
+Fetches each endpoint once through the Flask test client, then times building
+its response with Flask's stdlib JSON provider and with FastJSONProvider
+(orjson, if installed), and compressing the body with gzip and brotli (if
+installed). Bytes on the wire are what the app actually sends for
+Accept-Encoding identity, gzip and br. Runs against the existing practice
+database; a scratch progress database is used.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.environ['PROGRESS_DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench-payloads-'), 'progress.db')
+os.environ['PROBLEM_POOL_HIGH'] = '0'
+
+from flask.json.provider import DefaultJSONProvider
+
+import http_encoding
+from app import create_app
+
+ENDPOINTS = [
+    ('flashcards/all', 'GET', '/api/flashcards/all', None),
+    ('database/schema', 'GET', '/api/database/schema', None),
+    ('sample-data (500 rows)', 'GET', '/api/database/sample-data?table=order_items&limit=500', None),
+    ('execute (order_items)', 'POST', '/api/problem/execute', {'query': 'SELECT * FROM order_items'}),
+    ('execute (orders join)', 'POST', '/api/problem/execute', {
+        'query': 'SELECT o.*, c.first_name, c.last_name, c.city FROM orders o '
+                 'JOIN customers c ON c.customer_id = o.customer_id'
+    }),
+]
+
+
+def median_ms(func, rounds):
+    """Median milliseconds per call over rounds"""
+    func()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def wire_bytes(client, method, path, body, encoding):
+    """(body bytes, Content-Encoding) the app sends for one Accept-Encoding"""
+    response = client.open(path, method=method, json=body, headers={'Accept-Encoding': encoding})
+    assert response.status_code == 200, (path, response.status_code)
+    return len(response.data), response.headers.get('Content-Encoding')
+
+
+if __name__ == '__main__':
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    app = create_app()
+    client = app.test_client()
+    stdlib = DefaultJSONProvider(app)
+    fast = http_encoding.FastJSONProvider(app)
+    encodings = ['identity', 'gzip'] + (['br'] if http_encoding.brotli is not None else [])
+
+    print(f"orjson: {'yes' if http_encoding.USE_ORJSON else 'no'}, "
+          f"brotli: {'yes' if http_encoding.brotli is not None else 'no'}, "
+          f"compression threshold {http_encoding.COMPRESS_MIN_BYTES} bytes, {rounds} rounds (median ms)")
+    print(f"\n{'endpoint':<24} {'stdlib':>8} {'fast':>8} {'speedup':>8}" +
+          ''.join(f" {encoding + ' ms':>9}" for encoding in encodings[1:]))
+    sizes = []
+    for name, method, path, body in ENDPOINTS:
+        obj = client.open(path, method=method, json=body).get_json()
+        with app.app_context():
+            stdlib_ms = median_ms(lambda: stdlib.response(obj), rounds)
+            fast_ms = median_ms(lambda: fast.response(obj), rounds)
+            data = fast.response(obj).get_data()
+        compress_ms = [median_ms(lambda: http_encoding.compress(data, encoding), rounds)
+                       for encoding in encodings[1:]]
+        print(f"{name:<24} {stdlib_ms:>8.3f} {fast_ms:>8.3f} {stdlib_ms / fast_ms:>7.1f}x" +
+              ''.join(f" {ms:>9.3f}" for ms in compress_ms))
+        sizes.append((name, [wire_bytes(client, method, path, body, encoding) for encoding in encodings]))
+
+    print(f"\n{'bytes on the wire':<24}" + ''.join(f" {encoding:>10}" for encoding in encodings) + '   ratio')
+    for name, results in sizes:
+        identity = results[0][0]
+        print(f"{name:<24}" + ''.join(f" {size:>10,}" for size, _ in results) +
+              f"   {results[-1][0] / identity:>5.2f}")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Check AIService prompt caching and usage instrumentation against a local stub
+
+The stub behaves like the messages API with prompt caching: a system block
+marked with cache_control is billed as cache_creation_input_tokens the first
+time it is seen and as cache_read_input_tokens afterwards, as long as it is at
+least the model's minimum cacheable length (shorter blocks are billed as plain
+input), and uncached input tokens add latency. Problems are generated for the
+e-commerce dataset with the schema description the backend sends. Reports how
+much of the problem-generation prompt is served from cache across a run of
+requests; a prefix below the minimum is sent without cache_control and must
+not be billed as a cache write.
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+# Measure caching, not the local rate limiter
+os.environ.setdefault('AI_TOKENS_PER_MINUTE', '10000000')
+
+from ai_service import AIService, min_cacheable_tokens
+from datasets import create_default_registry
+
+PROBLEM_JSON = ('{"title": "Top cities", "description": "Count customers per city", "difficulty": "basic", '
+                '"topic": "GROUP BY", "hints": ["a", "b", "c"], '
+                '"solution": "SELECT city, COUNT(*) FROM customers GROUP BY city", "explanation": "Group and count"}')
+
+# Simulated cost of processing uncached vs. cached input
+SECONDS_PER_UNCACHED_TOKEN = 0.00002
+SECONDS_PER_CACHED_TOKEN = 0.000002
+
+
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+class StubMessages:
+    """Minimal messages.create with prompt-cache accounting"""
+
+    def __init__(self):
+        self.cached_prefixes = set()
+
+    def create(self, model, max_tokens, messages, system=None):
+        usage = SimpleNamespace(input_tokens=0, cache_read_input_tokens=0,
+                                cache_creation_input_tokens=0, output_tokens=estimate_tokens(PROBLEM_JSON))
+        for block in system or []:
+            tokens = estimate_tokens(block['text'])
+            if block.get('cache_control') and tokens >= min_cacheable_tokens(model):
+                if block['text'] in self.cached_prefixes:
+                    usage.cache_read_input_tokens += tokens
+                else:
+                    self.cached_prefixes.add(block['text'])
+                    usage.cache_creation_input_tokens += tokens
+            else:
+                usage.input_tokens += tokens
+        usage.input_tokens += sum(estimate_tokens(message['content']) for message in messages)
+
+        time.sleep(usage.input_tokens * SECONDS_PER_UNCACHED_TOKEN
+                   + usage.cache_creation_input_tokens * SECONDS_PER_UNCACHED_TOKEN
+                   + usage.cache_read_input_tokens * SECONDS_PER_CACHED_TOKEN)
+        return SimpleNamespace(content=[SimpleNamespace(text=PROBLEM_JSON)], usage=usage)
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    service = AIService(None, client=SimpleNamespace(messages=StubMessages()))
+
+    schema_description = create_default_registry().schema_description('ecommerce')
+    system, _ = service._problem_prompt('basic', schema_description=schema_description)
+
+    difficulties = ['basic', 'intermediate', 'advanced', 'expert']
+    topics = [None, 'JOINs', 'window functions', 'date handling']
+    for i in range(requests):
+        service.generate_problem(difficulties[i % 4], topics[(i // 4) % 4], schema_description=schema_description)
+
+    report = service.usage.report()['problem']
+    prompt_tokens = (report['input_tokens'] + report['cache_read_input_tokens']
+                     + report['cache_creation_input_tokens'])
+    print()
+    cacheable = 'cache_control' in system[0]
+    print(f"System prefix:         ~{estimate_tokens(system[0]['text']):,} tokens "
+          f"(minimum {min_cacheable_tokens(service.model):,} for {service.model}, "
+          f"{'cached' if cacheable else 'too short to cache'})")
+    print(f"Requests:              {report['calls']}")
+    print(f"Calls with cache hits: {report['cached_calls']}")
+    print(f"Prompt tokens:         {prompt_tokens:,}")
+    print(f"  uncached input:      {report['input_tokens']:,}")
+    print(f"  cache writes:        {report['cache_creation_input_tokens']:,}")
+    print(f"  cache reads:         {report['cache_read_input_tokens']:,}")
+    print(f"Cached token share:    {report['cached_token_share']:.1%}")
+    print(f"Latency (ms):          {report['latency_ms']}")
+    if cacheable and report['cached_calls'] != report['calls'] - 1:
+        print("FAIL: expected every call after the first to read the cached prefix")
+        sys.exit(1)
+    if not cacheable and report['cache_creation_input_tokens']:
+        print("FAIL: a prefix below the minimum was billed as a cache write")
+        sys.exit(1)
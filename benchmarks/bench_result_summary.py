@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Compare check_answer prompt size (and optionally latency) with full vs. summarized results
+
+Usage: bench_result_summary.py [token_budget] [--live]
+
+--live also sends both prompts to the API (needs ANTHROPIC_API_KEY) and
+reports input tokens and response time.
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from result_summary import estimate_tokens, summarize_result
+from sample_data import SampleDataGenerator
+from sql_checker import SQLChecker
+
+# Student queries with small to very large results
+STUDENT_QUERIES = {
+    'aggregate': "SELECT category, COUNT(*) AS products FROM products GROUP BY category",
+    'top_customers': """SELECT c.first_name, c.last_name, SUM(o.total_amount) AS spent
+                        FROM customers c JOIN orders o ON o.customer_id = c.customer_id
+                        GROUP BY c.customer_id ORDER BY spent DESC LIMIT 10""",
+    'customers': "SELECT * FROM customers",
+    'orders': "SELECT * FROM orders",
+    'order_items': "SELECT * FROM order_items",
+    'sales_window': """SELECT employee_id, region, amount,
+                              RANK() OVER (PARTITION BY region ORDER BY amount DESC) AS region_rank
+                       FROM sales""",
+}
+
+
+def old_result_text(result):
+    """What check_answer used to inline"""
+    return json.dumps(result, indent=2) if result else "Query failed or returned no results"
+
+
+def time_ms(func, rounds=20):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def live_call(service, result_text):
+    """Send a check prompt with result_text; return (input_tokens, seconds)"""
+    prompt = f"Problem: list the data.\nStudent's Query Result: {result_text}\nReply with OK."
+    start = time.perf_counter()
+    response = service.client.messages.create(
+        model=service.model,
+        max_tokens=5,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    return response.usage.input_tokens, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    budget = int(args[0]) if args else 1500
+    live = '--live' in sys.argv
+
+    SampleDataGenerator().initialize_database()
+    checker = SQLChecker()
+    service = None
+    if live:
+        from ai_service import AIService
+        service = AIService(os.getenv('ANTHROPIC_API_KEY'))
+
+    print(f"Token budget: {budget}")
+    print(f"{'query':<14} {'rows':>6} {'old tokens':>11} {'new tokens':>11} {'ratio':>7} "
+          f"{'old ms':>8} {'new ms':>8}")
+    totals = [0, 0]
+    for name, query in STUDENT_QUERIES.items():
+        result = checker.execute_query(query)
+        old_text = old_result_text(result)
+        new_text = summarize_result(result, budget)
+        old_tokens, new_tokens = estimate_tokens(old_text), estimate_tokens(new_text)
+        totals[0] += old_tokens
+        totals[1] += new_tokens
+        print(f"{name:<14} {len(result):>6} {old_tokens:>11,} {new_tokens:>11,} "
+              f"{old_tokens / new_tokens:>6.1f}x "
+              f"{time_ms(lambda: old_result_text(result)):>8.2f} "
+              f"{time_ms(lambda: summarize_result(result, budget)):>8.2f}")
+
+        if live:
+            for label, text in (('old', old_text), ('new', new_text)):
+                try:
+                    tokens, seconds = live_call(service, text)
+                    print(f"    {label}: {tokens:,} input tokens, {seconds:.2f}s")
+                except Exception as e:
+                    print(f"    {label}: API call failed: {e}")
+
+    print(f"{'total':<14} {'':>6} {totals[0]:>11,} {totals[1]:>11,} {totals[0] / totals[1]:>6.1f}x")
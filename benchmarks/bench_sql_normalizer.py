@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for the SQL normalizer and fingerprinting"""
+import os
+import sys
+import timeit
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sql_normalizer import fingerprint_query, normalize_query
+
+QUERIES = [
+    "SELECT * FROM customers",
+    "select first_name, last_name from customers where state = 'CA' order by last_name",
+    """SELECT c.customer_id, c.first_name, COUNT(o.order_id) AS order_count
+       FROM customers c
+       LEFT JOIN orders o ON c.customer_id = o.customer_id -- include customers without orders
+       GROUP BY c.customer_id
+       HAVING COUNT(o.order_id) > 2
+       ORDER BY order_count DESC""",
+    """WITH monthly AS (
+           SELECT strftime('%Y-%m', sale_date) AS month, region, SUM(amount) AS total
+           FROM sales GROUP BY month, region
+       )
+       SELECT month, region, total,
+              RANK() OVER (PARTITION BY month ORDER BY total DESC) AS region_rank
+       FROM monthly /* window functions */
+       WHERE region IN ('North', 'South', 'East', 'West')""",
+]
+
+
+def bench(func, label, number):
+    elapsed = timeit.timeit(lambda: [func(q) for q in QUERIES], number=number)
+    calls = number * len(QUERIES)
+    print(f"{label:<34} {calls / elapsed:>12,.0f} queries/s  {elapsed / calls * 1e6:>8.2f} us/query")
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"Benchmarking {len(QUERIES)} queries x {number} rounds\n")
+    bench(str.upper, "str.upper (previous baseline)", number)
+    bench(normalize_query, "normalize_query", number)
+    bench(lambda q: normalize_query(q, strip_literals=True), "normalize_query(strip_literals)", number)
+    bench(fingerprint_query, "fingerprint_query", number)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Measure backend cold start: import, app creation and first requests, each in a fresh process
+
+Usage: bench_startup.py [runs]
+
+Each run starts a new interpreter and reports milliseconds for:
+  import    import app (modules only; services are lazy)
+  create    create_app()
+  first     first request (GET /api/datasets), which opens the dataset registry
+  execute   first query (POST /api/problem/execute)
+  warm      services.warm(), what a gunicorn worker does after fork
+Both "lazy" (serve first, open pools on demand) and "warm" (warm before the
+first request, as under gunicorn) orders are measured. Uses the existing
+practice database; a scratch progress database is created per run.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+CHILD = r'''
+import json, os, sys, time
+timings = {}
+start = time.perf_counter()
+def mark(name):
+    global start
+    now = time.perf_counter()
+    timings[name] = (now - start) * 1000
+    start = now
+
+import app
+mark('import')
+flask_app = app.create_app()
+mark('create')
+if sys.argv[1] == 'warm':
+    app.services.warm()
+    mark('warm')
+client = flask_app.test_client()
+assert client.get('/api/datasets').status_code == 200
+mark('first')
+assert client.post('/api/problem/execute', json={'query': 'SELECT COUNT(*) FROM customers'}).status_code == 200
+mark('execute')
+print('TIMINGS ' + json.dumps(timings))
+'''
+
+
+def run_once(mode):
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, PROGRESS_DB_PATH=os.path.join(scratch, 'progress.db'),
+                   PROBLEM_POOL_HIGH='0', ANTHROPIC_API_KEY=os.getenv('ANTHROPIC_API_KEY', 'unused'))
+        output = subprocess.run([sys.executable, '-c', CHILD, mode], cwd=BACKEND_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith('TIMINGS '))
+    return json.loads(line[len('TIMINGS '):])
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Build the practice database first so runs measure startup, not the one-time build
+    subprocess.run([sys.executable, '-c', 'from sample_data import SampleDataGenerator; '
+                    'SampleDataGenerator().initialize_database()'], cwd=BACKEND_DIR, check=True)
+
+    for mode in ('lazy', 'warm'):
+        samples = [run_once(mode) for _ in range(runs)]
+        phases = list(samples[0])
+        print(f"\n{mode} ({runs} runs, median ms)")
+        for phase in phases:
+            print(f"  {phase:<8} {statistics.median(sample[phase] for sample in samples):>8.1f}")
+        print(f"  {'total':<8} {statistics.median(sum(sample.values()) for sample in samples):>8.1f}")
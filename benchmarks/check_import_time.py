@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Import-time budget check for the backend (uses python -X importtime)
+
+Usage: check_import_time.py [--budget-ms 500] [--runs 5]
+
+Imports app and calls create_app() in fresh interpreters and fails (exit 1)
+if the median import time exceeds the budget, or if a module that should be
+deferred until first use (the AI SDK and its HTTP stack) is imported at
+startup. Prints the slowest modules imported directly by the backend.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+# Only needed once an AI call is made
+DEFERRED_MODULES = ('anthropic', 'httpx')
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def profile_imports():
+    """[(depth, module, self_us, cumulative_us)] for one cold start"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app; app.create_app()'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((len(indent) // 2, name, int(self_us), int(cumulative_us)))
+    return modules
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check backend import time against a budget')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('IMPORT_BUDGET_MS', 500)))
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [profile_imports() for _ in range(args.runs)]
+    totals = [sum(cumulative for depth, _, _, cumulative in modules if depth == 0) / 1000 for modules in runs]
+    total = statistics.median(totals)
+
+    modules = runs[-1]
+    backend_modules = {filename[:-3] for filename in os.listdir(BACKEND_DIR) if filename.endswith('.py')}
+    # Third-party and stdlib packages pulled in directly by backend modules
+    direct = {}
+    parents = []
+    for depth, name, _, cumulative in reversed(modules):  # importtime prints children before parents
+        parents = parents[:depth]
+        parent = parents[-1] if parents else None
+        parents.append(name)
+        if name not in backend_modules and parent in backend_modules:
+            direct[name] = max(direct.get(name, 0), cumulative)
+
+    print(f"Median import time over {args.runs} runs: {total:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print("Slowest packages imported by the backend:")
+    for name, cumulative in sorted(direct.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {name:<30} {cumulative / 1000:>7.1f} ms")
+
+    imported = {name.split('.')[0] for _, name, _, _ in modules}
+    eager = [name for name in DEFERRED_MODULES if name in imported]
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    if total > args.budget_ms:
+        print(f"FAIL: import time {total:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""Drive every /api/* route of the backend at a target request rate and report latency and errors
+
+Usage: load_test.py [--url http://127.0.0.1:5000] [--rps 20] [--duration 30] [--users 20]
+                    [--routes substring,...] [--poisson] [--spawn [mock options]]
+
+--spawn starts benchmarks/mock_anthropic.py in-process and the backend as a
+subprocess pointed at it (with a scratch progress database), so the run is
+fully offline and costs nothing; the mock options of mock_anthropic.py
+(--latency-ms, --error-rate, ...) then apply. Without --spawn, a backend must
+already be running at --url (point its ANTHROPIC_BASE_URL at a mock server
+unless you mean to call the real API).
+
+Requests are sent open-loop: request i is due at i / rps seconds (or at
+Poisson arrivals with --poisson) whether or not earlier ones finished, and
+latency is measured from when it was due, so a backend that falls behind
+shows up as latency rather than as a lower request rate. Each virtual user
+keeps its own session cookie. A request counts as an error on a 5xx status,
+a connection failure or timeout, or an SSE stream that ends with an error
+event; 4xx responses are reported separately.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from query_profiler import percentile
+
+import mock_anthropic
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+STUDENT_QUERIES = [
+    "SELECT city, COUNT(*) AS customers FROM customers GROUP BY city ORDER BY customers DESC",
+    "SELECT product_name, price FROM products WHERE price > 100 ORDER BY price DESC",
+    "SELECT * FROM orders WHERE status = 'Delivered'",
+    "SELECT c.first_name, SUM(o.total_amount) FROM customers c JOIN orders o ON o.customer_id = c.customer_id "
+    "GROUP BY c.customer_id",
+]
+
+
+class SharedState:
+    """Cards and saved problems discovered during the run, used to build later requests"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cards = []
+        self.problems = []  # Saved problems kept for the whole run
+        self.disposable = deque()  # Saved ids generated during the run, for DELETE
+
+    def problem(self):
+        with self.lock:
+            return random.choice(self.problems) if self.problems else None
+
+    def add_generated(self, problem):
+        if problem and problem.get('saved_id'):
+            with self.lock:
+                if len(self.problems) < 20:
+                    self.problems.append(problem)
+                else:
+                    self.disposable.append(problem['saved_id'])
+
+    def take_disposable(self):
+        with self.lock:
+            return self.disposable.popleft() if self.disposable else None
+
+
+def _check_body(problem):
+    return {
+        'query': random.choice(STUDENT_QUERIES + [problem['solution']]),
+        'problem_description': problem['description'],
+        'saved_id': problem['saved_id'],
+        'problem_id': problem['title'],
+        'difficulty': problem.get('difficulty')
+    }
+
+
+def _hint_body(problem):
+    return {
+        'query': random.choice(['', random.choice(STUDENT_QUERIES)]),
+        'problem_description': problem['description'],
+        'saved_id': problem['saved_id'],
+        'hint_level': random.randint(1, 3)
+    }
+
+
+# (name, weight, build(state) -> (method, path, body)); build may return None to skip
+SCENARIOS = [
+    ('GET /api/flashcards/all', 3, lambda s: ('GET', '/api/flashcards/all', None)),
+    ('POST /api/flashcards/options', 2,
+     lambda s: ('POST', '/api/flashcards/options', {'card': random.choice(s.cards)}) if s.cards else None),
+    ('POST /api/flashcards/options/batch', 1,
+     lambda s: ('POST', '/api/flashcards/options/batch', {'cards': random.sample(s.cards, min(10, len(s.cards)))})
+     if s.cards else None),
+    ('POST /api/flashcards/progress', 4,
+     lambda s: ('POST', '/api/flashcards/progress', {
+         'card_id': random.choice(s.cards)['id'], 'correct': random.random() < 0.7,
+         'topic': 'load-test', 'level': 'basic'}) if s.cards else None),
+    ('POST /api/problem/generate', 2,
+     lambda s: ('POST', '/api/problem/generate', {'difficulty': random.choice(['basic', 'intermediate'])})),
+    ('POST /api/problem/generate/stream', 1,
+     lambda s: ('POST', '/api/problem/generate/stream', {'difficulty': 'basic', 'topic': 'GROUP BY'})),
+    ('GET /api/problem/verdicts', 1, lambda s: ('GET', '/api/problem/verdicts', None)),
+    ('GET /api/problem/pool', 1, lambda s: ('GET', '/api/problem/pool', None)),
+    ('GET /api/problem/saved', 2, lambda s: ('GET', '/api/problem/saved', None)),
+    ('GET /api/problem/saved/<id>', 2,
+     lambda s: ('GET', f"/api/problem/saved/{s.problem()['saved_id']}", None) if s.problem() else None),
+    ('DELETE /api/problem/saved/<id>', 1,
+     lambda s: ('DELETE', f"/api/problem/saved/{problem_id}", None)
+     if (problem_id := s.take_disposable()) else None),
+    ('POST /api/problem/execute', 8,
+     lambda s: ('POST', '/api/problem/execute', {'query': random.choice(STUDENT_QUERIES)})),
+    ('POST /api/problem/explain', 2,
+     lambda s: ('POST', '/api/problem/explain', {'query': random.choice(STUDENT_QUERIES)})),
+    ('POST /api/problem/check', 4,
+     lambda s: ('POST', '/api/problem/check', _check_body(s.problem())) if s.problem() else None),
+    ('POST /api/problem/check/stream', 2,
+     lambda s: ('POST', '/api/problem/check/stream', _check_body(s.problem())) if s.problem() else None),
+    ('POST /api/problem/hint', 3,
+     lambda s: ('POST', '/api/problem/hint', _hint_body(s.problem())) if s.problem() else None),
+    ('POST /api/problem/hint/stream', 1,
+     lambda s: ('POST', '/api/problem/hint/stream', _hint_body(s.problem())) if s.problem() else None),
+    ('POST /api/sandbox/execute', 3,
+     lambda s: ('POST', '/api/sandbox/execute', {'query': random.choice([
+         "UPDATE products SET price = price * 1.01 WHERE category = 'Electronics'",
+         "SELECT COUNT(*) FROM products",
+         "CREATE TABLE IF NOT EXISTS notes (id INTEGER PRIMARY KEY, body TEXT)"])})),
+    ('POST /api/sandbox/reset', 1, lambda s: ('POST', '/api/sandbox/reset', {})),
+    ('GET /api/sandbox/stats', 1, lambda s: ('GET', '/api/sandbox/stats', None)),
+    ('GET /api/progress/stats', 3, lambda s: ('GET', '/api/progress/stats', None)),
+    ('GET /api/ai/usage', 1, lambda s: ('GET', '/api/ai/usage', None)),
+    ('GET /api/ai/health', 1, lambda s: ('GET', '/api/ai/health', None)),
+    ('GET /api/ai/scheduler', 1, lambda s: ('GET', '/api/ai/scheduler', None)),
+    ('GET /api/profiling/queries', 1, lambda s: ('GET', '/api/profiling/queries', None)),
+    ('GET /api/database/schema', 2,
+     lambda s: ('GET', '/api/database/schema?dataset=' + random.choice(['ecommerce', 'timeseries']), None)),
+    ('GET /api/datasets', 1, lambda s: ('GET', '/api/datasets', None)),
+    ('GET /api/database/version', 1, lambda s: ('GET', '/api/database/version', None)),
+    ('GET /api/database/sample-data', 2,
+     lambda s: ('GET', '/api/database/sample-data?table=' + random.choice(['customers', 'orders', 'products']),
+                None)),
+]
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies = []
+        self.first_byte = []
+        self.errors = 0
+        self.client_errors = 0
+        self.samples = {}  # status -> one error message
+
+
+class LoadTest:
+    """Open-loop load generator over SCENARIOS"""
+
+    def __init__(self, url, users=20, timeout=120):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.state = SharedState()
+        self.openers = [
+            urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+            for _ in range(users)
+        ]
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.late_starts = 0
+
+    def request(self, method, path, body=None, opener=None):
+        """Send one request; returns (status, body bytes, seconds to first byte)"""
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(self.url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+        start = time.perf_counter()
+        try:
+            with (opener or self.openers[0]).open(req, timeout=self.timeout) as response:
+                first = response.read(1)
+                first_byte = time.perf_counter() - start
+                return response.status, first + response.read(), first_byte
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), time.perf_counter() - start
+
+    def setup(self):
+        """Fetch the flashcard deck and generate a first problem for the routes that need them"""
+        status, body, _ = self.request('GET', '/api/flashcards/all')
+        if status == 200:
+            deck = json.loads(body)
+            self.state.cards = [dict(card, level=level) for level, cards in deck.items() for card in cards]
+        # Retried, since the mock may be injecting errors
+        for _ in range(10):
+            status, body, _ = self.request('POST', '/api/problem/generate', {'difficulty': 'basic'})
+            if status == 200:
+                self.state.add_generated(json.loads(body))
+                return
+        raise RuntimeError(f"Could not generate a problem for the run ({status}): {body[:200]!r}")
+
+    def _run_one(self, scenario, due):
+        name, _, build = scenario
+        spec = build(self.state)
+        if spec is None:
+            name, spec = 'GET /api/problem/saved', ('GET', '/api/problem/saved', None)
+        method, path, body = spec
+
+        started = time.perf_counter()
+        try:
+            status, payload, first_byte = self.request(method, path, body, random.choice(self.openers))
+            error = None
+            if status >= 500:
+                error = f"HTTP {status}"
+            elif payload.startswith(b'event:') and b'event: error' in payload:
+                error = 'stream error event'
+        except Exception as e:
+            status, payload, first_byte, error = None, b'', None, type(e).__name__
+
+        finished = time.perf_counter()
+        if status == 200 and name.startswith('POST /api/problem/generate'):
+            self._remember_problem(payload)
+
+        with self.lock:
+            stats = self.stats.setdefault(name, RouteStats())
+            stats.latencies.append((finished - due) * 1000)
+            if first_byte is not None and payload.startswith(b'event:'):
+                stats.first_byte.append((started - due + first_byte) * 1000)
+            if error:
+                stats.errors += 1
+                stats.samples.setdefault(error, payload[:160].decode('utf-8', 'replace'))
+            elif status is not None and status >= 400:
+                stats.client_errors += 1
+                stats.samples.setdefault(f"HTTP {status}", payload[:160].decode('utf-8', 'replace'))
+            if started - due > 0.05:
+                self.late_starts += 1
+
+    def _remember_problem(self, payload):
+        try:
+            if payload.startswith(b'event:'):
+                done = payload.split(b'event: done\ndata: ', 1)[1].split(b'\n', 1)[0]
+                self.state.add_generated(json.loads(done))
+            else:
+                self.state.add_generated(json.loads(payload))
+        except (IndexError, ValueError):
+            pass
+
+    def run(self, scenarios, rps, duration, poisson=False):
+        """Send requests at rps for duration seconds; returns elapsed seconds"""
+        weights = [weight for _, weight, _ in scenarios]
+        start = time.perf_counter()
+        due = 0.0
+        with ThreadPoolExecutor(max_workers=max(8, int(rps * 4))) as pool:
+            while due < duration:
+                delay = start + due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._run_one, random.choices(scenarios, weights)[0], start + due)
+                due += random.expovariate(rps) if poisson else 1 / rps
+        return time.perf_counter() - start
+
+    def report(self, elapsed):
+        total = sum(len(stats.latencies) for stats in self.stats.values())
+        errors = sum(stats.errors for stats in self.stats.values())
+        print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), "
+              f"{errors} errors ({errors / total:.1%}), {self.late_starts} started >50ms late")
+        print(f"{'route':<38} {'n':>5} {'err%':>6} {'4xx':>4} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'max ms':>8} {'ttfb p50':>9}")
+        for name, stats in sorted(self.stats.items()):
+            latencies = sorted(stats.latencies)
+            first_byte = sorted(stats.first_byte)
+            print(f"{name:<38} {len(latencies):>5} {stats.errors / len(latencies):>6.1%} {stats.client_errors:>4} "
+                  f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+                  f"{percentile(latencies, 99):>8.1f} {latencies[-1]:>8.1f} "
+                  f"{percentile(first_byte, 50) if first_byte else float('nan'):>9.1f}")
+        samples = [(name, kind, text) for name, stats in sorted(self.stats.items())
+                   for kind, text in stats.samples.items()]
+        if samples:
+            print("\nFirst failure per route and kind:")
+            for name, kind, text in samples:
+                print(f"  {name}: {kind}: {text}")
+        return errors
+
+
+def spawn_backend(args, mock_port):
+    """Start the mock API in-process and the backend as a subprocess pointed at it"""
+    server = mock_anthropic.serve(mock_anthropic.config_from_args(args), port=mock_port)
+    scratch = tempfile.mkdtemp(prefix='sql-loadtest-')
+    port = int(args.url.rsplit(':', 1)[1].split('/')[0])
+    env = dict(os.environ,
+               ANTHROPIC_BASE_URL=f'http://127.0.0.1:{mock_port}',
+               ANTHROPIC_API_KEY='mock-key',
+               PROGRESS_DB_PATH=os.path.join(scratch, 'progress.db'),
+               PORT=str(port),
+               FLASK_ENV='production')
+    log = open(os.path.join(scratch, 'backend.log'), 'w')
+    backend = subprocess.Popen([sys.executable, 'app.py'], cwd=BACKEND_DIR, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    print(f"Mock API on port {mock_port}, backend on port {port} (log: {log.name})")
+    return server, backend
+
+
+def wait_ready(test, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if test.request('GET', '/api/datasets')[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Backend at {test.url} did not become ready within {timeout}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the backend API')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--rps', type=float, default=20)
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--users', type=int, default=20, help='virtual users (separate sessions)')
+    parser.add_argument('--routes', help='only scenarios whose name contains one of these, comma separated')
+    parser.add_argument('--poisson', action='store_true', help='Poisson arrivals instead of a fixed interval')
+    parser.add_argument('--spawn', action='store_true', help='start the mock API and the backend')
+    parser.add_argument('--mock-port', type=int, default=8765)
+    mock_anthropic.add_arguments(parser)
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.routes:
+        patterns = args.routes.split(',')
+        scenarios = [scenario for scenario in SCENARIOS if any(p in scenario[0] for p in patterns)]
+        if not scenarios:
+            sys.exit(f"No scenario matches {args.routes}")
+
+    test = LoadTest(args.url, users=args.users)
+    server = backend = None
+    if args.spawn:
+        server, backend = spawn_backend(args, args.mock_port)
+    try:
+        wait_ready(test)
+        test.setup()
+        print(f"Running {len(scenarios)} scenarios at {args.rps:g} req/s for {args.duration:g}s...")
+        elapsed = test.run(scenarios, args.rps, args.duration, poisson=args.poisson)
+        errors = test.report(elapsed)
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait()
+        if server is not None:
+            server.shutdown()
+    sys.exit(1 if errors else 0)
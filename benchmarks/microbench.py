@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks of backend hot paths, with saved baselines and regression checks
+
+Usage:
+    microbench.py run [--filter substring] [--scales small,medium,large] [--rounds 15] [--save NAME]
+    microbench.py compare BASELINE [CURRENT] [--threshold 10] [--filter ...] [--scales ...]
+    microbench.py list
+
+run times each benchmark at each data scale and prints min/median/mean/stddev
+per call; --save writes the results to benchmarks/baselines/NAME.json.
+compare checks a saved run (or a fresh run, if CURRENT is omitted) against
+BASELINE and exits 1 if any benchmark's median got slower by more than
+--threshold percent. Baselines are machine-specific, so compare runs from the
+same machine.
+
+Everything runs offline against scratch databases in a temporary directory;
+the real practice and progress databases are not touched. Scales multiply the
+practice data (SampleDataGenerator scale) and the number of rows in the
+progress database (100 per scale unit).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from db_versions import DatabaseVersions
+from sample_data import SampleDataGenerator
+from sql_checker import SQLChecker
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+SCALES = {'small': 1, 'medium': 10, 'large': 50}
+
+BENCHMARKS = []
+
+
+def benchmark(name, scales=tuple(SCALES), min_time=0.01):
+    """Register setup(workdir, factor) -> function to time; min_time is the minimum length of one round"""
+    def register(setup):
+        BENCHMARKS.append({'name': name, 'setup': setup, 'scales': scales, 'min_time': min_time})
+        return setup
+    return register
+
+
+# Databases built once per scale and shared by the benchmarks of a run
+FIXTURE_DIR = tempfile.mkdtemp(prefix='microbench-fixtures-')
+
+
+def _practice_checker(workdir, factor):
+    """SQLChecker over a practice database built at the given scale"""
+    directory = os.path.join(FIXTURE_DIR, f'practice-{factor}')
+    if not os.path.exists(directory):
+        generator = SampleDataGenerator(scale=factor)
+        generator.versions = DatabaseVersions(directory)
+        generator.initialize_database()
+    checker = SQLChecker()
+    checker.versions = DatabaseVersions(directory)
+    return checker
+
+
+def _progress_tracker(workdir, factor):
+    """ProgressTracker over a copy of a database with 100 * factor flashcard reviews, attempts and saved problems"""
+    from models import ProgressTracker
+    seeded = os.path.join(FIXTURE_DIR, f'progress-{factor}.db')
+    if not os.path.exists(seeded):
+        os.environ['PROGRESS_DB_PATH'] = seeded
+        _seed_progress(ProgressTracker(), 100 * factor)
+    os.environ['PROGRESS_DB_PATH'] = os.path.join(workdir, 'progress.db')
+    shutil.copy(seeded, os.environ['PROGRESS_DB_PATH'])
+    return ProgressTracker()
+
+
+def _seed_progress(tracker, rows):
+    for i in range(rows):
+        tracker.update_flashcard_progress(f'card_{i}', i % 3 != 0, topic=f'topic_{i % 12}',
+                                          level=('basic', 'intermediate', 'advanced', 'expert')[i % 4])
+        tracker.record_problem_attempt(f'Problem {i % 40}', 'basic', 'JOIN', 'SELECT 1', (i * 7) % 101, i % 2 == 0)
+        tracker.save_problem({
+            'title': f'Problem {i}', 'description': 'Find the top customers by revenue.' * 4,
+            'difficulty': 'basic', 'topic': 'JOIN', 'hints': ['a', 'b', 'c'],
+            'solution': 'SELECT customer_id, SUM(total_amount) FROM orders GROUP BY customer_id'
+        })
+
+
+@benchmark('SQLChecker.execute_query[point]')
+def bench_execute_point(workdir, factor):
+    checker = _practice_checker(workdir, factor)
+    return lambda: checker.execute_query("SELECT * FROM customers WHERE customer_id = 42")
+
+
+@benchmark('SQLChecker.execute_query[join_aggregate]')
+def bench_execute_join(workdir, factor):
+    checker = _practice_checker(workdir, factor)
+    query = """SELECT c.city, COUNT(DISTINCT o.order_id) AS orders, SUM(oi.quantity * oi.unit_price) AS revenue
+               FROM customers c
+               JOIN orders o ON o.customer_id = c.customer_id
+               JOIN order_items oi ON oi.order_id = o.order_id
+               GROUP BY c.city ORDER BY revenue DESC"""
+    return lambda: checker.execute_query(query)
+
+
+@benchmark('SQLChecker.execute_query[full_scan]')
+def bench_execute_scan(workdir, factor):
+    checker = _practice_checker(workdir, factor)
+    return lambda: checker.execute_query("SELECT * FROM orders")
+
+
+@benchmark('http_encoding.dumps_bytes[full_scan]')
+def bench_dumps_full_scan(workdir, factor):
+    from http_encoding import dumps_bytes
+    result = _practice_checker(workdir, factor).execute_query("SELECT * FROM orders")
+    return lambda: dumps_bytes({'result': result})
+
+
+@benchmark('SQLChecker.is_safe_query')
+def bench_is_safe_query(workdir, factor):
+    # Query length grows with the scale
+    checker = SQLChecker()
+    query = ' UNION ALL '.join(
+        f"SELECT first_name, 'it''s -- not a comment' AS note FROM customers WHERE city = 'City {i}'"
+        for i in range(2 * factor)
+    )
+    return lambda: checker.is_safe_query(query)
+
+
+@benchmark('ProgressTracker.update_flashcard_progress')
+def bench_update_flashcard_progress(workdir, factor):
+    tracker = _progress_tracker(workdir, factor)
+    counter = iter(range(10 ** 9))
+    return lambda: tracker.update_flashcard_progress(f'card_{next(counter) % (100 * factor)}', True,
+                                                     topic='topic_1', level='basic')
+
+
+@benchmark('ProgressTracker.get_stats')
+def bench_get_stats(workdir, factor):
+    tracker = _progress_tracker(workdir, factor)
+    return tracker.get_stats
+
+
+@benchmark('ProgressTracker.get_saved_problems')
+def bench_get_saved_problems(workdir, factor):
+    tracker = _progress_tracker(workdir, factor)
+    return lambda: tracker.get_saved_problems(50)
+
+
+@benchmark('get_all_flashcards', scales=('small',))
+def bench_get_all_flashcards(workdir, factor):
+    from flashcards import get_all_flashcards
+    return lambda: get_all_flashcards(ai_service=None)
+
+
+@benchmark('SampleDataGenerator.initialize_database', min_time=0)
+def bench_initialize_database(workdir, factor):
+    builds = iter(range(10 ** 9))
+
+    def build():
+        generator = SampleDataGenerator(scale=factor)
+        generator.versions = DatabaseVersions(os.path.join(workdir, f'build-{next(builds)}'))
+        generator.initialize_database()
+    return build
+
+
+def measure(func, rounds, min_time):
+    """Seconds per call for each round; calls per round are calibrated so a round lasts at least min_time"""
+    func()  # Warm up (caches, lazy initialization)
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        iterations *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / iterations]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - start) / iterations)
+    return samples, iterations
+
+
+def run(name_filter=None, scales=None, rounds=15):
+    """Run the selected benchmarks; returns {benchmark id: stats}"""
+    results = {}
+    print(f"{'benchmark':<52} {'min us':>11} {'median us':>11} {'mean us':>11} {'stddev':>8} {'ops/s':>10}")
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench['name']:
+            continue
+        for scale in bench['scales']:
+            if scales and scale not in scales:
+                continue
+            bench_id = f"{bench['name']}@{scale}"
+            workdir = tempfile.mkdtemp(prefix='microbench-')
+            try:
+                func = bench['setup'](workdir, SCALES[scale])
+                # Slow benchmarks (whole database builds) get fewer rounds
+                samples, iterations = measure(func, rounds if bench['min_time'] else max(3, rounds // 3),
+                                              bench['min_time'])
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            median = statistics.median(samples)
+            stats = {
+                'min': min(samples),
+                'median': median,
+                'mean': statistics.mean(samples),
+                'stddev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+                'rounds': len(samples),
+                'iterations': iterations
+            }
+            results[bench_id] = stats
+            print(f"{bench_id:<52} {stats['min'] * 1e6:>11.1f} {median * 1e6:>11.1f} {stats['mean'] * 1e6:>11.1f} "
+                  f"{stats['stddev'] / stats['mean']:>7.1%} {1 / median:>10,.0f}")
+    return results
+
+
+def _baseline_path(name):
+    return name if name.endswith('.json') else os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def save(name, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = _baseline_path(name)
+    with open(path, 'w') as f:
+        json.dump({
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'machine': {
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'processor': platform.processor() or platform.machine()
+            },
+            'results': results
+        }, f, indent=2)
+    print(f"Saved {len(results)} results to {path}")
+
+
+def load(name):
+    with open(_baseline_path(name)) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold):
+    """Print median changes; returns the ids of benchmarks slower than baseline by more than threshold percent"""
+    regressions = []
+    print(f"\n{'benchmark':<52} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for bench_id, stats in current.items():
+        base = baseline['results'].get(bench_id)
+        if base is None:
+            print(f"{bench_id:<52} {'-':>12} {stats['median'] * 1e6:>12.1f} {'new':>8}")
+            continue
+        change = (stats['median'] - base['median']) / base['median'] * 100
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(bench_id)
+        elif change < -threshold:
+            flag = '  faster'
+        print(f"{bench_id:<52} {base['median'] * 1e6:>12.1f} {stats['median'] * 1e6:>12.1f} {change:>+7.1f}%{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {threshold:g}%")
+    else:
+        print(f"\nNo regressions beyond {threshold:g}%")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backend micro-benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run benchmarks')
+    run_parser.add_argument('--save', metavar='NAME', help='save results as a baseline')
+
+    compare_parser = commands.add_parser('compare', help='compare against a saved baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current', nargs='?', help='saved run to compare (default: run now)')
+    compare_parser.add_argument('--threshold', type=float, default=10.0, help='allowed slowdown in percent')
+
+    for command in (run_parser, compare_parser):
+        command.add_argument('--filter', help='only benchmarks whose name contains this')
+        command.add_argument('--scales', help=f"comma separated subset of {','.join(SCALES)}")
+        command.add_argument('--rounds', type=int, default=15)
+
+    commands.add_parser('list', help='list benchmarks')
+    args = parser.parse_args()
+
+    import atexit
+    atexit.register(shutil.rmtree, FIXTURE_DIR, ignore_errors=True)
+
+    if args.command == 'list':
+        for bench in BENCHMARKS:
+            print(f"{bench['name']} [{', '.join(bench['scales'])}]")
+        sys.exit(0)
+
+    scales = args.scales.split(',') if args.scales else None
+    if args.command == 'run':
+        results = run(args.filter, scales, args.rounds)
+        if args.save:
+            save(args.save, results)
+    else:
+        baseline = load(args.baseline)
+        if args.current:
+            current = load(args.current)['results']
+        else:
+            current = run(args.filter, scales, args.rounds)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Anthropic messages API, for benchmarking the backend offline
+
+Usage: mock_anthropic.py [--port 8765] [--latency-ms 800] [--latency-dist lognormal]
+                         [--jitter 0.5] [--tokens-per-second 80] [--error-rate 0.0]
+                         [--error-status 529] [--retry-after 1]
+
+Point the backend at it with ANTHROPIC_BASE_URL=http://127.0.0.1:8765 and any
+ANTHROPIC_API_KEY. POST /v1/messages answers like the real endpoint, with or
+without "stream": true. The reply is chosen from the prompt so that AIService
+can parse it: a problem (whose solution runs on the dataset named in the
+schema), a grading verdict, a hint, a hint ladder, flashcard wrong answers or
+an explanation. System blocks marked with cache_control are billed as cache
+writes the first time and cache reads afterwards, provided they reach the
+model's minimum cacheable length (shorter ones are billed as plain input, as
+the real API does).
+
+Latency before the first byte is drawn from the chosen distribution around
+--latency-ms; streamed replies then arrive at --tokens-per-second. A fraction
+--error-rate of requests fail with one of --error-status (comma separated).
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+# Shortest system prefix the API caches, by model family (others: DEFAULT_MIN_CACHEABLE_TOKENS)
+MIN_CACHEABLE_TOKENS = {'haiku': 2048}
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+ERROR_TYPES = {
+    400: 'invalid_request_error',
+    401: 'authentication_error',
+    429: 'rate_limit_error',
+    500: 'api_error',
+    529: 'overloaded_error'
+}
+
+# Problems whose solutions return rows on each practice dataset
+CANNED_PROBLEMS = {
+    'ecommerce': [
+        {
+            'title': 'Customers per City',
+            'description': 'List each city with the number of customers who live there, most customers first.',
+            'topic': 'GROUP BY',
+            'solution': 'SELECT city, COUNT(*) AS customers FROM customers GROUP BY city ORDER BY customers DESC'
+        },
+        {
+            'title': 'Premium Products',
+            'description': 'Find the name and price of every product that costs more than 100.',
+            'topic': 'WHERE',
+            'solution': 'SELECT product_name, price FROM products WHERE price > 100 ORDER BY price DESC'
+        },
+        {
+            'title': 'Revenue by Category',
+            'description': 'Show the total revenue of each product category across all order items.',
+            'topic': 'JOIN',
+            'solution': ('SELECT p.category, SUM(oi.quantity * oi.unit_price) AS revenue '
+                         'FROM order_items oi JOIN products p ON p.product_id = oi.product_id '
+                         'GROUP BY p.category ORDER BY revenue DESC')
+        }
+    ],
+    'timeseries': [
+        {
+            'title': 'Average Temperature per Station',
+            'description': 'Show each station name with its average recorded temperature.',
+            'topic': 'GROUP BY',
+            'solution': ('SELECT s.station_name, AVG(r.temperature_c) AS avg_temp '
+                         'FROM readings r JOIN stations s ON s.station_id = r.station_id '
+                         'GROUP BY s.station_name')
+        },
+        {
+            'title': 'Busiest Pages',
+            'description': 'List each page with its total views, most viewed first.',
+            'topic': 'Aggregation',
+            'solution': 'SELECT page, SUM(views) AS total_views FROM page_views GROUP BY page ORDER BY total_views DESC'
+        }
+    ]
+}
+
+HINTS = [
+    "Which table holds the data this problem is about?",
+    "Think about whether you need to filter rows, join tables or group them.",
+    "Build the query in steps: start with a plain SELECT, then add the clauses one at a time."
+]
+
+
+def _prompt_text(body):
+    """All system and user text of a request, with the system part separately"""
+    system = body.get('system') or ''
+    if isinstance(system, list):
+        system = '\n'.join(block.get('text', '') for block in system)
+    user = []
+    for message in body.get('messages', []):
+        content = message.get('content')
+        if isinstance(content, list):
+            content = '\n'.join(block.get('text', '') for block in content if isinstance(block, dict))
+        user.append(content or '')
+    return system, '\n'.join(user)
+
+
+class CannedReplies:
+    """Reply text for each kind of prompt AIService sends"""
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def reply(self, system, prompt):
+        text = system + '\n' + prompt
+        if 'Generate realistic SQL practice problems' in text:
+            return self.problem(text, prompt)
+        if "checking a student's answer" in text:
+            return self.verdict(prompt)
+        if 'preparing hints' in text:
+            return json.dumps(HINTS)
+        if 'providing a hint' in text:
+            return random.choice(HINTS)
+        if 'mapping each flashcard "id"' in text:
+            return self.wrong_answers_batch(prompt)
+        if 'Generate exactly 3 plausible but INCORRECT' in text:
+            return json.dumps(self.wrong_answers('this card'))
+        return ("This concept controls which rows a query returns. "
+                "Use it when you need to narrow or shape a result before it reaches the client.")
+
+    def problem(self, text, prompt):
+        dataset = 'timeseries' if 'page_views' in text else 'ecommerce'
+        problem = dict(CANNED_PROBLEMS[dataset][next(self._counter) % len(CANNED_PROBLEMS[dataset])])
+        match = re.search(r'at the (\w+) level', prompt)
+        problem.update({
+            'difficulty': match.group(1) if match else 'basic',
+            'hints': HINTS,
+            'explanation': 'Select the relevant columns, then filter, join and aggregate as needed.'
+        })
+        return '```json\n' + json.dumps(problem, indent=2) + '\n```'
+
+    def verdict(self, prompt):
+        matches = 'does NOT match' not in prompt
+        return json.dumps({
+            'correct': matches,
+            'score': 90 if matches else 40,
+            'message': 'Nice work!' if matches else 'Close, but the result differs from what is asked.',
+            'improvements': [] if matches else ['Check which rows your WHERE clause keeps'],
+            'praise': 'Your query is clearly structured.'
+        }, indent=2)
+
+    def wrong_answers(self, label):
+        return [f"A common misconception about {label} ({i})" for i in range(1, 4)]
+
+    def wrong_answers_batch(self, prompt):
+        ids = re.findall(r'"id": "([^"]+)"', prompt)
+        return json.dumps({card_id: self.wrong_answers(f'card {card_id}') for card_id in ids})
+
+
+class MockConfig:
+    """Latency, throughput and failure settings shared by all handler threads"""
+
+    def __init__(self, latency_ms=800, latency_dist='lognormal', jitter=0.5, tokens_per_second=80,
+                 error_rate=0.0, error_status=(529,), retry_after=1):
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+
+        self.replies = CannedReplies()
+        self.lock = threading.Lock()
+        self.cached_prefixes = set()
+        self.counts = {'requests': 0, 'streamed': 0, 'errors': 0}
+
+    def latency(self):
+        """Seconds before the first byte"""
+        base = self.latency_ms / 1000
+        if self.latency_dist == 'fixed':
+            return base
+        if self.latency_dist == 'uniform':
+            return random.uniform(base * (1 - self.jitter), base * (1 + self.jitter))
+        # lognormal with median base: a long tail like real model latency
+        return base * math.exp(random.gauss(0, self.jitter))
+
+    def usage(self, body, system, prompt, output_text):
+        """Token usage with prompt-cache accounting for system blocks marked cache_control"""
+        usage = {'input_tokens': len(prompt) // CHARS_PER_TOKEN + 1,
+                 'cache_creation_input_tokens': 0,
+                 'cache_read_input_tokens': 0,
+                 'output_tokens': len(output_text) // CHARS_PER_TOKEN + 1}
+        blocks = body.get('system') if isinstance(body.get('system'), list) else []
+        system_tokens = len(system) // CHARS_PER_TOKEN
+        model = body.get('model', '')
+        minimum = next((tokens for family, tokens in MIN_CACHEABLE_TOKENS.items() if family in model),
+                       DEFAULT_MIN_CACHEABLE_TOKENS)
+        cached = any(block.get('cache_control') for block in blocks) and system_tokens >= minimum
+        if cached:
+            with self.lock:
+                hit = system in self.cached_prefixes
+                self.cached_prefixes.add(system)
+            usage['cache_read_input_tokens' if hit else 'cache_creation_input_tokens'] = system_tokens
+        else:
+            usage['input_tokens'] += system_tokens
+        return usage
+
+
+class MessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = None  # Set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client gave up (timeout, or backend stopped mid-request)
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('request-id', f'req_mock_{uuid.uuid4().hex[:12]}')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message):
+        headers = {'retry-after': str(self.config.retry_after)} if status in (429, 529) else None
+        self._send_json(status, {
+            'type': 'error',
+            'error': {'type': ERROR_TYPES.get(status, 'api_error'), 'message': message}
+        }, headers)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.config.lock:
+                self._send_json(200, dict(self.config.counts, cached_prefixes=len(self.config.cached_prefixes)))
+        else:
+            self._send_error(404, 'Not found')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length)
+        if self.path.split('?')[0] != '/v1/messages':
+            self._send_error(404, 'Not found')
+            return
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            self._send_error(400, 'Request body is not JSON')
+            return
+
+        config = self.config
+        stream = bool(body.get('stream'))
+        with config.lock:
+            config.counts['requests'] += 1
+            config.counts['streamed'] += stream
+            fail = random.random() < config.error_rate
+            if fail:
+                config.counts['errors'] += 1
+
+        time.sleep(config.latency())
+        if fail:
+            self._send_error(random.choice(config.error_status), 'Injected failure from the mock server')
+            return
+
+        system, prompt = _prompt_text(body)
+        text = config.replies.reply(system, prompt)[:body.get('max_tokens', 1024) * CHARS_PER_TOKEN]
+        usage = config.usage(body, system, prompt, text)
+        message = {
+            'id': f'msg_mock_{uuid.uuid4().hex[:12]}',
+            'type': 'message',
+            'role': 'assistant',
+            'model': body.get('model', 'mock'),
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': usage
+        }
+        if stream:
+            self._stream(message, text)
+        else:
+            self._send_json(200, message)
+
+    def _event(self, event, data):
+        chunk = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+        self.wfile.write(f'{len(chunk):x}\r\n'.encode('ascii') + chunk + b'\r\n')
+        self.wfile.flush()
+
+    def _stream(self, message, text):
+        """Send the message as SSE events, a few tokens per text delta"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        usage = message['usage']
+        start = dict(message, content=[], stop_reason=None, usage=dict(usage, output_tokens=1))
+        self._event('message_start', {'type': 'message_start', 'message': start})
+        self._event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                            'content_block': {'type': 'text', 'text': ''}})
+        step = 4 * CHARS_PER_TOKEN
+        delay = 4 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+        for offset in range(0, len(text), step):
+            self._event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                                'delta': {'type': 'text_delta', 'text': text[offset:offset + step]}})
+            time.sleep(delay)
+        self._event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+        self._event('message_delta', {'type': 'message_delta',
+                                      'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                      'usage': {'output_tokens': usage['output_tokens']}})
+        self._event('message_stop', {'type': 'message_stop'})
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+
+def serve(config, host='127.0.0.1', port=8765):
+    """Start the mock server in a daemon thread; returns the server (call shutdown() to stop)"""
+    handler = type('Handler', (MessagesHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=800, help='median time to first byte')
+    parser.add_argument('--latency-dist', choices=('fixed', 'uniform', 'lognormal'), default='lognormal')
+    parser.add_argument('--jitter', type=float, default=0.5,
+                        help='uniform: +/- fraction of the latency; lognormal: sigma')
+    parser.add_argument('--tokens-per-second', type=float, default=80, help='streaming output rate')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', default='529', help='statuses of failed requests, e.g. 429,500,529')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry-after header on 429/529')
+
+
+def config_from_args(args):
+    return MockConfig(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=tuple(int(status) for status in args.error_status.split(',')),
+        retry_after=args.retry_after
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mock Anthropic messages API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = serve(config_from_args(args), args.host, args.port)
+    print(f"Mock Anthropic API on http://{args.host}:{args.port} "
+          f"(set ANTHROPIC_BASE_URL to this address); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
-"""Script to regenerate the practice database with more data"""
+"""Script to regenerate the practice database with more data
+
+The new database is built next to the current one and swapped in atomically,
+so this is safe to run while the server is serving queries.
+"""
 import os
 import sys
 
@@ -9,19 +13,12 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 from sample_data import SampleDataGenerator
 
 if __name__ == '__main__':
-    db_path = os.path.join(os.path.dirname(__file__), 'database', 'practice.db')
-    
-    # Remove existing database
-    if os.path.exists(db_path):
-        print(f"Removing existing database: {db_path}")
-        os.remove(db_path)
-    
+    generator = SampleDataGenerator()
+    previous = generator.versions.current()
+
     # Generate new database with more data
     print("Generating new database with expanded data...")
-    generator = SampleDataGenerator()
-    generator.initialize_database()
+    version = generator.rebuild_database()
     print("Database regenerated successfully!")
-    print(f"Location: {db_path}")
-
-
-
+    print(f"Version: {previous.id} -> {version.id}")
+    print(f"Location: {version.path}")
@@ -0,0 +1,49 @@
+"""Scratch sandboxes accept the DDL students practice, including ALTER TABLE"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from db_versions import DatabaseVersions
+from query_sandbox import AccessDenied
+from scratch_sessions import ScratchDatabaseManager
+
+
+@pytest.fixture
+def scratch(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'practice.db')
+    conn.execute('CREATE TABLE customers (customer_id INTEGER PRIMARY KEY, name TEXT, city TEXT)')
+    conn.execute("INSERT INTO customers VALUES (1, 'Ada', 'London')")
+    conn.commit()
+    conn.close()
+    return ScratchDatabaseManager(DatabaseVersions(str(tmp_path)))
+
+
+def test_alter_table_rename_to(scratch):
+    scratch.execute('s', 'ALTER TABLE customers RENAME TO clients')
+    assert scratch.execute('s', 'SELECT name FROM clients')['rows'] == [{'name': 'Ada'}]
+
+
+def test_alter_table_rename_column(scratch):
+    scratch.execute('s', 'ALTER TABLE customers RENAME COLUMN name TO full_name')
+    assert scratch.execute('s', 'SELECT full_name FROM customers')['rows'] == [{'full_name': 'Ada'}]
+
+
+def test_alter_table_drop_column(scratch):
+    scratch.execute('s', 'ALTER TABLE customers DROP COLUMN city')
+    assert scratch.execute('s', 'SELECT * FROM customers')['rows'] == [{'customer_id': 1, 'name': 'Ada'}]
+
+
+def test_alter_table_add_column(scratch):
+    scratch.execute('s', 'ALTER TABLE customers ADD COLUMN email TEXT')
+    assert scratch.execute('s', 'SELECT email FROM customers')['rows'] == [{'email': None}]
+
+
+def test_schema_rewrite_functions_stay_denied_read_only(scratch):
+    scratch.policy.allow_writes = False
+    with pytest.raises(AccessDenied):
+        scratch.execute('s', 'ALTER TABLE customers RENAME TO clients')